@@ -7,89 +7,475 @@ AI Enhancer - улучшение и структурирование описа
 - Форматирует для читабельности администратора
 - (Опционально) Использует AI для улучшения текста
 """
+import os
 import re
+import json
+import time
+import hashlib
 import logging
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 from datetime import datetime
 
+from app import metrics
+from app.tracing import span
+
 logger = logging.getLogger(__name__)
 
+# Версия анализатора - входит в ключ кэша, менять при изменении правил разбора
+ANALYZER_VERSION = "2"
+
+# Максимальное количество записей в кэше результатов
+CACHE_MAX_SIZE = 1024
+
+# Файл словарей ключевых слов (можно переопределить через env)
+KEYWORDS_PATH = Path(os.getenv(
+    "ENHANCER_KEYWORDS_PATH",
+    str(Path(__file__).resolve().parent / 'data' / 'enhancer_keywords.json')
+))
+
+# Как часто (в секундах) проверять mtime файла словарей
+KEYWORDS_CHECK_INTERVAL = 5.0
+
+# Ограничения на разбор длинных описаний (сообщение Telegram - до 4096 символов)
+KEY_POINTS_MAX = 8              # максимум ключевых пунктов в результате
+ANALYSIS_MAX_CHARS = 20000      # сколько символов описания анализировать
+KEY_POINTS_CANDIDATES = 64      # максимум предложений-кандидатов для ранжирования
+KEY_POINT_MAX_CHARS = 200       # максимальная длина одного пункта
+ORIGINAL_DESCRIPTION_MAX_CHARS = 1500  # длина цитаты оригинала в сообщении
+
+# Признаки информативного предложения: числа и единицы измерения
+_NUMBER_PATTERN = re.compile(r'\d+')
+_MEASUREMENT_PATTERN = re.compile(
+    r'\d+[\s,.]?\d*\s*(?:м2|м²|m2|m²|кв|sq|м\b|m\b|см|cm|мм|mm|€|евро|euro|eur)',
+    re.IGNORECASE
+)
+_SENTENCE_BOUNDARY = re.compile(r'[.!?;]\s+')
+
+
+class CompiledVocabulary(NamedTuple):
+    """Неизменяемый скомпилированный словарь ключевых слов."""
+    # (тип проекта, ((ключевое слово, вес), ...))
+    project_types: Tuple[Tuple[str, Tuple[Tuple[str, float], ...]], ...]
+    urgent_keywords: Tuple[str, ...]
+    urgent_label: str
+    normal_label: str
+    fingerprint: str
+
+
+def _compile_weights(project_type: str, keywords: Any) -> Tuple[Tuple[str, float], ...]:
+    """
+    Нормализовать ключевые слова типа проекта в пары (слово, вес).
+    
+    Слово, содержащее другое слово того же типа ("кровля" и "кров"),
+    отбрасывается: оно совпадает только вместе с более коротким, и одно
+    вхождение учитывалось бы дважды.
+    """
+    if isinstance(keywords, dict):
+        weights = {str(k).lower(): float(w) for k, w in keywords.items()}
+    else:
+        weights = {str(k).lower(): 1.0 for k in keywords}
+    compiled = []
+    for word, weight in weights.items():
+        shorter = next((other for other in weights if other != word and other in word), None)
+        if shorter is not None:
+            logger.warning("Keyword %r of %s contains %r and is ignored", word, project_type, shorter)
+            continue
+        compiled.append((word, weight))
+    return tuple(compiled)
+
+
+def compile_vocabulary(raw: Dict[str, Any]) -> CompiledVocabulary:
+    """
+    Скомпилировать словарь из данных файла.
+    
+    Ключевые слова типа проекта задаются списком (вес 1.0)
+    или объектом {"слово": вес}.
+    
+    Args:
+        raw: Распарсенный JSON со словарями
+        
+    Returns:
+        CompiledVocabulary
+        
+    Raises:
+        ValueError: Если структура файла некорректна
+    """
+    try:
+        project_types = tuple(
+            (str(name), _compile_weights(str(name), keywords))
+            for name, keywords in raw['project_types'].items()
+        )
+        urgent_keywords = tuple(str(k).lower() for k in raw['urgent_keywords'])
+        labels = raw['urgency_labels']
+        urgent_label = str(labels['urgent'])
+        normal_label = str(labels['normal'])
+    except (KeyError, AttributeError, TypeError) as e:
+        raise ValueError(f"Invalid keyword dictionary structure: {e}") from e
+    
+    canonical = json.dumps(raw, ensure_ascii=False, sort_keys=True).encode('utf-8')
+    return CompiledVocabulary(
+        project_types=project_types,
+        urgent_keywords=urgent_keywords,
+        urgent_label=urgent_label,
+        normal_label=normal_label,
+        fingerprint=hashlib.sha256(canonical).hexdigest()[:16],
+    )
+
+
+class KeywordVocabulary:
+    """
+    Словарь ключевых слов с горячей перезагрузкой из файла.
+    
+    При изменении mtime файл перечитывается и компилируется заново,
+    затем ссылка на скомпилированный словарь подменяется одним
+    присваиванием - классификация всегда видит целый словарь.
+    Если новый файл некорректен, остаётся прежняя версия.
+    """
+    
+    def __init__(self, path: Path, check_interval: float = KEYWORDS_CHECK_INTERVAL) -> None:
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._compiled: Optional[CompiledVocabulary] = None
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+    
+    def get(self) -> CompiledVocabulary:
+        """
+        Текущий словарь (с проверкой изменения файла не чаще check_interval).
+        
+        Raises:
+            OSError, ValueError: Если словарь не удалось загрузить в первый раз
+        """
+        now = time.monotonic()
+        if self._compiled is None or now >= self._next_check:
+            self._maybe_reload(now)
+        return self._compiled
+    
+    def reload(self) -> CompiledVocabulary:
+        """Принудительно перечитать файл словарей."""
+        with self._lock:
+            self._load(os.stat(self.path).st_mtime)
+        return self._compiled
+    
+    def _maybe_reload(self, now: float) -> None:
+        with self._lock:
+            if self._compiled is not None and now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            mtime = None
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if self._compiled is None or mtime != self._mtime:
+                    self._load(mtime)
+            except (OSError, ValueError) as e:
+                if self._compiled is None:
+                    raise
+                # Не перечитываем тот же сломанный файл до следующего изменения
+                self._mtime = mtime
+                logger.error("Keyword dictionary reload failed, keeping previous version: %s", e)
+    
+    def _load(self, mtime: float) -> None:
+        with open(self.path, encoding='utf-8') as f:
+            compiled = compile_vocabulary(json.load(f))
+        # Атомарная подмена ссылки
+        self._compiled = compiled
+        self._mtime = mtime
+        logger.info("Loaded keyword dictionary %s (fingerprint %s)", self.path, compiled.fingerprint)
+
 
-def extract_key_points(description: str) -> List[str]:
+_vocabulary = KeywordVocabulary(KEYWORDS_PATH)
+
+
+def get_vocabulary() -> CompiledVocabulary:
+    """Текущий скомпилированный словарь ключевых слов."""
+    return _vocabulary.get()
+
+
+class LRUCache:
+    """
+    Ограниченный LRU-кэш с подсчётом попаданий.
+    
+    Потокобезопасен: операции защищены блокировкой, так как
+    анализ может вызываться из пула потоков.
+    """
+    
+    def __init__(self, max_size: int = CACHE_MAX_SIZE) -> None:
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Вернуть значение по ключу (или None) и обновить статистику."""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, value: Any) -> None:
+        """Сохранить значение, вытесняя самую старую запись при переполнении."""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Очистить кэш и сбросить статистику."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Статистика кэша: размер, попадания, промахи, hit rate."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+
+# Кэш результатов анализа (не зависит от языка и данных клиента)
+_analysis_cache = LRUCache()
+
+# Кэш отформатированных описаний для администратора
+_enhanced_cache = LRUCache()
+
+
+def make_cache_key(description: str, lang: str = '', fingerprint: str = '') -> str:
+    """
+    Построить ключ кэша из хэша описания, языка и версии анализатора.
+    
+    Args:
+        description: Исходное описание
+        lang: Язык форматирования (пустая строка для анализа)
+        fingerprint: Отпечаток словаря ключевых слов
+        
+    Returns:
+        Hex-строка SHA-256
+    """
+    version = f"{ANALYZER_VERSION}:{fingerprint}"
+    payload = f"{version}\x00{lang}\x00{description}".encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+
+def get_cache_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Метрики кэшей энхансера.
+    
+    Returns:
+        Словарь {'analysis': {...}, 'enhanced': {...}}
+    """
+    return {
+        'analysis': _analysis_cache.stats(),
+        'enhanced': _enhanced_cache.stats(),
+    }
+
+
+def _cache_stat(field: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+    """Функция для Gauge.set_function: поле статистики по каждому кэшу."""
+    return lambda: {(name,): stats[field] for name, stats in get_cache_stats().items()}
+
+
+metrics.ENHANCER_CACHE_HITS.set_function(_cache_stat('hits'))
+metrics.ENHANCER_CACHE_MISSES.set_function(_cache_stat('misses'))
+metrics.ENHANCER_CACHE_HIT_RATIO.set_function(_cache_stat('hit_rate'))
+
+
+def clear_caches() -> None:
+    """Очистить все кэши энхансера (например, после смены правил)."""
+    _analysis_cache.clear()
+    _enhanced_cache.clear()
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """Обрезать текст до max_chars символов с многоточием."""
+    if len(text) <= max_chars:
+        return text
+    return text[:max_chars - 1].rstrip() + '…'
+
+
+def _iter_sentences(text: str):
+    """Лениво выдаёт предложения текста (без промежуточного списка)."""
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+
+def score_key_point(sentence: str, vocabulary: Optional[CompiledVocabulary] = None) -> float:
+    """
+    Оценивает информативность предложения.
+    
+    Учитываются размеры и суммы, числа и ключевые слова словаря.
+    
+    Args:
+        sentence: Предложение
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
+        
+    Returns:
+        Балл информативности (больше - важнее)
+    """
+    vocabulary = vocabulary or get_vocabulary()
+    sentence_lower = sentence.lower()
+    
+    score = 3.0 * len(_MEASUREMENT_PATTERN.findall(sentence))
+    score += len(_NUMBER_PATTERN.findall(sentence))
+    for _, keywords in vocabulary.project_types:
+        score += sum(weight for keyword, weight in keywords if keyword in sentence_lower)
+    score += sum(2.0 for keyword in vocabulary.urgent_keywords if keyword in sentence_lower)
+    return score
+
+
+def extract_key_points(
+    description: str,
+    max_points: int = KEY_POINTS_MAX,
+    max_chars: int = ANALYSIS_MAX_CHARS,
+    vocabulary: Optional[CompiledVocabulary] = None
+) -> List[str]:
     """
     Извлекает ключевые пункты из описания.
     
     Разбивает текст на предложения и определяет важные пункты.
+    Стоимость ограничена: просматриваются первые max_chars символов
+    и не более KEY_POINTS_CANDIDATES предложений. Если предложений
+    больше max_points, остаются самые информативные (в исходном порядке).
     
     Args:
         description: Исходное описание проекта
+        max_points: Максимальное количество пунктов
+        max_chars: Сколько символов описания просматривать
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
         
     Returns:
         Список ключевых пунктов
     """
-    # Разбиваем на предложения
-    sentences = re.split(r'[.!?;]\s+', description)
-    
-    # Фильтруем пустые и короткие
-    key_points = [s.strip() for s in sentences if len(s.strip()) > 5]
-    
-    return key_points
+    candidates = []
+    for sentence in _iter_sentences(description[:max_chars]):
+        sentence = sentence.strip()
+        # Фильтруем пустые и короткие
+        if len(sentence) > 5:
+            candidates.append(truncate_text(sentence, KEY_POINT_MAX_CHARS))
+            if len(candidates) >= KEY_POINTS_CANDIDATES:
+                break
+    
+    if len(candidates) <= max_points:
+        return candidates
+    
+    vocabulary = vocabulary or get_vocabulary()
+    ranked = sorted(
+        range(len(candidates)),
+        key=lambda i: score_key_point(candidates[i], vocabulary),
+        reverse=True
+    )
+    return [candidates[i] for i in sorted(ranked[:max_points])]
 
 
-def detect_project_type(description: str) -> Optional[str]:
+def classify_project_types(
+    description: str,
+    vocabulary: Optional[CompiledVocabulary] = None
+) -> List[Tuple[str, float]]:
     """
-    Определяет тип проекта по ключевым словам.
+    Оценивает все типы проекта по взвешенным ключевым словам.
+    
+    Балл типа - сумма весов найденных ключевых слов (каждое слово
+    учитывается один раз). Уверенность - доля балла типа в сумме
+    баллов всех найденных типов.
     
     Args:
         description: Описание проекта
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
         
     Returns:
-        Тип проекта или None
+        Список (тип, уверенность) по убыванию уверенности;
+        при равенстве сохраняется порядок типов в словаре
     """
+    vocabulary = vocabulary or get_vocabulary()
     description_lower = description.lower()
     
-    # Словарь типов проектов и их ключевых слов
-    project_types = {
-        'Ремонт': ['ремонт', 'renovation', 'renovacija', 'отделка', 'finishing'],
-        'Строительство': ['строительство', 'construction', 'gradnja', 'постройка', 'build'],
-        'Сантехника': ['сантехника', 'plumbing', 'водопровод', 'канализация', 'pipes'],
-        'Электрика': ['электрика', 'electrical', 'električni', 'проводка', 'wiring'],
-        'Кровля': ['крыша', 'кровля', 'roof', 'roofing', 'кров'],
-        'Фасад': ['фасад', 'facade', 'fasada', 'внешняя отделка'],
-        'Интерьер': ['интерьер', 'interior', 'дизайн', 'design'],
-        'Ландшафт': ['ландшафт', 'landscape', 'участок', 'garden', 'yard'],
-    }
+    scores = []
+    for project_type, keywords in vocabulary.project_types:
+        score = sum(weight for keyword, weight in keywords if keyword in description_lower)
+        if score > 0:
+            scores.append((project_type, score))
     
-    for project_type, keywords in project_types.items():
-        for keyword in keywords:
-            if keyword in description_lower:
-                return project_type
+    total = sum(score for _, score in scores)
+    ranked = sorted(scores, key=lambda item: item[1], reverse=True)
+    return [(project_type, score / total) for project_type, score in ranked]
+
+
+def classify_project_types_batch(
+    descriptions: List[str],
+    vocabulary: Optional[CompiledVocabulary] = None
+) -> List[List[Tuple[str, float]]]:
+    """
+    Классифицирует пачку описаний одним снимком словаря (для backfill).
     
-    return None
+    Args:
+        descriptions: Список описаний
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
+        
+    Returns:
+        Ранжированные типы для каждого описания
+    """
+    vocabulary = vocabulary or get_vocabulary()
+    return [classify_project_types(d, vocabulary) for d in descriptions]
 
 
-def extract_urgency(description: str) -> Optional[str]:
+def detect_project_type(
+    description: str,
+    vocabulary: Optional[CompiledVocabulary] = None
+) -> Optional[str]:
+    """
+    Определяет наиболее вероятный тип проекта по ключевым словам.
+    
+    Args:
+        description: Описание проекта
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
+        
+    Returns:
+        Тип проекта или None
+    """
+    ranked = classify_project_types(description, vocabulary)
+    return ranked[0][0] if ranked else None
+
+
+def extract_urgency(
+    description: str,
+    vocabulary: Optional[CompiledVocabulary] = None
+) -> Optional[str]:
     """
     Определяет срочность проекта по ключевым словам.
     
     Args:
         description: Описание проекта
+        vocabulary: Словарь ключевых слов (по умолчанию - текущий из файла)
         
     Returns:
         Уровень срочности или None
     """
+    vocabulary = vocabulary or get_vocabulary()
     description_lower = description.lower()
     
-    urgent_keywords = [
-        'срочно', 'urgent', 'hitno', 'быстро', 'quickly',
-        'asap', 'немедленно', 'сегодня', 'today', 'danas'
-    ]
-    
-    for keyword in urgent_keywords:
+    for keyword in vocabulary.urgent_keywords:
         if keyword in description_lower:
-            return '🔴 Срочно'
+            return vocabulary.urgent_label
     
-    return '⚪ Обычный приоритет'
+    return vocabulary.normal_label
 
 
 def extract_budget_mention(description: str) -> Optional[str]:
@@ -119,6 +505,45 @@ def extract_budget_mention(description: str) -> Optional[str]:
     return None
 
 
+def _analyze(description: str) -> Dict[str, Any]:
+    """
+    Выполнить анализ описания с кэшированием по хэшу содержимого.
+    
+    Args:
+        description: Исходное описание
+        
+    Returns:
+        Словарь с key_points, project_types, project_type, urgency, budget
+        (key_points - кортеж, чтобы кэшированное значение не изменялось)
+    """
+    # Один снимок словаря на весь анализ
+    vocabulary = get_vocabulary()
+    key = make_cache_key(description, fingerprint=vocabulary.fingerprint)
+    cached = _analysis_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    # Анализируем только начало очень длинных описаний - стоимость ограничена
+    text = description[:ANALYSIS_MAX_CHARS]
+    with span('enhancer.classify'):
+        project_types = tuple(classify_project_types(text, vocabulary))
+    with span('enhancer.key_points'):
+        key_points = tuple(extract_key_points(text, vocabulary=vocabulary))
+    with span('enhancer.urgency'):
+        urgency = extract_urgency(text, vocabulary)
+    with span('enhancer.budget'):
+        budget = extract_budget_mention(text)
+    analysis = {
+        'key_points': key_points,
+        'project_types': project_types,
+        'project_type': project_types[0][0] if project_types else None,
+        'urgency': urgency,
+        'budget': budget,
+    }
+    _analysis_cache.put(key, analysis)
+    return analysis
+
+
 def structure_description(
     description: str,
     full_name: str,
@@ -137,24 +562,15 @@ def structure_description(
     Returns:
         Словарь со структурированной информацией
     """
-    # Извлекаем ключевые пункты
-    key_points = extract_key_points(description)
-    
-    # Определяем тип проекта
-    project_type = detect_project_type(description)
-    
-    # Определяем срочность
-    urgency = extract_urgency(description)
-    
-    # Ищем бюджет
-    budget = extract_budget_mention(description)
+    analysis = _analyze(description)
     
     structured = {
         'original_description': description,
-        'key_points': key_points,
-        'project_type': project_type,
-        'urgency': urgency,
-        'budget': budget,
+        'key_points': list(analysis['key_points']),
+        'project_types': list(analysis['project_types']),
+        'project_type': analysis['project_type'],
+        'urgency': analysis['urgency'],
+        'budget': analysis['budget'],
         'client_name': full_name,
         'client_phone': phone,
         'client_email': email,
@@ -188,7 +604,12 @@ def format_enhanced_description(structured: Dict[str, any], lang: str = 'ru') ->
     lines.append('')
     
     # Тип проекта
-    if structured['project_type']:
+    project_types = structured.get('project_types') or []
+    if len(project_types) > 1:
+        ranked = ', '.join(f"{name} ({confidence:.0%})" for name, confidence in project_types)
+        lines.append(f"🏗️ Тип проекта: {ranked}")
+        lines.append('')
+    elif structured['project_type']:
         lines.append(f"🏗️ Тип проекта: {structured['project_type']}")
         lines.append('')
     
@@ -223,7 +644,8 @@ def format_enhanced_description(structured: Dict[str, any], lang: str = 'ru') ->
     else:
         lines.append('📝 Original Client Description:')
     
-    lines.append(f'"{structured["original_description"]}"')
+    original = truncate_text(structured["original_description"], ORIGINAL_DESCRIPTION_MAX_CHARS)
+    lines.append(f'"{original}"')
     
     return '\n'.join(lines)
 
@@ -251,18 +673,28 @@ def enhance_lead_description(
         Улучшенное описание для администратора
     """
     try:
+        # Результат форматирования не зависит от данных клиента -
+        # повторные описания берём из кэша
+        key = make_cache_key(description, lang, get_vocabulary().fingerprint)
+        enhanced = _enhanced_cache.get(key)
+        if enhanced is not None:
+            logger.debug("Enhanced description cache hit for %s", full_name)
+            return enhanced
+        
         # Структурируем описание
         structured = structure_description(description, full_name, phone, email)
         
         # Форматируем для админа
-        enhanced = format_enhanced_description(structured, lang)
+        with span('enhancer.format'):
+            enhanced = format_enhanced_description(structured, lang)
+        _enhanced_cache.put(key, enhanced)
         
-        logger.info(f"Enhanced description for {full_name}")
+        logger.info("Enhanced description for %s", full_name)
         
         return enhanced
         
     except Exception as e:
-        logger.error(f"Error enhancing description: {e}", exc_info=True)
+        logger.error("Error enhancing description: %s", e, exc_info=True)
         # Fallback - возвращаем оригинальное описание
         return description
 
@@ -5,6 +5,7 @@ import asyncio
 import logging
 import sys
 import os
+from typing import TYPE_CHECKING, List, Optional
 
 # Устанавливаем кодировку UTF-8 для Windows консоли
 if sys.platform == 'win32':
@@ -12,23 +13,228 @@ if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8')
     sys.stderr.reconfigure(encoding='utf-8')
 
-from aiogram import Bot, Dispatcher
+# Профиль холодного старта - до импорта aiogram и app.config
+if __name__ == "__main__" and '--profile-startup' in sys.argv[1:]:
+    from app.startup import profile_startup
+    sys.exit(profile_startup())
+
+# Конфигурация - до aiogram: при ошибке окружения процесс завершается
+# сразу, не тратя секунды на импорт aiogram (цикл перезапуска)
+from app.config import (
+    BOT_TOKEN, TELEGRAM_API_URL, DB_PATH, DRAFT_TTL_MINUTES, DRAFT_SWEEP_INTERVAL, DRAFT_EXPIRY_NOTIFY,
+    BOT_MODE, WEBHOOK_BASE_URL, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_HOST, WEBHOOK_PORT,
+    WORKERS, SHARD_QUEUE_SIZE, SHARD_MAX_IN_FLIGHT, FSM_STORAGE_URL, METRICS_HOST, METRICS_PORT,
+    HEALTH_MAX_LOOP_LAG_MS, HEALTH_MAX_POLL_AGE, TRACE_SLOW_MS, TRACE_EXPORT_PATH,
+    UPDATE_RECORD_PATH, UPDATE_RECORD_SALT, LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE
+)
+
+from aiogram import Bot, Dispatcher, Router
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
 
-from app.config import BOT_TOKEN, DB_PATH
 from app.db import init_db
-from app.handlers import start, lead_flow, common, my_leads
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    stream=sys.stdout
+from app import callbacks, metrics
+from app.middlewares import (
+    UpdateStats, UpdateTimingMiddleware, UserLockMiddleware,
+    HandlerMetricsMiddleware, ApiMetricsMiddleware, TracingMiddleware, ApiTracingMiddleware,
+    LogContextMiddleware
 )
+from app.health import HealthMonitor, health_routes
+from app.logging_setup import setup_logging
+from app.tracing import SlowTraceExporter
+from app.drafts import DraftSweeper, DraftActivityMiddleware
+from app.handlers import admin, start, menu, lead_flow, common, my_leads
+
+if TYPE_CHECKING:
+    from app.recording import UpdateRecorder
+
 logger = logging.getLogger(__name__)
 
 
+async def _on_startup(bot: Bot, draft_sweeper: DraftSweeper) -> None:
+    draft_sweeper.start(bot)
+
+
+async def _on_shutdown(
+    draft_sweeper: DraftSweeper,
+    update_stats: UpdateStats,
+    update_recorder: Optional["UpdateRecorder"] = None
+) -> None:
+    await draft_sweeper.stop()
+    update_stats.log_summary()
+    if update_recorder is not None:
+        update_recorder.close()
+        logger.info("Recorded %s updates to %s", update_recorder.recorded, update_recorder.path)
+
+
+def create_bot(token: str = BOT_TOKEN, api_url: str = TELEGRAM_API_URL) -> Bot:
+    """
+    Создать бота с HTML-разметкой по умолчанию, метриками и трассировкой
+    запросов к API.
+    
+    Args:
+        token: Токен бота
+        api_url: Базовый URL Bot API (пусто - api.telegram.org)
+    
+    Returns:
+        Бот
+    """
+    session = AiohttpSession(api=TelegramAPIServer.from_base(api_url)) if api_url else None
+    bot = Bot(
+        token=token,
+        session=session,
+        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    )
+    bot.session.middleware(ApiMetricsMiddleware())
+    bot.session.middleware(ApiTracingMiddleware())
+    return bot
+
+
+def create_storage(url: str = FSM_STORAGE_URL) -> BaseStorage:
+    """
+    Создать хранилище FSM.
+    
+    Args:
+        url: URL Redis-совместимого сервера (пусто - хранение в памяти процесса)
+    
+    Returns:
+        Хранилище FSM
+    
+    Raises:
+        RuntimeError: Если задан URL, но пакет redis не установлен
+    """
+    if not url:
+        return MemoryStorage()
+    try:
+        from aiogram.fsm.storage.redis import RedisStorage
+    except ImportError as e:
+        raise RuntimeError("FSM_STORAGE_URL requires the 'redis' package: pip install redis") from e
+    return RedisStorage.from_url(url)
+
+
+def create_dispatcher(mode: str = 'polling') -> Dispatcher:
+    """
+    Создать диспетчер с роутерами и middleware.
+    
+    Общий для режимов polling и webhook. Роутеры можно подключить
+    только к одному диспетчеру, поэтому функция вызывается один раз
+    на процесс.
+    
+    Args:
+        mode: Режим транспорта (для статистики обработки обновлений)
+    
+    Returns:
+        Настроенный диспетчер
+    """
+    dp = Dispatcher(storage=create_storage())
+    
+    # Статистика обработки обновлений
+    update_stats = UpdateStats(mode)
+    dp['update_stats'] = update_stats
+    dp.update.outer_middleware(LogContextMiddleware())
+    dp.update.outer_middleware(UpdateTimingMiddleware(update_stats))
+    dp.update.outer_middleware(TracingMiddleware(SlowTraceExporter(TRACE_SLOW_MS, TRACE_EXPORT_PATH)))
+    user_lock = UserLockMiddleware()
+    dp.update.outer_middleware(user_lock)
+    metrics.USERS_IN_FLIGHT.set_function(lambda: {(): user_lock.active_users})
+    
+    # Запись трафика для benchmarks/replay.py (после блокировки пользователя)
+    if UPDATE_RECORD_PATH:
+        # Импорт здесь: запись включается редко
+        from app.recording import UpdateRecorder, UpdateRecorderMiddleware, shard_record_path
+        recorder = UpdateRecorder(shard_record_path(UPDATE_RECORD_PATH, mode), UPDATE_RECORD_SALT)
+        dp['update_recorder'] = recorder
+        dp.update.outer_middleware(UpdateRecorderMiddleware(recorder))
+    
+    # Время выполнения обработчиков (inner middleware действует во всех роутерах)
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+    
+    # Очистка брошенных черновиков заявок
+    sweeper = DraftSweeper(
+        dp.storage,
+        ttl_seconds=DRAFT_TTL_MINUTES * 60,
+        interval_seconds=DRAFT_SWEEP_INTERVAL,
+        notify=DRAFT_EXPIRY_NOTIFY
+    )
+    dp['draft_sweeper'] = sweeper
+    dp.update.outer_middleware(DraftActivityMiddleware(sweeper))
+    dp.startup.register(_on_startup)
+    dp.shutdown.register(_on_shutdown)
+    
+    dp.include_routers(*_handler_routers())
+    
+    return dp
+
+
+def _handler_routers() -> List[Router]:
+    """Роутеры обработчиков в порядке подключения (порядок важен!)."""
+    return [
+        admin.router,
+        start.router,
+        menu.router,
+        common.router,
+        my_leads.router,
+        lead_flow.router,
+        # Все callback-запросы - через единую таблицу app.callbacks
+        # (обработчики регистрируются при импорте модулей handlers)
+        callbacks.router,
+    ]
+
+
+def used_update_types() -> List[str]:
+    """
+    Типы обновлений, для которых есть обработчики (allowed_updates).
+    
+    Считается по роутерам обработчиков без создания диспетчера:
+    фронтальному процессу в режиме воркеров не нужны его middleware,
+    хранилище, запись трафика и очистка черновиков.
+    """
+    used = set()
+    for router in _handler_routers():
+        used.update(router.resolve_used_update_types())
+    return sorted(used)
+
+
+async def _run_sharded(bot: Bot, health: HealthMonitor) -> None:
+    """
+    Принимать обновления в этом процессе и обрабатывать в WORKERS воркерах.
+    
+    Args:
+        bot: Бот фронтального процесса
+        health: Проверки здоровья фронтального процесса (последнее
+                обновление - последнее переданное воркеру)
+    """
+    from app.sharding import ShardRouter, receive_polling, receive_webhook
+    
+    # Фронтальный процесс обновления не обрабатывает - диспетчер не нужен
+    allowed_updates = used_update_types()
+    
+    shards = ShardRouter(WORKERS, SHARD_QUEUE_SIZE, BOT_TOKEN, SHARD_MAX_IN_FLIGHT)
+    shards.start()
+    metrics.SHARD_QUEUE_DEPTH.set_function(shards.queue_depths)
+    health.last_update = lambda: shards.last_dispatch_at
+    try:
+        if BOT_MODE == 'webhook':
+            await receive_webhook(
+                bot, shards,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                path=WEBHOOK_PATH,
+                base_url=WEBHOOK_BASE_URL,
+                secret=WEBHOOK_SECRET,
+                allowed_updates=allowed_updates
+            )
+        else:
+            await receive_polling(bot, shards, allowed_updates)
+    finally:
+        shards.stop()
+
+
 async def main():
     """
     Главная функция - инициализация и запуск бота
@@ -37,34 +243,72 @@ async def main():
     init_db(DB_PATH)
     
     # Создаем бота
-    bot = Bot(
-        token=BOT_TOKEN,
-        default=DefaultBotProperties(parse_mode=ParseMode.HTML)
+    bot = create_bot()
+    
+    # Проверки здоровья (задержка event loop, getUpdates, БД)
+    health = HealthMonitor(
+        DB_PATH,
+        polling=BOT_MODE == 'polling',
+        max_loop_lag_ms=HEALTH_MAX_LOOP_LAG_MS,
+        max_poll_age=HEALTH_MAX_POLL_AGE
     )
+    health.start()
     
-    # Создаем диспетчер
-    dp = Dispatcher()
+    # Метрики Prometheus и /healthz, /readyz
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await metrics.start_metrics_server(
+            METRICS_HOST, METRICS_PORT, routes=health_routes(health)
+        )
+    
+    if WORKERS > 1:
+        logger.info("🚀 Бот запущен и готов к работе! (режим: %s, воркеров: %s)", BOT_MODE, WORKERS)
+        try:
+            await _run_sharded(bot, health)
+        finally:
+            await bot.session.close()
+            if metrics_runner is not None:
+                await metrics_runner.cleanup()
+            await health.stop()
+        return
     
-    # Регистрируем роутеры (порядок важен!)
-    dp.include_router(start.router)
-    dp.include_router(common.router)
-    dp.include_router(my_leads.router)
-    dp.include_router(lead_flow.router)
+    # Создаем диспетчер
+    dp = create_dispatcher(BOT_MODE)
+    health.last_update = lambda: dp['update_stats'].last_update_at
     
-    logger.info("🚀 Бот запущен и готов к работе!")
+    logger.info("🚀 Бот запущен и готов к работе! (режим: %s)", BOT_MODE)
     
-    # Запускаем polling (long polling)
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if BOT_MODE == 'webhook':
+            # Импорт здесь: aiohttp-сервер нужен только в режиме webhook
+            from app.webhook import run_webhook
+            await run_webhook(
+                dp, bot,
+                host=WEBHOOK_HOST,
+                port=WEBHOOK_PORT,
+                path=WEBHOOK_PATH,
+                base_url=WEBHOOK_BASE_URL,
+                secret=WEBHOOK_SECRET
+            )
+        else:
+            # Long polling; webhook, оставшийся от режима webhook,
+            # иначе не даст получать обновления через getUpdates
+            await bot.delete_webhook()
+            await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
     finally:
         await bot.session.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await health.stop()
 
 
 if __name__ == "__main__":
+    # Логи пишутся через очередь в отдельном потоке (JSON или текст)
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE)
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("⛔ Бот остановлен пользователем")
     except Exception as e:
-        logger.error(f"❌ Критическая ошибка: {e}")
+        logger.error("❌ Критическая ошибка: %s", e)
         raise
@@ -0,0 +1,281 @@
+"""
+Callback dispatch - единая таблица маршрутизации callback-запросов.
+
+Формат callback_data: "<префикс>:<поле>[:<поле>...]".
+
+Обработчики регистрируются в общей таблице:
+- по точному значению ("confirm:send") - действие без параметров;
+- по префиксу с типами полей ("select_lead", int) - поля разбираются
+  и передаются обработчику аргументами.
+
+Один фильтр на роутере находит обработчик поиском в словаре
+(сначала точное значение, затем префикс), проверяет состояние FSM
+и передаёт разобранные поля. Два обработчика не могут занять
+одно значение или префикс - это проверяется при регистрации.
+
+Для медленных обработчиков (ack=True) callback подтверждается сразу,
+до вызова обработчика, чтобы у пользователя не крутился индикатор
+на кнопке. Такие обработчики отвечают через answer_callback().
+"""
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple, Union
+
+from aiogram import Router
+from aiogram.filters import BaseFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.types import CallbackQuery
+
+logger = logging.getLogger(__name__)
+
+# Разделитель полей в callback_data
+SEPARATOR = ":"
+
+# Ограничение Telegram на длину callback_data (байт)
+MAX_CALLBACK_DATA_BYTES = 64
+
+# Сколько последних подтверждённых callback id помнить
+ACKNOWLEDGED_MAX_SIZE = 10000
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+class CallbackRoute(NamedTuple):
+    """Запись таблицы маршрутизации."""
+    key: str
+    handler: Handler
+    fields: Tuple[type, ...]
+    state: Optional[str]
+    ack: bool
+    ack_text: Optional[str]
+
+
+def encode_callback(prefix: str, *values: Any) -> str:
+    """
+    Собрать callback_data из префикса и полей.
+    
+    Args:
+        prefix: Префикс действия
+        *values: Значения полей
+    
+    Returns:
+        Строка callback_data
+    
+    Raises:
+        ValueError: Если поле содержит разделитель или данные длиннее 64 байт
+    """
+    parts = [prefix]
+    for value in values:
+        text = str(value)
+        if SEPARATOR in text:
+            raise ValueError(f"Callback field must not contain {SEPARATOR!r}: {text!r}")
+        parts.append(text)
+    data = SEPARATOR.join(parts)
+    if len(data.encode('utf-8')) > MAX_CALLBACK_DATA_BYTES:
+        raise ValueError(f"Callback data is longer than {MAX_CALLBACK_DATA_BYTES} bytes: {data!r}")
+    return data
+
+
+class CallbackDispatcher:
+    """
+    Таблица обработчиков callback-запросов с поиском за O(1).
+    """
+    
+    def __init__(self) -> None:
+        self._exact: Dict[str, CallbackRoute] = {}
+        self._prefixes: Dict[str, CallbackRoute] = {}
+    
+    def register(
+        self,
+        key: str,
+        *fields: type,
+        state: Optional[State] = None,
+        ack: bool = False,
+        ack_text: Optional[str] = None
+    ) -> Callable[[Handler], Handler]:
+        """
+        Декоратор регистрации обработчика.
+        
+        Обработчик вызывается как handler(callback, state, *поля).
+        
+        Args:
+            key: Точное значение callback_data (если полей нет) или префикс
+            *fields: Типы полей после префикса
+            state: Состояние FSM, в котором действует обработчик (None - в любом)
+            ack: Подтвердить callback до вызова обработчика
+            ack_text: Текст всплывающего уведомления при раннем подтверждении
+        
+        Raises:
+            ValueError: Если значение или префикс уже заняты другим обработчиком
+        """
+        def decorator(handler: Handler) -> Handler:
+            route = CallbackRoute(key, handler, fields, state.state if state else None, ack, ack_text)
+            if fields:
+                self._check_prefix_free(key, handler)
+                self._prefixes[key] = route
+            else:
+                self._check_exact_free(key, handler)
+                self._exact[key] = route
+            return handler
+        return decorator
+    
+    def _check_prefix_free(self, prefix: str, handler: Handler) -> None:
+        owner = self._prefixes.get(prefix)
+        if owner is None:
+            owner = next(
+                (route for key, route in self._exact.items() if key.partition(SEPARATOR)[0] == prefix),
+                None
+            )
+        if owner is not None:
+            raise ValueError(
+                f"Callback prefix {prefix!r} for {handler.__qualname__} "
+                f"is already claimed by {owner.handler.__qualname__}"
+            )
+    
+    def _check_exact_free(self, key: str, handler: Handler) -> None:
+        owner = self._exact.get(key) or self._prefixes.get(key.partition(SEPARATOR)[0])
+        if owner is not None:
+            raise ValueError(
+                f"Callback data {key!r} for {handler.__qualname__} "
+                f"is already claimed by {owner.handler.__qualname__}"
+            )
+    
+    @property
+    def routes(self) -> Tuple[CallbackRoute, ...]:
+        """Все зарегистрированные маршруты."""
+        return tuple(self._exact.values()) + tuple(self._prefixes.values())
+    
+    def resolve(self, data: str) -> Optional[Tuple[CallbackRoute, Tuple[Any, ...]]]:
+        """
+        Найти обработчик и разобрать поля.
+        
+        Args:
+            data: callback_data
+        
+        Returns:
+            (маршрут, поля) или None если обработчика нет или поля некорректны
+        """
+        route = self._exact.get(data)
+        if route is not None:
+            return route, ()
+        
+        prefix, _, rest = data.partition(SEPARATOR)
+        route = self._prefixes.get(prefix)
+        if route is None:
+            return None
+        
+        raw_values = rest.split(SEPARATOR, len(route.fields) - 1)
+        if len(raw_values) != len(route.fields):
+            logger.warning("Malformed callback data: %r", data)
+            return None
+        try:
+            values = tuple(field(value) for field, value in zip(route.fields, raw_values))
+        except ValueError:
+            logger.warning("Malformed callback data: %r", data)
+            return None
+        return route, values
+
+
+callbacks = CallbackDispatcher()
+
+# Callback id, уже подтверждённые заранее (ограниченный размер)
+_acknowledged: "OrderedDict[str, None]" = OrderedDict()
+
+
+def _mark_acknowledged(callback_id: str) -> None:
+    _acknowledged[callback_id] = None
+    while len(_acknowledged) > ACKNOWLEDGED_MAX_SIZE:
+        _acknowledged.popitem(last=False)
+
+
+async def answer_callback(callback: CallbackQuery, text: Optional[str] = None, show_alert: bool = False) -> None:
+    """
+    Ответить на callback с учётом раннего подтверждения.
+    
+    Telegram принимает только один ответ на callback. Если callback уже
+    подтверждён диспетчером, всплывающее уведомление пропускается,
+    а alert отправляется обычным сообщением, чтобы пользователь его увидел.
+    
+    Args:
+        callback: Callback query
+        text: Текст уведомления
+        show_alert: Показать как alert
+    """
+    if callback.id not in _acknowledged:
+        await callback.answer(text, show_alert=show_alert)
+        return
+    if show_alert and text and callback.message:
+        await callback.message.answer(text)
+
+
+class CallbackRouteFilter(BaseFilter):
+    """
+    Фильтр, находящий маршрут в таблице callbacks.
+    
+    Пропускает callback, если для его данных есть обработчик и текущее
+    состояние FSM подходит; передаёт маршрут и поля в данные обработчика.
+    """
+    
+    def __init__(self, dispatcher: CallbackDispatcher) -> None:
+        self.dispatcher = dispatcher
+    
+    async def __call__(
+        self,
+        callback: CallbackQuery,
+        raw_state: Optional[str] = None
+    ) -> Union[bool, Dict[str, Any]]:
+        if callback.data is None:
+            return False
+        resolved = self.dispatcher.resolve(callback.data)
+        if resolved is None:
+            return False
+        route, values = resolved
+        if route.state is not None and route.state != raw_state:
+            return False
+        return {'callback_route': route, 'callback_values': values}
+
+
+router = Router()
+
+
+@router.callback_query(CallbackRouteFilter(callbacks))
+async def dispatch_callback(
+    callback: CallbackQuery,
+    state: FSMContext,
+    callback_route: CallbackRoute,
+    callback_values: Tuple[Any, ...],
+    received_at: Optional[float] = None
+) -> None:
+    """
+    Вызвать обработчик найденного маршрута.
+    
+    Для маршрутов с ack=True callback подтверждается до вызова обработчика,
+    время от получения обновления до подтверждения пишется в лог.
+    
+    Args:
+        callback: Callback query
+        state: FSM контекст
+        callback_route: Маршрут из таблицы
+        callback_values: Разобранные поля callback_data
+        received_at: Время получения обновления (UpdateTimingMiddleware)
+    """
+    if callback_route.ack:
+        await callback.answer(callback_route.ack_text)
+        _mark_acknowledged(callback.id)
+        if received_at is not None:
+            latency_ms = (time.monotonic() - received_at) * 1000
+            logger.info(
+                "Callback %r acknowledged in %.1f ms", callback_route.key, latency_ms,
+                extra={'latency_ms': round(latency_ms, 1)}
+            )
+    
+    await callback_route.handler(callback, state, *callback_values)
+    
+    if received_at is not None:
+        latency_ms = (time.monotonic() - received_at) * 1000
+        logger.debug(
+            "Callback %r handled in %.1f ms", callback_route.key, latency_ms,
+            extra={'latency_ms': round(latency_ms, 1)}
+        )
@@ -10,6 +10,7 @@ Security: Never hardcode secrets, all sensitive data from .env
 """
 import os
 from pathlib import Path
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from dotenv import load_dotenv
 
 
@@ -39,6 +40,69 @@ def _get_required_env(key: str) -> str:
     return value
 
 
+def _get_int_env(key: str, default: int) -> int:
+    """
+    Get optional integer environment variable with default.
+    
+    Args:
+        key: Environment variable name
+        default: Default value if not set
+        
+    Returns:
+        Integer value
+        
+    Raises:
+        ValueError: If value is not a valid integer
+    """
+    value = os.getenv(key)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError as e:
+        raise ValueError(f"{key} must be a valid integer, got: {value}") from e
+
+
+def _get_float_env(key: str, default: float) -> float:
+    """
+    Get optional float environment variable with default.
+    
+    Args:
+        key: Environment variable name
+        default: Default value if not set
+        
+    Returns:
+        Float value
+        
+    Raises:
+        ValueError: If value is not a valid number
+    """
+    value = os.getenv(key)
+    if not value:
+        return default
+    try:
+        return float(value)
+    except ValueError as e:
+        raise ValueError(f"{key} must be a valid number, got: {value}") from e
+
+
+def _get_bool_env(key: str, default: bool) -> bool:
+    """
+    Get optional boolean environment variable (1/true/yes/on) with default.
+    
+    Args:
+        key: Environment variable name
+        default: Default value if not set
+        
+    Returns:
+        Boolean value
+    """
+    value = os.getenv(key)
+    if not value:
+        return default
+    return value.strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
 def _get_optional_env(key: str, default: str) -> str:
     """
     Get optional environment variable with default.
@@ -59,6 +123,10 @@ _load_environment()
 # Bot token (required)
 BOT_TOKEN: str = _get_required_env("BOT_TOKEN")
 
+# Bot API base URL (empty - api.telegram.org). Points the bot at a local
+# Bot API server or at the fake server from benchmarks/fake_api.py
+TELEGRAM_API_URL: str = _get_optional_env("TELEGRAM_API_URL", "").strip()
+
 # Admin chat ID (required, must be integer)
 _admin_chat_id_str = _get_required_env("ADMIN_CHAT_ID")
 try:
@@ -69,5 +137,90 @@ except ValueError as e:
 # Timezone (optional, defaults to Europe/Podgorica)
 TIMEZONE: str = _get_optional_env("TIMEZONE", "Europe/Podgorica")
 
+# Resolved once at startup (stdlib zoneinfo; tzdata package where the OS has no zone database)
+try:
+    TZINFO: ZoneInfo = ZoneInfo(TIMEZONE)
+except (ZoneInfoNotFoundError, ValueError) as e:
+    raise ValueError(f"TIMEZONE must be a valid IANA time zone name, got: {TIMEZONE}") from e
+
 # Database path (can be overridden via env)
 DB_PATH: str = _get_optional_env("DB_PATH", "leads.db")
+
+# Abandoned lead drafts: idle time before a draft is discarded (minutes)
+DRAFT_TTL_MINUTES: int = _get_int_env("DRAFT_TTL_MINUTES", 24 * 60)
+
+# How often the draft sweeper runs (seconds)
+DRAFT_SWEEP_INTERVAL: int = _get_int_env("DRAFT_SWEEP_INTERVAL", 300)
+
+# Notify user when their draft expires
+DRAFT_EXPIRY_NOTIFY: bool = _get_bool_env("DRAFT_EXPIRY_NOTIFY", True)
+
+# Update transport: "polling" (default) or "webhook"
+BOT_MODE: str = _get_optional_env("BOT_MODE", "polling").strip().lower()
+if BOT_MODE not in ("polling", "webhook"):
+    raise ValueError(f"BOT_MODE must be 'polling' or 'webhook', got: {BOT_MODE}")
+
+# Webhook mode: public HTTPS base URL registered with Telegram
+# (empty - webhook is not registered, useful for local testing)
+WEBHOOK_BASE_URL: str = _get_optional_env("WEBHOOK_BASE_URL", "").rstrip("/")
+
+# Webhook mode: path of the update endpoint
+WEBHOOK_PATH: str = _get_optional_env("WEBHOOK_PATH", "/webhook")
+
+# Webhook mode: secret checked in X-Telegram-Bot-Api-Secret-Token header
+WEBHOOK_SECRET: str = _get_optional_env("WEBHOOK_SECRET", "")
+
+# Webhook mode: address of the embedded HTTP server
+WEBHOOK_HOST: str = _get_optional_env("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT: int = _get_int_env("WEBHOOK_PORT", 8080)
+
+# Number of worker processes; >1 shards updates by user across processes
+WORKERS: int = _get_int_env("WORKERS", 1)
+if WORKERS < 1:
+    raise ValueError(f"WORKERS must be at least 1, got: {WORKERS}")
+
+# Capacity of each worker's update queue (sharded mode)
+SHARD_QUEUE_SIZE: int = _get_int_env("SHARD_QUEUE_SIZE", 1000)
+
+# Updates processed concurrently by each worker (sharded mode). While all
+# slots are busy the worker stops reading its queue, so a full queue
+# pushes back on the receiver
+SHARD_MAX_IN_FLIGHT: int = _get_int_env("SHARD_MAX_IN_FLIGHT", 100)
+if SHARD_MAX_IN_FLIGHT < 1:
+    raise ValueError(f"SHARD_MAX_IN_FLIGHT must be at least 1, got: {SHARD_MAX_IN_FLIGHT}")
+
+# FSM storage URL, e.g. redis://localhost:6379/0 (empty - in-process memory).
+# Any Redis-compatible server works; requires the optional `redis` package.
+FSM_STORAGE_URL: str = _get_optional_env("FSM_STORAGE_URL", "")
+
+# Prometheus metrics endpoint (0 - disabled). With WORKERS>1 the receiver
+# serves METRICS_PORT and worker N serves METRICS_PORT + 1 + N.
+METRICS_HOST: str = _get_optional_env("METRICS_HOST", "127.0.0.1")
+METRICS_PORT: int = _get_int_env("METRICS_PORT", 0)
+
+# Health checks (/healthz, /readyz on the metrics port): /healthz fails when
+# the event loop lags more than this (ms) or, in polling mode, when getUpdates
+# has not succeeded for this many seconds
+HEALTH_MAX_LOOP_LAG_MS: int = _get_int_env("HEALTH_MAX_LOOP_LAG_MS", 1000)
+HEALTH_MAX_POLL_AGE: int = _get_int_env("HEALTH_MAX_POLL_AGE", 90)
+
+# Tracing: updates slower than this are logged with a span breakdown (ms)
+TRACE_SLOW_MS: int = _get_int_env("TRACE_SLOW_MS", 2000)
+
+# Tracing: file to append slow traces to as JSON lines (empty - log only)
+TRACE_EXPORT_PATH: str = _get_optional_env("TRACE_EXPORT_PATH", "")
+
+# Traffic recording for benchmarks/replay.py: file to append anonymized
+# updates to (.jsonl.gz, empty - disabled) and the salt for hashed user ids
+# (empty - random per process, so ids do not link across restarts)
+UPDATE_RECORD_PATH: str = _get_optional_env("UPDATE_RECORD_PATH", "")
+UPDATE_RECORD_SALT: str = _get_optional_env("UPDATE_RECORD_SALT", "")
+
+# Logging: level, output format ("json" or "text")
+LOG_LEVEL: str = _get_optional_env("LOG_LEVEL", "INFO")
+LOG_FORMAT: str = _get_optional_env("LOG_FORMAT", "json").strip().lower()
+if LOG_FORMAT not in ("json", "text"):
+    raise ValueError(f"LOG_FORMAT must be 'json' or 'text', got: {LOG_FORMAT}")
+
+# Logging: share of DEBUG records kept (0..1), for high-volume debug events
+LOG_DEBUG_SAMPLE_RATE: float = _get_float_env("LOG_DEBUG_SAMPLE_RATE", 1.0)
@@ -8,12 +8,15 @@ This module handles:
 
 Design: All functions are pure and side effects are explicit.
 Testing: Connection can be injected for testing purposes.
+Metrics: Query functions report their timings via app.metrics.db_timed.
 """
 import sqlite3
 from datetime import datetime
 from typing import Optional, Dict, Any
 from pathlib import Path
 
+from app.metrics import db_timed
+
 
 def get_connection(db_path: str) -> sqlite3.Connection:
     """
@@ -64,15 +67,45 @@ def init_db(db_path: str) -> None:
             email TEXT,
             description TEXT NOT NULL,
             files TEXT,
-            created_at TEXT NOT NULL
+            created_at TEXT NOT NULL,
+            idempotency_key TEXT
         )
     """)
     
+    # Migration: add idempotency_key to databases created before the column existed
+    columns = {row['name'] for row in cursor.execute("PRAGMA table_info(leads)")}
+    if 'idempotency_key' not in columns:
+        cursor.execute("ALTER TABLE leads ADD COLUMN idempotency_key TEXT")
+    
+    # Idempotency keys are unique (multiple NULLs are allowed)
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_leads_idempotency_key
+        ON leads (idempotency_key)
+    """)
+    
     conn.commit()
     conn.close()
     print("Database initialized successfully")
 
 
+def ping_db(db_path: str) -> None:
+    """
+    Check that the database is reachable and initialized (health checks).
+    
+    Args:
+        db_path: Path to database file
+        
+    Raises:
+        sqlite3.Error: If the database cannot be queried
+    """
+    conn = get_connection(db_path)
+    try:
+        conn.execute("SELECT 1 FROM leads LIMIT 1").fetchall()
+    finally:
+        conn.close()
+
+
+@db_timed
 def get_user_language(tg_user_id: int, db_path: str) -> Optional[str]:
     """
     Get user's selected language.
@@ -97,6 +130,7 @@ def get_user_language(tg_user_id: int, db_path: str) -> Optional[str]:
     return result['language'] if result else None
 
 
+@db_timed
 def save_user_language(tg_user_id: int, language: str, db_path: str) -> None:
     """
     Save user's selected language.
@@ -129,6 +163,7 @@ def save_user_language(tg_user_id: int, language: str, db_path: str) -> None:
     conn.close()
 
 
+@db_timed
 def save_lead(
     tg_user_id: int,
     full_name: str,
@@ -136,11 +171,15 @@ def save_lead(
     description: str,
     db_path: str,
     email: Optional[str] = None,
-    files: Optional[str] = None
+    files: Optional[str] = None,
+    idempotency_key: Optional[str] = None
 ) -> int:
     """
     Save lead (application) to database.
     
+    If idempotency_key is given and a lead with this key already exists,
+    nothing is inserted and the existing lead ID is returned.
+    
     Args:
         tg_user_id: Telegram user ID
         full_name: User's full name
@@ -149,9 +188,10 @@ def save_lead(
         db_path: Path to database file
         email: Email address (optional)
         files: JSON string with file IDs (optional)
+        idempotency_key: Unique key of the draft (optional)
         
     Returns:
-        ID of created lead
+        ID of created (or previously saved) lead
         
     Raises:
         ValueError: If required fields are empty or invalid
@@ -170,8 +210,9 @@ def save_lead(
     cursor = conn.cursor()
     
     cursor.execute("""
-        INSERT INTO leads (tg_user_id, full_name, phone, email, description, files, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO leads (tg_user_id, full_name, phone, email, description, files, created_at, idempotency_key)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (idempotency_key) DO NOTHING
     """, (
         tg_user_id,
         full_name.strip(),
@@ -179,16 +220,26 @@ def save_lead(
         email.strip() if email else None,
         description.strip(),
         files,
-        datetime.now().isoformat()
+        datetime.now().isoformat(),
+        idempotency_key
     ))
     
-    lead_id = cursor.lastrowid
+    if cursor.rowcount:
+        lead_id = cursor.lastrowid
+    else:
+        # Repeated submission - return the lead saved the first time
+        cursor.execute(
+            "SELECT id FROM leads WHERE idempotency_key = ?",
+            (idempotency_key,)
+        )
+        lead_id = cursor.fetchone()['id']
     conn.commit()
     conn.close()
     
     return lead_id
 
 
+@db_timed
 def get_last_lead_by_user(tg_user_id: int, db_path: str) -> Optional[Dict[str, Any]]:
     """
     Get last lead submitted by user (for pre-filling repeat applications).
@@ -213,6 +264,7 @@ def get_last_lead_by_user(tg_user_id: int, db_path: str) -> Optional[Dict[str, A
     return dict(result) if result else None
 
 
+@db_timed
 def get_lead_by_id(lead_id: int, db_path: str) -> Optional[Dict[str, Any]]:
     """
     Get lead by ID.
@@ -234,6 +286,29 @@ def get_lead_by_id(lead_id: int, db_path: str) -> Optional[Dict[str, Any]]:
     return dict(result) if result else None
 
 
+@db_timed
+def get_lead_by_idempotency_key(idempotency_key: str, db_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Get lead by draft idempotency key.
+    
+    Args:
+        idempotency_key: Unique key of the draft
+        db_path: Path to database file
+        
+    Returns:
+        Dictionary with lead data or None if not found
+    """
+    conn = get_connection(db_path)
+    cursor = conn.cursor()
+    
+    cursor.execute("SELECT * FROM leads WHERE idempotency_key = ?", (idempotency_key,))
+    result = cursor.fetchone()
+    conn.close()
+    
+    return dict(result) if result else None
+
+
+@db_timed
 def get_all_leads(db_path: str) -> list[Dict[str, Any]]:
     """
     Get all leads ordered by creation date (newest first).
@@ -254,6 +329,7 @@ def get_all_leads(db_path: str) -> list[Dict[str, Any]]:
     return [dict(row) for row in results]
 
 
+@db_timed
 def get_user_leads(tg_user_id: int, db_path: str) -> list[Dict[str, Any]]:
     """
     Get all leads for specific user.
@@ -278,6 +354,7 @@ def get_user_leads(tg_user_id: int, db_path: str) -> list[Dict[str, Any]]:
     return [dict(row) for row in results]
 
 
+@db_timed
 def delete_lead(lead_id: int, tg_user_id: int, db_path: str) -> bool:
     """
     Delete lead from database.
@@ -0,0 +1,192 @@
+"""
+Draft lifecycle - удаление брошенных черновиков заявок.
+
+Этот модуль реализует:
+- DraftActivityMiddleware - отметка последней активности пользователя
+- DraftSweeper - фоновая задача, удаляющая черновики, к которым
+  не обращались дольше TTL, и публикующая метрики черновиков
+
+С MemoryStorage каждый пользователь, начавший /new и ушедший, оставляет
+данные формы (включая список файлов) в памяти навсегда. Sweeper очищает
+такие черновики и удаляет пустые записи хранилища.
+"""
+import json
+import time
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.fsm.storage.base import BaseStorage, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.types import TelegramObject
+
+from app import metrics
+from app.locales import get_text
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(data: Dict[str, Any]) -> int:
+    """
+    Примерный размер данных черновика в байтах (по JSON-представлению).
+    
+    Args:
+        data: Данные FSM
+    
+    Returns:
+        Размер в байтах
+    """
+    return len(json.dumps(data, ensure_ascii=False, default=str).encode('utf-8'))
+
+
+class DraftSweeper:
+    """
+    Отслеживает активность черновиков и удаляет просроченные.
+    
+    Attributes:
+        live_drafts: Количество черновиков (пользователей в состоянии формы)
+                     на момент последнего прохода
+        draft_bytes: Примерный объём данных этих черновиков, байт
+        states: Количество черновиков по состояниям FSM
+        expired_total: Сколько черновиков удалено с момента запуска
+    """
+    
+    def __init__(
+        self,
+        storage: BaseStorage,
+        ttl_seconds: float,
+        interval_seconds: float,
+        notify: bool = True
+    ) -> None:
+        self.storage = storage
+        self.ttl_seconds = ttl_seconds
+        self.interval_seconds = interval_seconds
+        self.notify = notify
+        self.live_drafts = 0
+        self.draft_bytes = 0
+        self.states: Dict[str, int] = {}
+        self.expired_total = 0
+        self._last_seen: Dict[StorageKey, float] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def touch(self, key: StorageKey) -> None:
+        """Отметить активность по ключу хранилища."""
+        self._last_seen[key] = time.monotonic()
+    
+    def stats(self) -> Dict[str, int]:
+        """Метрики черновиков."""
+        return {
+            'live_drafts': self.live_drafts,
+            'draft_bytes': self.draft_bytes,
+            'tracked_keys': len(self._last_seen),
+            'expired_total': self.expired_total,
+        }
+    
+    async def sweep(self, bot: Optional[Bot] = None) -> int:
+        """
+        Один проход: удалить просроченные черновики и обновить метрики.
+        
+        Args:
+            bot: Бот для уведомления пользователей (None - без уведомлений)
+        
+        Returns:
+            Количество удалённых черновиков
+        """
+        now = time.monotonic()
+        expired = 0
+        live = 0
+        size = 0
+        states: Dict[str, int] = {}
+        
+        for key, last_seen in list(self._last_seen.items()):
+            state = await self.storage.get_state(key)
+            idle = now - last_seen
+            
+            if idle < self.ttl_seconds:
+                if state is not None:
+                    live += 1
+                    size += estimate_size(await self.storage.get_data(key))
+                    states[state] = states.get(state, 0) + 1
+                continue
+            
+            if state is not None:
+                data = await self.storage.get_data(key)
+                await self.storage.set_state(key, None)
+                await self.storage.set_data(key, {})
+                expired += 1
+                logger.info("Draft of user %s expired after %.0f min idle (state: %s)", key.user_id, idle / 60, state)
+                if bot is not None and self.notify:
+                    await self._notify(bot, key, data.get('language', 'en'))
+            
+            # Запись больше не нужна ни трекеру, ни MemoryStorage
+            del self._last_seen[key]
+            if isinstance(self.storage, MemoryStorage):
+                self.storage.storage.pop(key, None)
+        
+        self.live_drafts = live
+        self.draft_bytes = size
+        self.states = states
+        self.expired_total += expired
+        metrics.FSM_USERS.replace({(name,): count for name, count in states.items()})
+        metrics.DRAFT_BYTES.set(size)
+        metrics.DRAFTS_EXPIRED.inc(amount=expired)
+        logger.debug("Draft sweep: %s live drafts, ~%s bytes, %s expired", live, size, expired)
+        return expired
+    
+    async def _notify(self, bot: Bot, key: StorageKey, lang: str) -> None:
+        try:
+            await bot.send_message(chat_id=key.chat_id, text=get_text('draft_expired', lang))
+        except Exception as e:
+            logger.warning("Failed to notify user %s about expired draft: %s", key.user_id, e)
+    
+    async def _run(self, bot: Bot) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.sweep(bot)
+            except Exception as e:
+                logger.error("Draft sweep failed: %s", e, exc_info=True)
+    
+    def start(self, bot: Bot) -> None:
+        """Запустить фоновую задачу очистки."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(bot))
+    
+    async def stop(self) -> None:
+        """Остановить фоновую задачу очистки."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class DraftActivityMiddleware(BaseMiddleware):
+    """
+    Отмечает в DraftSweeper активность пользователя при каждом обновлении.
+    
+    Регистрируется как outer middleware на dp.update (после встроенного
+    FSM middleware aiogram, которое создаёт FSMContext).
+    """
+    
+    def __init__(self, sweeper: DraftSweeper) -> None:
+        self.sweeper = sweeper
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        state = data.get('state')
+        if state is not None:
+            self.sweeper.touch(state.key)
+        try:
+            return await handler(event, data)
+        finally:
+            # Отсчёт TTL - от окончания обработки
+            if state is not None:
+                self.sweeper.touch(state.key)
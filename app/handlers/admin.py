@@ -0,0 +1,108 @@
+"""
+Admin handlers - служебные команды в чате администратора.
+
+Этот модуль реализует:
+- /profile [секунды] - CPU-профиль работающего бота (cProfile)
+- /memprofile [секунды] - прирост памяти по местам выделения (tracemalloc)
+
+Команды принимаются только из ADMIN_CHAT_ID. Профилирование идёт
+в фоне, результат приходит в чат администратора документом.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Set
+
+from aiogram import Bot, F, Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, Message
+
+from app.config import ADMIN_CHAT_ID
+from app.profiling import (
+    PROFILE_DEFAULT_SECONDS,
+    ProfilerBusyError,
+    clamp_seconds,
+    profile_cpu,
+    profile_memory
+)
+
+router = Router()
+router.message.filter(F.chat.id == ADMIN_CHAT_ID)
+logger = logging.getLogger(__name__)
+
+# Фоновые задачи профилирования (ссылки, чтобы задачи не собрал GC)
+_tasks: Set[asyncio.Task] = set()
+
+
+def _parse_seconds(command: CommandObject) -> Optional[int]:
+    if not command.args:
+        return PROFILE_DEFAULT_SECONDS
+    try:
+        return clamp_seconds(int(command.args.strip()))
+    except ValueError:
+        return None
+
+
+async def _run_and_send(
+    bot: Bot,
+    kind: str,
+    seconds: int,
+    profile: Callable[[int], Awaitable[str]]
+) -> None:
+    try:
+        report = await profile(seconds)
+    except ProfilerBusyError:
+        await bot.send_message(ADMIN_CHAT_ID, "⏳ Профилирование уже выполняется, дождитесь результата.")
+        return
+    except Exception as e:
+        logger.error("Profiling (%s) failed: %s", kind, e, exc_info=True)
+        return
+    
+    filename = f"{kind}-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+    try:
+        await bot.send_document(
+            ADMIN_CHAT_ID,
+            BufferedInputFile(report.encode('utf-8'), filename=filename),
+            caption=f"📊 {kind}, {seconds} с"
+        )
+    except Exception as e:
+        logger.error("Failed to send profiling report to admin chat: %s", e)
+        return
+    logger.info("Profiling (%s, %ss) report sent to admin chat", kind, seconds)
+
+
+async def _start(message: Message, command: CommandObject, kind: str, profile: Callable[[int], Awaitable[str]]) -> None:
+    seconds = _parse_seconds(command)
+    if seconds is None:
+        await message.answer(f"Использование: /{command.command} [секунды]")
+        return
+    
+    task = asyncio.create_task(_run_and_send(message.bot, kind, seconds, profile))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    await message.answer(f"🔬 Профилирование ({kind}) на {seconds} с запущено, отчёт придёт документом.")
+    logger.info("Admin %s started profiling (%s, %ss)", message.from_user.id, kind, seconds)
+
+
+@router.message(Command("profile"))
+async def cmd_profile(message: Message, command: CommandObject) -> None:
+    """
+    Обработчик /profile [секунды] - CPU-профиль event loop.
+    
+    Args:
+        message: Сообщение с командой
+        command: Разобранная команда (аргумент - длительность)
+    """
+    await _start(message, command, 'cpu', profile_cpu)
+
+
+@router.message(Command("memprofile"))
+async def cmd_memprofile(message: Message, command: CommandObject) -> None:
+    """
+    Обработчик /memprofile [секунды] - разница снимков tracemalloc.
+    
+    Args:
+        message: Сообщение с командой
+        command: Разобранная команда (аргумент - длительность)
+    """
+    await _start(message, command, 'memory', profile_memory)
@@ -8,8 +8,9 @@ Common handlers - общие команды бота (/help, /cancel, /language)
 """
 import logging
 import asyncio
+from typing import Optional
 
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery, ReplyKeyboardRemove
 from aiogram.fsm.context import FSMContext
@@ -22,6 +23,7 @@ from app.keyboards import (
     get_main_menu_keyboard,
     get_language_change_confirmation_keyboard
 )
+from app.callbacks import callbacks, answer_callback
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -44,7 +46,7 @@ async def cmd_help(message: Message) -> None:
     help_text = get_text('help_text', user_lang)
     await message.answer(help_text)
     
-    logger.info(f"User {user_id} requested help (lang: {user_lang})")
+    logger.info("User %s requested help (lang: %s)", user_id, user_lang)
 
 
 @router.message(Command("cancel"))
@@ -69,14 +71,14 @@ async def cmd_cancel(message: Message, state: FSMContext) -> None:
         # Пользователь не в процессе заполнения формы
         # Можно либо ничего не делать, либо показать справку
         await message.answer(get_text('menu', user_lang))
-        logger.debug(f"User {user_id} used /cancel but no active form")
+        logger.debug("User %s used /cancel but no active form", user_id)
         return
     
     # Очищаем состояние
     await state.clear()
     
     await message.answer(get_text('cancelled', user_lang))
-    logger.info(f"User {user_id} cancelled form (was in state: {current_state})")
+    logger.info("User %s cancelled form (was in state: %s)", user_id, current_state)
 
 
 @router.message(Command("language"))
@@ -103,34 +105,31 @@ async def cmd_language(message: Message, state: FSMContext) -> None:
             get_text('language_change_warning', user_lang),
             reply_markup=get_language_change_confirmation_keyboard(user_lang)
         )
-        logger.info(f"User {user_id} requested language change during form fill (state: {current_state})")
+        logger.info("User %s requested language change during form fill (state: %s)", user_id, current_state)
     else:
         # Нет активной формы - показываем выбор языка
         await message.answer(
             get_text('change_language', user_lang),
             reply_markup=get_language_keyboard(callback_prefix="change_lang")
         )
-        logger.info(f"User {user_id} requested language change")
+        logger.info("User %s requested language change", user_id)
 
 
-@router.message(F.text.in_([
-    get_text('btn_change_language', 'ru'),
-    get_text('btn_change_language', 'me'),
-    get_text('btn_change_language', 'en')
-]))
-async def btn_language(message: Message, state: FSMContext) -> None:
+async def btn_language(message: Message, state: FSMContext, user_lang: Optional[str] = None) -> None:
     """
     Обработчик кнопки "Сменить язык" из главного меню.
     
+    Вызывается из app.handlers.menu.
     Если пользователь в процессе заполнения формы, показывает предупреждение.
     Иначе показывает клавиатуру выбора языка.
     
     Args:
         message: Сообщение с текстом кнопки
         state: FSM контекст для проверки состояния
+        user_lang: Язык кнопки меню (если нет - берётся из БД)
     """
     user_id = message.from_user.id
-    user_lang = get_user_language(user_id, DB_PATH) or 'en'
+    user_lang = user_lang or get_user_language(user_id, DB_PATH) or 'en'
     
     # Проверяем, есть ли активное состояние (пользователь заполняет форму)
     current_state = await state.get_state()
@@ -141,18 +140,18 @@ async def btn_language(message: Message, state: FSMContext) -> None:
             get_text('language_change_warning', user_lang),
             reply_markup=get_language_change_confirmation_keyboard(user_lang)
         )
-        logger.info(f"User {user_id} pressed language change button during form fill (state: {current_state})")
+        logger.info("User %s pressed language change button during form fill (state: %s)", user_id, current_state)
     else:
         # Нет активной формы - показываем выбор языка
         await message.answer(
             get_text('change_language', user_lang),
             reply_markup=get_language_keyboard(callback_prefix="change_lang")
         )
-        logger.info(f"User {user_id} pressed language change button")
+        logger.info("User %s pressed language change button", user_id)
 
 
-@router.callback_query(F.data.startswith("confirm_lang_change:"))
-async def confirm_language_change_during_form(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.register("confirm_lang_change", str)
+async def confirm_language_change_during_form(callback: CallbackQuery, state: FSMContext, action: str) -> None:
     """
     Обработчик подтверждения/отмены смены языка во время заполнения формы.
     
@@ -161,9 +160,9 @@ async def confirm_language_change_during_form(callback: CallbackQuery, state: FS
     Args:
         callback: Callback query от кнопки подтверждения
         state: FSM контекст
+        action: yes или no
     """
     try:
-        action = callback.data.split(":")[1]
         user_id = callback.from_user.id
         user_lang = get_user_language(user_id, DB_PATH) or 'en'
         
@@ -183,7 +182,7 @@ async def confirm_language_change_during_form(callback: CallbackQuery, state: FS
                 reply_markup=get_language_keyboard(callback_prefix="change_lang")
             )
             
-            logger.info(f"User {user_id} confirmed language change, form data cleared")
+            logger.info("User %s confirmed language change, form data cleared", user_id)
         else:
             # Пользователь отменил смену языка - продолжаем заполнение
             await callback.answer(
@@ -197,15 +196,15 @@ async def confirm_language_change_during_form(callback: CallbackQuery, state: FS
             except:
                 pass
             
-            logger.info(f"User {user_id} cancelled language change, continuing form")
+            logger.info("User %s cancelled language change, continuing form", user_id)
             
     except Exception as e:
-        logger.error(f"Error processing language change confirmation: {e}", exc_info=True)
+        logger.error("Error processing language change confirmation: %s", e, exc_info=True)
         await callback.answer("An error occurred", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("change_lang:"))
-async def process_language_change(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.register("change_lang", str, ack=True)
+async def process_language_change(callback: CallbackQuery, state: FSMContext, lang_code: str) -> None:
     """
     Обработчик смены языка через callback.
     
@@ -217,14 +216,13 @@ async def process_language_change(callback: CallbackQuery, state: FSMContext) ->
     Args:
         callback: Callback query от кнопки выбора языка
         state: FSM контекст (очищается)
+        lang_code: Выбранный код языка
     """
     try:
-        lang_code = callback.data.split(":")[1]
-        
         # Валидация кода языка
         if lang_code not in SUPPORTED_LANGUAGES:
-            await callback.answer("Invalid language selection", show_alert=True)
-            logger.warning(f"Invalid language code attempted: {lang_code}")
+            await answer_callback(callback, "Invalid language selection", show_alert=True)
+            logger.warning("Invalid language code attempted: %s", lang_code)
             return
         
         user_id = callback.from_user.id
@@ -240,7 +238,7 @@ async def process_language_change(callback: CallbackQuery, state: FSMContext) ->
         except:
             pass  # Игнорируем ошибку если не удалось удалить
         
-        await callback.answer(get_text('language_changed', lang_code))
+        await answer_callback(callback, get_text('language_changed', lang_code))
         
         # Отправляем сообщение с удалением старой клавиатуры
         await callback.message.answer(
@@ -259,8 +257,8 @@ async def process_language_change(callback: CallbackQuery, state: FSMContext) ->
             reply_markup=get_main_menu_keyboard(lang_code)
         )
         
-        logger.info(f"User {user_id} changed language from {old_lang} to {lang_code}")
+        logger.info("User %s changed language from %s to %s", user_id, old_lang, lang_code)
         
     except Exception as e:
-        logger.error(f"Error processing language change: {e}", exc_info=True)
-        await callback.answer("An error occurred", show_alert=True)
+        logger.error("Error processing language change: %s", e, exc_info=True)
+        await answer_callback(callback, "An error occurred", show_alert=True)
@@ -10,6 +10,7 @@ Lead collection flow - FSM для пошагового сбора заявок.
 - Сохранение в БД и уведомление админу
 """
 import re
+import uuid
 import logging
 from datetime import datetime
 from typing import Optional
@@ -18,10 +19,9 @@ from aiogram import Router, F
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
-import pytz
 
-from app.config import DB_PATH, ADMIN_CHAT_ID, TIMEZONE
-from app.db import get_user_language, save_lead, get_last_lead_by_user
+from app.config import DB_PATH, ADMIN_CHAT_ID, TZINFO
+from app.db import get_user_language, save_lead, get_last_lead_by_user, get_lead_by_idempotency_key
 from app.locales import get_text, format_text
 from app.keyboards import (
     get_confirmation_keyboard,
@@ -33,7 +33,8 @@ from app.keyboards import (
     remove_keyboard
 )
 from app.states import LeadForm
-from app.ai_enhancer import enhance_lead_description
+from app.callbacks import callbacks
+from app.tracing import span
 import json
 
 router = Router()
@@ -136,20 +137,22 @@ async def send_admin_notification(
     """
     try:
         # Получаем текущее время с учетом timezone
-        tz = pytz.timezone(TIMEZONE)
-        timestamp = datetime.now(tz).strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = datetime.now(TZINFO).strftime('%Y-%m-%d %H:%M:%S')
         
         email_display = email if email else get_text('email_not_provided', 'en')
         
         # 🤖 УЛУЧШАЕМ ОПИСАНИЕ С ПОМОЩЬЮ AI ENHANCER
-        enhanced_description = enhance_lead_description(
-            description=description,
-            full_name=full_name,
-            phone=phone,
-            email=email,
-            lang=lang,
-            use_ai=False  # Пока без OpenAI, только структурирование
-        )
+        # (импорт здесь: модуль и словарь загружаются при первой заявке, а не при старте)
+        from app.ai_enhancer import enhance_lead_description
+        with span('enhancer'):
+            enhanced_description = enhance_lead_description(
+                description=description,
+                full_name=full_name,
+                phone=phone,
+                email=email,
+                lang=lang,
+                use_ai=False  # Пока без OpenAI, только структурирование
+            )
         
         notification_text = (
             f"🧱 <b>{get_text('admin_notification', lang)}</b>\n\n"
@@ -195,18 +198,18 @@ async def send_admin_notification(
                             caption=f"📎 Файл к заявке #{lead_id}"
                         )
                 except Exception as file_error:
-                    logger.error(f"Failed to send file to admin: {file_error}")
+                    logger.error("Failed to send file to admin: %s", file_error)
         
-        logger.info(f"✅ Admin notification sent for lead #{lead_id}, user TG ID: {tg_user_id}, files: {len(files) if files else 0}")
+        logger.info("✅ Admin notification sent for lead #%s, user TG ID: %s, files: %s", lead_id, tg_user_id, len(files) if files else 0, extra={'lead_id': lead_id})
         
     except Exception as e:
-        logger.error(f"❌ FAILED to send admin notification to chat {ADMIN_CHAT_ID}: {e}", exc_info=True)
-        logger.error(f"❌ Check that ADMIN_CHAT_ID={ADMIN_CHAT_ID} is correct and bot is not blocked")
+        logger.error("❌ FAILED to send admin notification to chat %s: %s", ADMIN_CHAT_ID, e, exc_info=True)
+        logger.error("❌ Check that ADMIN_CHAT_ID=%s is correct and bot is not blocked", ADMIN_CHAT_ID)
         # Не пробрасываем ошибку - заявка уже сохранена в БД
 
 
 @router.message(Command("new"))
-async def cmd_new_lead(message: Message, state: FSMContext) -> None:
+async def cmd_new_lead(message: Message, state: FSMContext, user_lang: Optional[str] = None) -> None:
     """
     Обработчик команды /new - начало создания новой заявки.
     
@@ -216,9 +219,10 @@ async def cmd_new_lead(message: Message, state: FSMContext) -> None:
     Args:
         message: Сообщение с командой /new
         state: FSM контекст для управления состоянием
+        user_lang: Язык кнопки меню (если нет - берётся из БД)
     """
     user_id = message.from_user.id
-    user_lang = get_user_language(user_id, DB_PATH) or 'en'
+    user_lang = user_lang or get_user_language(user_id, DB_PATH) or 'en'
     
     # Очищаем предыдущее состояние если оно было
     await state.clear()
@@ -250,28 +254,28 @@ async def cmd_new_lead(message: Message, state: FSMContext) -> None:
             confirm_text,
             reply_markup=get_confirm_data_keyboard(user_lang)
         )
-        logger.info(f"User {user_id} has previous leads, asking to confirm data")
+        logger.info("User %s has previous leads, asking to confirm data", user_id)
     else:
         # Первая заявка пользователя - начинаем с имени
         await state.set_state(LeadForm.waiting_for_name)
         await state.update_data(language=user_lang)
         
         await message.answer(get_text('start_new_lead', user_lang))
-        logger.info(f"User {user_id} started first lead form")
+        logger.info("User %s started first lead form", user_id)
 
 
-@router.callback_query(F.data.startswith("confirm_data:"))
-async def process_data_confirmation(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.register("confirm_data", str)
+async def process_data_confirmation(callback: CallbackQuery, state: FSMContext, action: str) -> None:
     """
     Обработка подтверждения использования старых данных.
     
     Args:
         callback: Callback от кнопки подтверждения
         state: FSM контекст
+        action: use или change
     """
     data = await state.get_data()
     lang = data.get('language', 'en')
-    action = callback.data.split(":")[1]  # use или change
     
     if action == "use":
         # Использовать старые данные - берем из state
@@ -284,13 +288,13 @@ async def process_data_confirmation(callback: CallbackQuery, state: FSMContext)
         # Переходим сразу к описанию проекта
         await state.set_state(LeadForm.waiting_for_description)
         await callback.message.edit_text(get_text('ask_description', lang))
-        logger.info(f"User {callback.from_user.id} reusing old data")
+        logger.info("User %s reusing old data", callback.from_user.id)
         
     else:  # change
         # Пользователь хочет изменить данные - начинаем заново
         await state.set_state(LeadForm.waiting_for_name)
         await callback.message.edit_text(get_text('start_new_lead', lang))
-        logger.info(f"User {callback.from_user.id} changing data")
+        logger.info("User %s changing data", callback.from_user.id)
     
     await callback.answer()
 
@@ -319,7 +323,7 @@ async def process_name(message: Message, state: FSMContext) -> None:
     await state.set_state(LeadForm.waiting_for_phone)
     
     await message.answer(get_text('ask_phone', lang))
-    logger.debug(f"User {message.from_user.id} provided name: {full_name}")
+    logger.debug("User %s provided name: %s", message.from_user.id, full_name)
 
 
 @router.message(LeadForm.waiting_for_phone)
@@ -349,10 +353,10 @@ async def process_phone(message: Message, state: FSMContext) -> None:
         get_text('ask_email', lang),
         reply_markup=get_skip_keyboard(lang)
     )
-    logger.debug(f"User {message.from_user.id} provided phone: {phone}")
+    logger.debug("User %s provided phone: %s", message.from_user.id, phone)
 
 
-@router.callback_query(F.data == "skip:email")
+@callbacks.register("skip:email")
 async def skip_email(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка пропуска email (кнопка "Пропустить").
@@ -370,7 +374,7 @@ async def skip_email(callback: CallbackQuery, state: FSMContext) -> None:
     
     await callback.message.edit_text(get_text('ask_description', lang))
     await callback.answer()
-    logger.debug(f"User {callback.from_user.id} skipped email")
+    logger.debug("User %s skipped email", callback.from_user.id)
 
 
 @router.message(LeadForm.waiting_for_email)
@@ -400,7 +404,7 @@ async def process_email(message: Message, state: FSMContext) -> None:
     await state.set_state(LeadForm.waiting_for_description)
     
     await message.answer(get_text('ask_description', lang))
-    logger.debug(f"User {message.from_user.id} provided email: {email}")
+    logger.debug("User %s provided email: %s", message.from_user.id, email)
 
 
 @router.message(LeadForm.waiting_for_description)
@@ -430,11 +434,11 @@ async def process_description(message: Message, state: FSMContext) -> None:
         get_text('ask_files', lang),
         reply_markup=get_files_keyboard(lang)
     )
-    logger.debug(f"User {message.from_user.id} provided description, asking for files")
+    logger.debug("User %s provided description, asking for files", message.from_user.id)
 
 
-@router.callback_query(F.data == "files:skip", LeadForm.waiting_for_files)
-@router.callback_query(F.data == "files:done", LeadForm.waiting_for_files)
+@callbacks.register("files:skip", state=LeadForm.waiting_for_files)
+@callbacks.register("files:done", state=LeadForm.waiting_for_files)
 async def process_files_skip_or_done(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка пропуска файлов или завершения загрузки.
@@ -446,8 +450,11 @@ async def process_files_skip_or_done(callback: CallbackQuery, state: FSMContext)
     data = await state.get_data()
     lang = data.get('language', 'en')
     
-    # Переходим к preview
+    # Переходим к preview; ключ идемпотентности черновика создаётся
+    # один раз и защищает от повторного сохранения при повторной отправке
     await state.set_state(LeadForm.preview)
+    if not data.get('idempotency_key'):
+        await state.update_data(idempotency_key=uuid.uuid4().hex)
     
     files = data.get('files', [])
     files_info = f"\n📎 Файлов прикреплено: {len(files)}" if files else ""
@@ -466,7 +473,7 @@ async def process_files_skip_or_done(callback: CallbackQuery, state: FSMContext)
         reply_markup=get_confirmation_keyboard(lang)
     )
     await callback.answer()
-    logger.debug(f"User {callback.from_user.id} finished with files, showing preview")
+    logger.debug("User %s finished with files, showing preview", callback.from_user.id)
 
 
 @router.message(LeadForm.waiting_for_files, F.photo | F.document | F.video)
@@ -507,15 +514,17 @@ async def process_file_upload(message: Message, state: FSMContext) -> None:
         get_text('file_received', lang),
         reply_markup=get_files_keyboard(lang)
     )
-    logger.debug(f"User {message.from_user.id} uploaded {file_type}, total files: {len(files)}")
+    logger.debug("User %s uploaded %s, total files: %s", message.from_user.id, file_type, len(files))
 
 
-@router.callback_query(F.data == "confirm:send", LeadForm.preview)
+@callbacks.register("confirm:send", state=LeadForm.preview, ack=True)
 async def confirm_send_lead(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка подтверждения отправки заявки.
     
     Сохраняет заявку в БД и отправляет уведомление админу.
+    Повторная отправка того же черновика (тот же ключ идемпотентности)
+    не создаёт новую заявку и не дублирует уведомление админу.
     
     Args:
         callback: Callback от кнопки "Отправить"
@@ -524,36 +533,44 @@ async def confirm_send_lead(callback: CallbackQuery, state: FSMContext) -> None:
     data = await state.get_data()
     lang = data.get('language', 'en')
     user_id = callback.from_user.id
+    idempotency_key = data.get('idempotency_key')
     
     try:
         files = data.get('files', [])
         files_json = json.dumps(files) if files else None
         
-        # Сохраняем заявку в БД
-        lead_id = save_lead(
-            tg_user_id=user_id,
-            full_name=data['full_name'],
-            phone=data['phone'],
-            description=data['description'],
-            db_path=DB_PATH,
-            email=data.get('email'),
-            files=files_json
-        )
-        
-        logger.info(f"Lead #{lead_id} saved for user {user_id}, files: {len(files)}")
+        existing = get_lead_by_idempotency_key(idempotency_key, DB_PATH) if idempotency_key else None
         
-        # Отправляем уведомление админу
-        await send_admin_notification(
-            bot=callback.bot,
-            lead_id=lead_id,
-            tg_user_id=user_id,
-            full_name=data['full_name'],
-            phone=data['phone'],
-            email=data.get('email'),
-            description=data['description'],
-            lang=lang,
-            files=files
-        )
+        if existing:
+            lead_id = existing['id']
+            logger.info("Lead #%s already saved for user %s, skipping duplicate submission", lead_id, user_id, extra={'lead_id': lead_id})
+        else:
+            # Сохраняем заявку в БД
+            lead_id = save_lead(
+                tg_user_id=user_id,
+                full_name=data['full_name'],
+                phone=data['phone'],
+                description=data['description'],
+                db_path=DB_PATH,
+                email=data.get('email'),
+                files=files_json,
+                idempotency_key=idempotency_key
+            )
+            
+            logger.info("Lead #%s saved for user %s, files: %s", lead_id, user_id, len(files), extra={'lead_id': lead_id})
+            
+            # Отправляем уведомление админу
+            await send_admin_notification(
+                bot=callback.bot,
+                lead_id=lead_id,
+                tg_user_id=user_id,
+                full_name=data['full_name'],
+                phone=data['phone'],
+                email=data.get('email'),
+                description=data['description'],
+                lang=lang,
+                files=files
+            )
         
         # Очищаем состояние
         await state.clear()
@@ -568,18 +585,15 @@ async def confirm_send_lead(callback: CallbackQuery, state: FSMContext) -> None:
             reply_markup=get_main_menu_keyboard(lang)
         )
         
-        await callback.answer()
-        
-        logger.info(f"Lead #{lead_id} completed successfully")
+        logger.info("Lead #%s completed successfully", lead_id, extra={'lead_id': lead_id})
         
     except Exception as e:
-        logger.error(f"Error saving lead: {e}", exc_info=True)
+        logger.error("Error saving lead: %s", e, exc_info=True)
         await callback.message.edit_text(get_text('error_occurred', lang))
-        await callback.answer()
         await state.clear()
 
 
-@router.callback_query(F.data == "confirm:cancel", LeadForm.preview)
+@callbacks.register("confirm:cancel", state=LeadForm.preview)
 async def confirm_cancel_lead(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка отмены заявки из preview.
@@ -596,10 +610,10 @@ async def confirm_cancel_lead(callback: CallbackQuery, state: FSMContext) -> Non
     
     await callback.message.edit_text(get_text('cancelled', lang))
     await callback.answer()
-    logger.info(f"User {callback.from_user.id} cancelled lead from preview")
+    logger.info("User %s cancelled lead from preview", callback.from_user.id)
 
 
-@router.callback_query(F.data == "files:cancel", LeadForm.waiting_for_files)
+@callbacks.register("files:cancel", state=LeadForm.waiting_for_files)
 async def cancel_from_files(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка отмены заявки при загрузке файлов.
@@ -616,10 +630,10 @@ async def cancel_from_files(callback: CallbackQuery, state: FSMContext) -> None:
     
     await callback.message.edit_text(get_text('cancelled', lang))
     await callback.answer()
-    logger.info(f"User {callback.from_user.id} cancelled lead from files upload")
+    logger.info("User %s cancelled lead from files upload", callback.from_user.id)
 
 
-@router.callback_query(F.data == "confirm:edit", LeadForm.preview)
+@callbacks.register("confirm:edit", state=LeadForm.preview)
 async def confirm_edit_lead(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Обработка запроса на редактирование заявки.
@@ -642,20 +656,19 @@ async def confirm_edit_lead(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("edit:"), LeadForm.editing)
-async def process_field_selection(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.register("edit", str, state=LeadForm.editing)
+async def process_field_selection(callback: CallbackQuery, state: FSMContext, field: str) -> None:
     """
     Обработка выбора поля для редактирования.
     
     Args:
         callback: Callback с выбранным полем (edit:name, edit:phone, etc.)
         state: FSM контекст
+        field: name, phone, email или description
     """
     data = await state.get_data()
     lang = data.get('language', 'en')
     
-    field = callback.data.split(":")[1]  # name, phone, email, description
-    
     # Сохраняем какое поле редактируем
     await state.update_data(editing_field=field)
     
@@ -677,4 +690,4 @@ async def process_field_selection(callback: CallbackQuery, state: FSMContext) ->
         await callback.message.edit_text(get_text('ask_description', lang))
     
     await callback.answer()
-    logger.debug(f"User {callback.from_user.id} editing field: {field}")
+    logger.debug("User %s editing field: %s", callback.from_user.id, field)
@@ -0,0 +1,67 @@
+"""
+Main menu router - единая точка маршрутизации кнопок главного меню.
+
+Текст сообщения ищется в обратном индексе кнопок меню
+(один поиск в словаре вместо проверки списков переводов в каждом
+роутере). Найденное действие передаётся обработчику вместе с языком
+кнопки, поэтому запрос языка в БД не нужен.
+"""
+import logging
+from typing import Any, Dict, Union
+
+from aiogram import Router
+from aiogram.filters import BaseFilter
+from aiogram.types import Message
+from aiogram.fsm.context import FSMContext
+
+from app.locales import get_menu_button_index
+from app.handlers.common import btn_language
+from app.handlers.lead_flow import cmd_new_lead
+from app.handlers.my_leads import cmd_my_leads, btn_cancel_lead
+
+router = Router()
+logger = logging.getLogger(__name__)
+
+
+class MenuButtonFilter(BaseFilter):
+    """
+    Фильтр кнопок главного меню.
+    
+    Пропускает сообщение, если его текст - кнопка меню на любом языке,
+    и добавляет в данные обработчика menu_action и menu_lang.
+    """
+    
+    async def __call__(self, message: Message) -> Union[bool, Dict[str, Any]]:
+        match = get_menu_button_index().get(message.text) if message.text else None
+        if match is None:
+            return False
+        action, lang = match
+        return {'menu_action': action, 'menu_lang': lang}
+
+
+@router.message(MenuButtonFilter())
+async def route_menu_button(
+    message: Message,
+    state: FSMContext,
+    menu_action: str,
+    menu_lang: str
+) -> None:
+    """
+    Вызвать обработчик действия нажатой кнопки меню.
+    
+    Args:
+        message: Сообщение с текстом кнопки
+        state: FSM контекст
+        menu_action: Действие из обратного индекса кнопок меню
+        menu_lang: Язык нажатой кнопки
+    """
+    if menu_action == 'new_lead':
+        await cmd_new_lead(message, state, user_lang=menu_lang)
+    elif menu_action == 'my_leads':
+        await cmd_my_leads(message, user_lang=menu_lang)
+    elif menu_action == 'cancel_lead':
+        await btn_cancel_lead(message, state, user_lang=menu_lang)
+    elif menu_action == 'change_language':
+        await btn_language(message, state, user_lang=menu_lang)
+    else:
+        logger.warning("Unknown menu action: %s", menu_action)
@@ -4,12 +4,14 @@ My Leads handlers - просмотр и управление заявками п
 Этот модуль реализует:
 - Команду /my_leads для просмотра заявок
 - Отмену заявок с подтверждением
-- Обработку кнопок главного меню
+
+Кнопки главного меню маршрутизируются в app.handlers.menu.
 """
 import logging
 from datetime import datetime
+from typing import Optional
 
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import Command
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -22,38 +24,23 @@ from app.keyboards import (
     get_leads_list_keyboard,
     get_confirm_cancel_keyboard
 )
+from app.callbacks import callbacks
 
 router = Router()
 logger = logging.getLogger(__name__)
 
 
-@router.message(F.text.in_([
-    '➕ Новая заявка', '➕ Novi zahtjev', '➕ New request'
-]))
-async def btn_new_lead(message: Message, state: FSMContext) -> None:
-    """
-    Обработка кнопки "Новая заявка" из главного меню.
-    
-    Перенаправляет на команду /new
-    """
-    # Импортируем здесь чтобы избежать циклического импорта
-    from app.handlers.lead_flow import cmd_new_lead
-    await cmd_new_lead(message, state)
-
-
-@router.message(F.text.in_([
-    '📋 Мои заявки', '📋 Moji zahtjevi', '📋 My requests'
-]))
 @router.message(Command("my_leads"))
-async def cmd_my_leads(message: Message) -> None:
+async def cmd_my_leads(message: Message, user_lang: Optional[str] = None) -> None:
     """
     Показать список всех заявок пользователя.
     
     Args:
         message: Сообщение с командой /my_leads или кнопкой
+        user_lang: Язык кнопки меню (если нет - берётся из БД)
     """
     user_id = message.from_user.id
-    user_lang = get_user_language(user_id, DB_PATH) or 'en'
+    user_lang = user_lang or get_user_language(user_id, DB_PATH) or 'en'
     
     # Получаем заявки пользователя
     leads = get_user_leads(user_id, DB_PATH)
@@ -63,7 +50,7 @@ async def cmd_my_leads(message: Message) -> None:
             get_text('no_leads', user_lang),
             reply_markup=get_main_menu_keyboard(user_lang)
         )
-        logger.info(f"User {user_id} has no leads")
+        logger.info("User %s has no leads", user_id)
         return
     
     # Формируем список заявок
@@ -88,20 +75,17 @@ async def cmd_my_leads(message: Message) -> None:
         reply_markup=get_main_menu_keyboard(user_lang),
         parse_mode='HTML'
     )
-    logger.info(f"User {user_id} viewed {len(leads)} leads")
+    logger.info("User %s viewed %s leads", user_id, len(leads))
 
 
-@router.message(F.text.in_([
-    '❌ Отменить заявку', '❌ Otkazati zahtjev', '❌ Cancel request'
-]))
-async def btn_cancel_lead(message: Message, state: FSMContext) -> None:
+async def btn_cancel_lead(message: Message, state: FSMContext, user_lang: Optional[str] = None) -> None:
     """
     Обработка кнопки "Отменить заявку" из главного меню.
     
     Показывает список заявок для выбора.
     """
     user_id = message.from_user.id
-    user_lang = get_user_language(user_id, DB_PATH) or 'en'
+    user_lang = user_lang or get_user_language(user_id, DB_PATH) or 'en'
     
     # Получаем заявки пользователя
     leads = get_user_leads(user_id, DB_PATH)
@@ -118,11 +102,11 @@ async def btn_cancel_lead(message: Message, state: FSMContext) -> None:
         get_text('choose_lead_to_cancel', user_lang),
         reply_markup=get_leads_list_keyboard(leads, user_lang)
     )
-    logger.info(f"User {user_id} wants to cancel a lead, showing {len(leads)} options")
+    logger.info("User %s wants to cancel a lead, showing %s options", user_id, len(leads))
 
 
-@router.callback_query(F.data.startswith("select_lead:"))
-async def process_lead_selection(callback: CallbackQuery, state: FSMContext) -> None:
+@callbacks.register("select_lead", int)
+async def process_lead_selection(callback: CallbackQuery, state: FSMContext, lead_id: int) -> None:
     """
     Обработка выбора заявки для отмены.
     
@@ -131,9 +115,6 @@ async def process_lead_selection(callback: CallbackQuery, state: FSMContext) ->
     user_id = callback.from_user.id
     user_lang = get_user_language(user_id, DB_PATH) or 'en'
     
-    # Получаем ID заявки
-    lead_id = int(callback.data.split(":")[1])
-    
     # Получаем заявки пользователя
     leads = get_user_leads(user_id, DB_PATH)
     lead = next((l for l in leads if l['id'] == lead_id), None)
@@ -164,10 +145,10 @@ async def process_lead_selection(callback: CallbackQuery, state: FSMContext) ->
         reply_markup=get_confirm_cancel_keyboard(user_lang)
     )
     await callback.answer()
-    logger.info(f"User {user_id} selected lead #{lead_id} for cancellation")
+    logger.info("User %s selected lead #%s for cancellation", user_id, lead_id, extra={'lead_id': lead_id})
 
 
-@router.callback_query(F.data == "cancel_lead:confirm")
+@callbacks.register("cancel_lead:confirm")
 async def confirm_cancel_lead(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Подтверждение отмены заявки - удаление из БД.
@@ -189,7 +170,7 @@ async def confirm_cancel_lead(callback: CallbackQuery, state: FSMContext) -> Non
     if success:
         success_text = format_text('lead_cancelled', user_lang, lead_id=lead_id)
         await callback.message.edit_text(success_text)
-        logger.info(f"User {user_id} cancelled and deleted lead #{lead_id}")
+        logger.info("User %s cancelled and deleted lead #%s", user_id, lead_id, extra={'lead_id': lead_id})
         
         # Показываем главное меню
         await callback.message.answer(
@@ -198,14 +179,14 @@ async def confirm_cancel_lead(callback: CallbackQuery, state: FSMContext) -> Non
         )
     else:
         await callback.answer(get_text('cancel_failed', user_lang), show_alert=True)
-        logger.warning(f"Failed to delete lead #{lead_id} for user {user_id}")
+        logger.warning("Failed to delete lead #%s for user %s", lead_id, user_id, extra={'lead_id': lead_id})
     
     # Очищаем state
     await state.clear()
     await callback.answer()
 
 
-@router.callback_query(F.data == "cancel_lead:back")
+@callbacks.register("cancel_lead:back")
 async def back_from_confirm(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Возврат из подтверждения отмены к списку заявок.
@@ -232,8 +213,8 @@ async def back_from_confirm(callback: CallbackQuery, state: FSMContext) -> None:
     await callback.answer()
 
 
-@router.callback_query(F.data == "leads:back")
-async def back_to_menu(callback: CallbackQuery) -> None:
+@callbacks.register("leads:back")
+async def back_to_menu(callback: CallbackQuery, state: FSMContext) -> None:
     """
     Возврат из списка заявок к главному меню.
     """
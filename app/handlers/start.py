@@ -5,7 +5,7 @@ This module handles:
 - /start command (initial greeting or language selection)
 - Language selection via inline buttons
 """
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery
 from aiogram.fsm.context import FSMContext
@@ -15,6 +15,7 @@ from app.config import DB_PATH
 from app.db import get_user_language, save_user_language
 from app.locales import get_text, SUPPORTED_LANGUAGES
 from app.keyboards import get_language_keyboard, get_main_menu_keyboard
+from app.callbacks import callbacks, answer_callback
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -42,7 +43,7 @@ async def cmd_start(message: Message, state: FSMContext = None) -> None:
         current_state = await state.get_state()
         if current_state:
             await state.clear()
-            logger.info(f"User {user_id} used /start, cleared state: {current_state}")
+            logger.info("User %s used /start, cleared state: %s", user_id, current_state)
     
     if user_lang:
         welcome_text = get_text('welcome', user_lang)
@@ -51,17 +52,17 @@ async def cmd_start(message: Message, state: FSMContext = None) -> None:
             f"{welcome_text}\n\n{menu_text}",
             reply_markup=get_main_menu_keyboard(user_lang)
         )
-        logger.info(f"User {user_id} accessed /start with language {user_lang}")
+        logger.info("User %s accessed /start with language %s", user_id, user_lang)
     else:
         await message.answer(
             get_text('choose_language', 'en'),
             reply_markup=get_language_keyboard()
         )
-        logger.info(f"New user {user_id} requested language selection")
+        logger.info("New user %s requested language selection", user_id)
 
 
-@router.callback_query(F.data.startswith("lang:"))
-async def process_language_selection(callback: CallbackQuery) -> None:
+@callbacks.register("lang", str, ack=True)
+async def process_language_selection(callback: CallbackQuery, state: FSMContext, lang_code: str) -> None:
     """
     Handle language selection callback.
     
@@ -69,14 +70,14 @@ async def process_language_selection(callback: CallbackQuery) -> None:
     
     Args:
         callback: Callback query from language selection button
+        state: FSM context (unused)
+        lang_code: Selected language code
     """
     try:
-        lang_code = callback.data.split(":")[1]
-        
         # Validate language code
         if lang_code not in SUPPORTED_LANGUAGES:
-            await callback.answer("Invalid language selection", show_alert=True)
-            logger.warning(f"Invalid language code attempted: {lang_code}")
+            await answer_callback(callback, "Invalid language selection", show_alert=True)
+            logger.warning("Invalid language code attempted: %s", lang_code)
             return
         
         user_id = callback.from_user.id
@@ -93,10 +94,9 @@ async def process_language_selection(callback: CallbackQuery) -> None:
             get_text('menu', lang_code),
             reply_markup=get_main_menu_keyboard(lang_code)
         )
-        await callback.answer()
         
-        logger.info(f"User {user_id} selected language: {lang_code}")
+        logger.info("User %s selected language: %s", user_id, lang_code)
         
     except Exception as e:
-        logger.error(f"Error processing language selection: {e}", exc_info=True)
-        await callback.answer("An error occurred", show_alert=True)
+        logger.error("Error processing language selection: %s", e, exc_info=True)
+        await answer_callback(callback, "An error occurred", show_alert=True)
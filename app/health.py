@@ -0,0 +1,193 @@
+"""
+Health - проверки живости и готовности процесса бота.
+
+Этот модуль реализует:
+- HealthMonitor - замер задержки event loop и отчёты /healthz и /readyz
+- record_api_error, record_poll - события Bot API (из ApiMetricsMiddleware)
+- health_routes - обработчики aiohttp для HTTP-сервера метрик
+
+/healthz (живость) - 503, если event loop подвисает или (в режиме
+polling) обновления давно не забирались у Telegram: процесс жив, но
+не работает, и его нужно перезапустить.
+
+/readyz (готовность) - 503, если база данных не отвечает.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app import metrics
+from app.db import ping_db
+
+logger = logging.getLogger(__name__)
+
+# Как часто замерять задержку event loop (секунды)
+LOOP_LAG_INTERVAL = 0.5
+
+# Сколько последних замеров задержки хранить
+LOOP_LAG_WINDOW = 120
+
+# Последние события Bot API (общие для процесса)
+_api_state: Dict[str, Any] = {'last_error': None, 'last_poll_at': None}
+
+
+def record_api_error(method: str, code: str, message: str) -> None:
+    """Запомнить последнюю ошибку запроса к Bot API."""
+    _api_state['last_error'] = {
+        'method': method,
+        'code': code,
+        'message': message[:200],
+        'at': time.time(),
+    }
+
+
+def record_poll() -> None:
+    """Отметить успешный запрос getUpdates."""
+    _api_state['last_poll_at'] = time.monotonic()
+
+
+def _age(since: Optional[float]) -> Optional[float]:
+    return round(time.monotonic() - since, 3) if since is not None else None
+
+
+class HealthMonitor:
+    """
+    Состояние здоровья процесса бота.
+    """
+    
+    def __init__(
+        self,
+        db_path: str,
+        polling: bool,
+        max_loop_lag_ms: float,
+        max_poll_age: float,
+        last_update: Optional[Callable[[], Optional[float]]] = None
+    ) -> None:
+        """
+        Args:
+            db_path: Путь к базе данных (для проверки готовности)
+            polling: Процесс сам забирает обновления через getUpdates
+            max_loop_lag_ms: Допустимая задержка event loop
+            max_poll_age: Допустимое время без успешного getUpdates (секунды)
+            last_update: Возвращает time.monotonic() последнего обработанного обновления
+        """
+        self.db_path = db_path
+        self.polling = polling
+        self.max_loop_lag_ms = max_loop_lag_ms
+        self.max_poll_age = max_poll_age
+        self.last_update = last_update
+        self._started_at = time.monotonic()
+        self._lags: Deque[float] = deque(maxlen=LOOP_LAG_WINDOW)
+        self._task: Optional[asyncio.Task] = None
+        metrics.EVENT_LOOP_LAG.set_function(lambda: {(): self.loop_lag_ms / 1000})
+    
+    @property
+    def loop_lag_ms(self) -> float:
+        """Последняя замеренная задержка event loop."""
+        return self._lags[-1] if self._lags else 0.0
+    
+    async def _measure_loop_lag(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self._lags.append(max(0.0, time.monotonic() - started - LOOP_LAG_INTERVAL) * 1000)
+    
+    def start(self) -> None:
+        """Запустить замер задержки event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._measure_loop_lag())
+    
+    async def stop(self) -> None:
+        """Остановить замер задержки event loop."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    def liveness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Отчёт /healthz.
+        
+        Returns:
+            (здоров ли процесс, подробности)
+        """
+        problems: List[str] = []
+        lag = self.loop_lag_ms
+        if lag > self.max_loop_lag_ms:
+            problems.append(f"event loop lag {lag:.0f} ms")
+        
+        poll_age = _age(_api_state['last_poll_at'])
+        if self.polling:
+            # До первого getUpdates считаем от запуска
+            waiting = poll_age if poll_age is not None else _age(self._started_at)
+            if waiting > self.max_poll_age:
+                problems.append(f"no successful getUpdates for {waiting:.0f} s")
+        
+        backlog: Dict[str, Any] = {'users_in_flight': sum(metrics.USERS_IN_FLIGHT.collect().values())}
+        queues = metrics.SHARD_QUEUE_DEPTH.collect()
+        if queues:
+            backlog['shard_queues'] = {key[0]: depth for key, depth in queues.items()}
+        
+        return not problems, {
+            'status': 'ok' if not problems else 'fail',
+            'problems': problems,
+            'uptime_seconds': _age(self._started_at),
+            'event_loop_lag_ms': round(lag, 1),
+            'event_loop_lag_max_ms': round(max(self._lags, default=0.0), 1),
+            'seconds_since_last_update': _age(self.last_update() if self.last_update else None),
+            'seconds_since_last_poll': poll_age,
+            'backlog': backlog,
+            'last_api_error': _api_state['last_error'],
+        }
+    
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Отчёт /readyz.
+        
+        Returns:
+            (готов ли процесс принимать обновления, подробности)
+        """
+        started = time.perf_counter()
+        try:
+            ping_db(self.db_path)
+            db_error = None
+        except Exception as e:
+            db_error = str(e)
+            logger.warning("Readiness check: database unavailable: %s", e)
+        db_ms = (time.perf_counter() - started) * 1000
+        
+        return db_error is None, {
+            'status': 'ok' if db_error is None else 'fail',
+            'db_latency_ms': round(db_ms, 2),
+            'db_error': db_error,
+        }
+
+
+def health_routes(monitor: HealthMonitor) -> List[Tuple[str, Callable[..., Any]]]:
+    """
+    Обработчики GET /healthz и /readyz для HTTP-сервера метрик.
+    
+    Args:
+        monitor: Монитор здоровья процесса
+    
+    Returns:
+        Список (путь, обработчик)
+    """
+    from aiohttp import web
+    
+    def respond(report: Tuple[bool, Dict[str, Any]]) -> web.Response:
+        ok, body = report
+        return web.json_response(body, status=200 if ok else 503)
+    
+    async def healthz(request: web.Request) -> web.Response:
+        return respond(monitor.liveness())
+    
+    async def readyz(request: web.Request) -> web.Response:
+        return respond(monitor.readiness())
+    
+    return [('/healthz', healthz), ('/readyz', readyz)]
@@ -1,6 +1,12 @@
 """
 Модуль для создания клавиатур (inline кнопок и reply кнопок)
+
+Клавиатуры, зависящие только от языка, собираются один раз для каждого
+языка (при первом обращении к нему) и отдаются из неизменяемого кэша.
 """
+from types import MappingProxyType
+from typing import Callable, Dict, Union
+
 from aiogram.types import (
     InlineKeyboardMarkup,
     InlineKeyboardButton,
@@ -8,10 +14,16 @@ from aiogram.types import (
     KeyboardButton
 )
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
-from app.locales import get_text, LANGUAGE_NAMES
+from app.locales import get_text, LANGUAGE_NAMES, SUPPORTED_LANGUAGES
+from app.callbacks import encode_callback
 
+Markup = Union[InlineKeyboardMarkup, ReplyKeyboardMarkup]
 
-def get_language_keyboard(callback_prefix: str = "lang") -> InlineKeyboardMarkup:
+# Префиксы callback_data для клавиатуры выбора языка
+LANGUAGE_CALLBACK_PREFIXES = ("lang", "change_lang")
+
+
+def _build_language_keyboard(callback_prefix: str = "lang") -> InlineKeyboardMarkup:
     """
     Клавиатура для выбора языка (RU / ME / EN)
     
@@ -28,7 +40,7 @@ def get_language_keyboard(callback_prefix: str = "lang") -> InlineKeyboardMarkup
     for lang_code, lang_name in LANGUAGE_NAMES.items():
         builder.button(
             text=lang_name,
-            callback_data=f"{callback_prefix}:{lang_code}"
+            callback_data=encode_callback(callback_prefix, lang_code)
         )
     
     # Размещаем кнопки в один столбец (по одной в ряд)
@@ -37,7 +49,7 @@ def get_language_keyboard(callback_prefix: str = "lang") -> InlineKeyboardMarkup
     return builder.as_markup()
 
 
-def get_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура для подтверждения отправки заявки (Отправить / Изменить / Отменить)
     
@@ -73,7 +85,7 @@ def get_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_edit_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_edit_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура для выбора поля для редактирования
     (Имя / Телефон / Email / Описание)
@@ -116,7 +128,7 @@ def get_edit_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_skip_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_skip_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура с кнопкой "Пропустить" (для email)
     
@@ -137,7 +149,7 @@ def get_skip_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def remove_keyboard() -> InlineKeyboardMarkup:
+def _build_empty_keyboard() -> InlineKeyboardMarkup:
     """
     Пустая клавиатура (для удаления кнопок)
     
@@ -147,7 +159,7 @@ def remove_keyboard() -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(inline_keyboard=[])
 
 
-def get_confirm_data_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_confirm_data_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура для подтверждения использования старых данных
     (Использовать / Изменить)
@@ -178,7 +190,7 @@ def get_confirm_data_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_main_menu_keyboard(lang: str = 'en') -> ReplyKeyboardMarkup:
+def _build_main_menu_keyboard(lang: str = 'en') -> ReplyKeyboardMarkup:
     """
     Главное меню с постоянными кнопками внизу
     (Новая заявка / Мои заявки / Отменить заявку / Сменить язык)
@@ -225,7 +237,7 @@ def get_leads_list_keyboard(leads: list, lang: str = 'en') -> InlineKeyboardMark
         
         builder.button(
             text=button_text,
-            callback_data=f"select_lead:{lead['id']}"
+            callback_data=encode_callback("select_lead", lead['id'])
         )
     
     # Кнопка "Назад"
@@ -240,7 +252,7 @@ def get_leads_list_keyboard(leads: list, lang: str = 'en') -> InlineKeyboardMark
     return builder.as_markup()
 
 
-def get_confirm_cancel_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_confirm_cancel_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения отмены заявки
     (Да, отменить / Назад)
@@ -271,7 +283,7 @@ def get_confirm_cancel_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_files_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_files_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура для завершения загрузки файлов
     (Готово / Пропустить / Отменить)
@@ -308,7 +320,7 @@ def get_files_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     return builder.as_markup()
 
 
-def get_language_change_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+def _build_language_change_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
     """
     Клавиатура подтверждения смены языка во время заполнения формы
     (Да, сменить язык / Нет, продолжить заполнение)
@@ -336,4 +348,108 @@ def get_language_change_confirmation_keyboard(lang: str = 'en') -> InlineKeyboar
     # Размещаем кнопки в один столбец
     builder.adjust(1)
     
-    return builder.as_markup()
\ No newline at end of file
+    return builder.as_markup()
+
+
+# Сборщики клавиатур, зависящих только от языка
+_LANG_BUILDERS: Dict[str, Callable[[str], Markup]] = {
+    'confirmation': _build_confirmation_keyboard,
+    'edit': _build_edit_keyboard,
+    'skip': _build_skip_keyboard,
+    'confirm_data': _build_confirm_data_keyboard,
+    'main_menu': _build_main_menu_keyboard,
+    'confirm_cancel': _build_confirm_cancel_keyboard,
+    'files': _build_files_keyboard,
+    'language_change_confirmation': _build_language_change_confirmation_keyboard,
+}
+
+
+def _build_language_set(lang: str) -> MappingProxyType:
+    """
+    Собрать все клавиатуры, зависящие только от языка, для одного языка.
+    
+    Returns:
+        Неизменяемый словарь {имя: клавиатура}
+    """
+    return MappingProxyType({name: builder(lang) for name, builder in _LANG_BUILDERS.items()})
+
+
+# Клавиатуры, не зависящие от языка (каталоги переводов не нужны)
+_STATIC_KEYBOARDS = MappingProxyType({
+    **{('language', prefix): _build_language_keyboard(prefix) for prefix in LANGUAGE_CALLBACK_PREFIXES},
+    ('empty', ''): _build_empty_keyboard(),
+})
+
+# Наборы клавиатур по языкам: собираются при первом обращении к языку.
+# Объекты клавиатур общие для всех обновлений - изменять их нельзя
+_KEYBOARDS: Dict[str, MappingProxyType] = {}
+
+
+def _cached(name: str, lang: str) -> Markup:
+    """Клавиатура из кэша; неизвестный язык, как и в get_text, заменяется на английский."""
+    if lang not in SUPPORTED_LANGUAGES:
+        lang = 'en'
+    keyboards = _KEYBOARDS.get(lang)
+    if keyboards is None:
+        keyboards = _KEYBOARDS.setdefault(lang, _build_language_set(lang))
+    return keyboards[name]
+
+
+def get_language_keyboard(callback_prefix: str = "lang") -> InlineKeyboardMarkup:
+    """
+    Клавиатура для выбора языка (RU / ME / EN)
+    
+    Args:
+        callback_prefix: Префикс для callback_data (по умолчанию "lang")
+                        Может быть "lang" для первого выбора или "change_lang" для смены
+    
+    Returns:
+        InlineKeyboardMarkup с кнопками выбора языка
+    """
+    cached = _STATIC_KEYBOARDS.get(('language', callback_prefix))
+    return cached if cached is not None else _build_language_keyboard(callback_prefix)
+
+
+def get_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения отправки заявки (Отправить / Изменить / Отменить)"""
+    return _cached('confirmation', lang)
+
+
+def get_edit_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура выбора поля для редактирования (Имя / Телефон / Email / Описание)"""
+    return _cached('edit', lang)
+
+
+def get_skip_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура с кнопкой "Пропустить" (для email)"""
+    return _cached('skip', lang)
+
+
+def remove_keyboard() -> InlineKeyboardMarkup:
+    """Пустая клавиатура (для удаления кнопок)"""
+    return _STATIC_KEYBOARDS[('empty', '')]
+
+
+def get_confirm_data_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения использования старых данных (Использовать / Изменить)"""
+    return _cached('confirm_data', lang)
+
+
+def get_main_menu_keyboard(lang: str = 'en') -> ReplyKeyboardMarkup:
+    """Главное меню с постоянными кнопками внизу"""
+    return _cached('main_menu', lang)
+
+
+def get_confirm_cancel_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения отмены заявки (Да, отменить / Назад)"""
+    return _cached('confirm_cancel', lang)
+
+
+def get_files_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура для завершения загрузки файлов (Готово / Пропустить / Отменить)"""
+    return _cached('files', lang)
+
+
+def get_language_change_confirmation_keyboard(lang: str = 'en') -> InlineKeyboardMarkup:
+    """Клавиатура подтверждения смены языка во время заполнения формы"""
+    return _cached('language_change_confirmation', lang)
@@ -0,0 +1,156 @@
+"""
+Logging setup - асинхронный структурированный логгинг.
+
+Этот модуль реализует:
+- setup_logging - QueueHandler на корневом логгере и QueueListener,
+  который форматирует и пишет записи в отдельном потоке
+- JsonFormatter - запись в одну строку JSON с полями контекста
+- bind_log_context - поля контекста (user_id, update_id, handler, ...),
+  которые добавляются ко всем записям текущего обновления
+- DebugSamplingFilter - выборка DEBUG-записей для частых событий
+
+Обработчики только создают запись и кладут её в очередь: форматирование
+сообщения (логгеры используют %-аргументы) и вывод выполняются в потоке
+QueueListener и не блокируют event loop.
+"""
+import sys
+import json
+import queue
+import random
+import atexit
+import logging
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Mapping, Optional
+
+# Поля записи, попадающие в JSON (из контекста или extra=...)
+LOG_RECORD_FIELDS = ('worker', 'update_id', 'update_type', 'user_id', 'handler', 'lead_id', 'latency_ms')
+
+# Формат текстового вывода (LOG_FORMAT=text)
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_context: ContextVar[Mapping[str, Any]] = ContextVar('log_context', default={})
+
+
+def bind_log_context(**fields: Any) -> Token:
+    """
+    Добавить поля в контекст логов текущей задачи.
+    
+    Args:
+        **fields: Поля (user_id=..., handler=...)
+    
+    Returns:
+        Токен для reset_log_context
+    """
+    return _context.set({**_context.get(), **fields})
+
+
+def reset_log_context(token: Token) -> None:
+    """Вернуть контекст логов к состоянию до bind_log_context."""
+    _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Копирует поля контекста логов в запись.
+    
+    Запись уходит в другой поток, поэтому контекст нужно
+    снять в момент её создания.
+    """
+    
+    def __init__(self, static_fields: Optional[Mapping[str, Any]] = None) -> None:
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        for fields in (self.static_fields, _context.get()):
+            for name, value in fields.items():
+                if not hasattr(record, name):
+                    setattr(record, name, value)
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """Пропускает только долю DEBUG-записей; остальные уровни - все."""
+    
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler без форматирования в вызывающем потоке.
+    
+    Стандартный prepare() форматирует сообщение до постановки в очередь;
+    здесь очередь внутри процесса, поэтому запись передаётся как есть
+    и форматируется в потоке QueueListener.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    """Форматирует запись как одну строку JSON."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        payload: Dict[str, Any] = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in LOG_RECORD_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                payload[field] = value
+        if record.exc_info:
+            payload['exc'] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+def setup_logging(
+    level: str = 'INFO',
+    fmt: str = 'json',
+    debug_sample_rate: float = 1.0,
+    static_fields: Optional[Mapping[str, Any]] = None
+) -> QueueListener:
+    """
+    Настроить логгинг через очередь.
+    
+    Заменяет обработчики корневого логгера. Listener останавливается
+    (с выводом оставшихся записей) при завершении процесса.
+    
+    Args:
+        level: Уровень логгинга
+        fmt: Формат вывода: 'json' или 'text'
+        debug_sample_rate: Доля DEBUG-записей, попадающих в лог (0..1)
+        static_fields: Поля, добавляемые ко всем записям процесса (worker=...)
+    
+    Returns:
+        Запущенный QueueListener
+    """
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+    
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    if debug_sample_rate < 1.0:
+        handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+    handler.addFilter(ContextFilter(static_fields))
+    
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    
+    listener = QueueListener(records, output)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
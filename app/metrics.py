@@ -0,0 +1,329 @@
+"""
+Metrics - реестр метрик процесса в формате Prometheus.
+
+Этот модуль содержит:
+- Counter, Gauge, Histogram - метрики с метками
+- Метрики бота (обновления, обработчики, БД, Bot API, FSM, очереди, кэши)
+- db_timed - декоратор замера функций app/db.py (метрики и спан трассировки)
+- start_metrics_server - HTTP-сервер с GET /metrics
+
+Реализация без внешних зависимостей: значения хранятся в словарях
+процесса и отдаются в текстовом формате Prometheus. В режиме
+нескольких воркеров у каждого процесса свой реестр и свой порт.
+"""
+import time
+import logging
+import functools
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple, TypeVar
+
+from app.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Метка последней корзины гистограммы
+_INF_LABEL = 'le="+Inf"'
+
+LabelValues = Tuple[str, ...]
+F = TypeVar('F', bound=Callable[..., Any])
+M = TypeVar('M', bound='_Metric')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, метки."""
+    
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+    
+    def _key(self, labels: Sequence[str]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(label) for label in labels)
+    
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+    
+    def render(self) -> str:
+        """Метрика в текстовом формате Prometheus."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик."""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        """Увеличить счётчик для значений меток."""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, *labels: str) -> float:
+        """Текущее значение счётчика."""
+        return self._values.get(self._key(labels), 0)
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class Gauge(_Metric):
+    """
+    Значение, которое может расти и уменьшаться.
+    
+    Значения задаются через set() или вычисляются при каждом сборе
+    функцией set_function() - для величин, которые дешевле прочитать
+    из источника, чем поддерживать (размер очереди, число пользователей).
+    """
+    
+    kind = 'gauge'
+    
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], Mapping[LabelValues, float]]] = None
+    
+    def set(self, value: float, *labels: str) -> None:
+        """Установить значение для значений меток."""
+        self._values[self._key(labels)] = value
+    
+    def replace(self, values: Mapping[LabelValues, float]) -> None:
+        """Заменить все значения (метки, пропавшие из values, удаляются)."""
+        self._values = {self._key(key): value for key, value in values.items()}
+    
+    def set_function(self, function: Callable[[], Mapping[LabelValues, float]]) -> None:
+        """
+        Вычислять значения при сборе.
+        
+        Args:
+            function: Возвращает словарь {значения меток: значение}
+        """
+        self._function = function
+    
+    def collect(self) -> Dict[LabelValues, float]:
+        """Текущие значения {значения меток: значение}."""
+        if self._function is None:
+            return dict(self._values)
+        try:
+            return {self._key(key): value for key, value in self._function().items()}
+        except Exception as e:
+            logger.warning("Failed to collect %s: %s", self.name, e)
+            return {}
+    
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(self.collect().items())
+        ]
+
+
+class Histogram(_Metric):
+    """Распределение значений (обычно длительностей) по корзинам."""
+    
+    kind = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # значения меток -> [счётчики корзин..., сумма, количество]
+        self._values: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, value: float, *labels: str) -> None:
+        """Учесть значение для значений меток."""
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[i] += 1
+                break
+        entry[-2] += value
+        entry[-1] += 1
+    
+    def count(self, *labels: str) -> int:
+        """Количество наблюдений."""
+        entry = self._values.get(self._key(labels))
+        return int(entry[-1]) if entry else 0
+    
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, entry in sorted(self._values.items()):
+            cumulative = 0
+            for bound, hits in zip(self.buckets, entry):
+                cumulative += hits
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, _INF_LABEL)} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(entry[-2])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {entry[-1]}")
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса."""
+    
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+    
+    def register(self, metric: M) -> M:
+        """
+        Добавить метрику.
+        
+        Raises:
+            ValueError: Если метрика с таким именем уже есть
+        """
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus."""
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def _gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def _histogram(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames))
+
+
+# Обновления
+UPDATES = _counter('bot_updates_total', 'Processed updates', ('type', 'status'))
+UPDATE_DURATION = _histogram('bot_update_duration_seconds', 'Update processing time', ('type',))
+USERS_IN_FLIGHT = _gauge('bot_users_in_flight', 'Users with updates being processed or waiting')
+
+# Обработчики
+HANDLER_DURATION = _histogram('bot_handler_duration_seconds', 'Handler execution time', ('handler',))
+
+# База данных
+DB_QUERY_DURATION = _histogram('bot_db_query_duration_seconds', 'Database function time', ('function',))
+DB_QUERY_ERRORS = _counter('bot_db_query_errors_total', 'Database function errors', ('function',))
+
+# Telegram Bot API
+API_REQUEST_DURATION = _histogram('bot_api_request_duration_seconds', 'Bot API request time', ('method',))
+API_ERRORS = _counter('bot_api_errors_total', 'Failed Bot API requests', ('method', 'code'))
+
+# FSM и черновики (обновляются при проходе DraftSweeper)
+FSM_USERS = _gauge('bot_fsm_users', 'Users per FSM state', ('state',))
+DRAFT_BYTES = _gauge('bot_draft_bytes', 'Approximate size of live lead drafts')
+DRAFTS_EXPIRED = _counter('bot_drafts_expired_total', 'Lead drafts discarded after TTL')
+
+# Очереди воркеров (режим нескольких процессов)
+SHARD_QUEUE_DEPTH = _gauge('bot_shard_queue_depth', 'Updates waiting in a worker queue', ('worker',))
+
+# Здоровье процесса
+EVENT_LOOP_LAG = _gauge('bot_event_loop_lag_seconds', 'Last measured event loop lag')
+
+# Кэши энхансера описаний (значения читаются из app.ai_enhancer при сборе)
+ENHANCER_CACHE_HITS = _gauge('bot_enhancer_cache_hits', 'Enhancer cache hits since start', ('cache',))
+ENHANCER_CACHE_MISSES = _gauge('bot_enhancer_cache_misses', 'Enhancer cache misses since start', ('cache',))
+ENHANCER_CACHE_HIT_RATIO = _gauge('bot_enhancer_cache_hit_ratio', 'Enhancer cache hit rate', ('cache',))
+
+
+def db_timed(function: F) -> F:
+    """
+    Декоратор: замер времени и ошибок функции работы с БД.
+    
+    Внутри трассы обновления вызов также записывается спаном db.<функция>.
+    
+    Args:
+        function: Функция app/db.py
+    
+    Returns:
+        Обёрнутая функция
+    """
+    name = function.__name__
+    
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            with span(f"db.{name}"):
+                return function(*args, **kwargs)
+        except Exception:
+            DB_QUERY_ERRORS.inc(name)
+            raise
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, name)
+    
+    return wrapper  # type: ignore[return-value]
+
+
+async def start_metrics_server(
+    host: str,
+    port: int,
+    routes: Sequence[Tuple[str, Callable[..., Any]]] = ()
+) -> Any:
+    """
+    Запустить HTTP-сервер с GET /metrics.
+    
+    Args:
+        host: Адрес сервера
+        port: Порт сервера
+        routes: Дополнительные GET-обработчики (путь, обработчик), например /healthz
+    
+    Returns:
+        aiohttp AppRunner (остановка - await runner.cleanup())
+    """
+    from aiohttp import web
+    
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(text=REGISTRY.render(), content_type='text/plain', charset='utf-8')
+    
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    for path, handler in routes:
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("Metrics server listening on %s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,372 @@
+"""
+Middlewares - сквозная обработка обновлений диспетчером.
+
+Этот модуль содержит:
+- UpdateStats - статистика времени обработки обновлений
+- UpdateTimingMiddleware - отметка времени получения обновления и замер обработки
+- UserLockMiddleware - последовательная обработка обновлений одного пользователя
+- HandlerMetricsMiddleware - время выполнения обработчиков
+- ApiMetricsMiddleware - время и ошибки запросов к Bot API
+- TracingMiddleware, ApiTracingMiddleware - трассировка обработки обновлений
+- LogContextMiddleware - поля обновления в контексте логов
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import (
+    TelegramBadRequest, TelegramConflictError, TelegramEntityTooLarge,
+    TelegramForbiddenError, TelegramNetworkError, TelegramNotFound, TelegramRetryAfter,
+    TelegramServerError, TelegramUnauthorizedError
+)
+from aiogram.methods import Response, TelegramMethod
+from aiogram.types import TelegramObject, Update
+
+from app import metrics
+from app.health import record_api_error, record_poll
+from app.logging_setup import bind_log_context, reset_log_context
+from app.tracing import SlowTraceExporter, span, trace
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних замеров хранить для перцентилей
+UPDATE_STATS_WINDOW = 1024
+
+# Как часто (в обновлениях) писать сводку в лог
+UPDATE_STATS_LOG_EVERY = 1000
+
+
+class UpdateStats:
+    """
+    Статистика времени обработки обновлений.
+    
+    Хранит счётчики за всё время и окно последних замеров для p50/p95.
+    Режим транспорта (polling/webhook) указывается в сводке, чтобы
+    сравнивать задержки режимов.
+    """
+    
+    def __init__(self, mode: str = 'polling', window: int = UPDATE_STATS_WINDOW) -> None:
+        self.mode = mode
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_update_at: Optional[float] = None
+        self._recent: Deque[float] = deque(maxlen=window)
+    
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Учесть обработку одного обновления."""
+        self.count += 1
+        if error:
+            self.errors += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_update_at = time.monotonic()
+        self._recent.append(seconds)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Текущие значения статистики.
+        
+        Returns:
+            Словарь с режимом, счётчиками и задержками в миллисекундах
+        """
+        recent = sorted(self._recent)
+        
+        def percentile(q: float) -> float:
+            if not recent:
+                return 0.0
+            return recent[min(len(recent) - 1, int(q * len(recent)))] * 1000
+        
+        return {
+            'mode': self.mode,
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': self.total_seconds / self.count * 1000 if self.count else 0.0,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': self.max_seconds * 1000,
+        }
+    
+    def log_summary(self) -> None:
+        """Записать сводку в лог."""
+        s = self.snapshot()
+        logger.info(
+            "Updates (%s): %s handled, %s errors, avg %.1f ms, p50 %.1f ms, p95 %.1f ms, max %.1f ms",
+            s['mode'], s['count'], s['errors'], s['avg_ms'], s['p50_ms'], s['p95_ms'], s['max_ms']
+        )
+
+
+class UpdateTimingMiddleware(BaseMiddleware):
+    """
+    Записывает в данные обработчика момент получения обновления
+    (received_at, по time.monotonic) для замера задержек и, если
+    передан UpdateStats, учитывает в нём время обработки обновления.
+    
+    Регистрируется как outer middleware на dp.update первым, чтобы
+    замер включал остальные middleware (в т.ч. ожидание UserLockMiddleware).
+    Число и время обработки обновлений по типам пишутся в app.metrics.
+    """
+    
+    def __init__(self, stats: Optional[UpdateStats] = None) -> None:
+        self.stats = stats
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        received_at = data.setdefault('received_at', time.monotonic())
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        
+        error = False
+        try:
+            return await handler(event, data)
+        except Exception:
+            error = True
+            raise
+        finally:
+            elapsed = time.monotonic() - received_at
+            logger.debug(
+                "Update %s handled in %.1f ms", update_type, elapsed * 1000,
+                extra={'latency_ms': round(elapsed * 1000, 1)}
+            )
+            metrics.UPDATES.inc(update_type, 'error' if error else 'ok')
+            metrics.UPDATE_DURATION.observe(elapsed, update_type)
+            if self.stats is not None:
+                self.stats.record(elapsed, error)
+                if self.stats.count % UPDATE_STATS_LOG_EVERY == 0:
+                    self.stats.log_summary()
+
+
+class UserLockMiddleware(BaseMiddleware):
+    """
+    Обрабатывает обновления одного пользователя строго по очереди.
+    
+    aiogram обрабатывает обновления параллельно, поэтому два быстрых
+    сообщения пользователя могут перемешать state.get_data() и
+    state.update_data() (потеря файлов), а двойное нажатие "Отправить"
+    - сохранить заявку дважды. Middleware держит asyncio.Lock на
+    пользователя; обновления разных пользователей идут параллельно.
+    
+    Память ограничена: блокировка существует, только пока у пользователя
+    есть обрабатываемые или ожидающие обновления.
+    
+    Регистрируется как outer middleware на dp.update (после встроенных
+    middleware aiogram, которые определяют event_from_user).
+    """
+    
+    def __init__(self) -> None:
+        # user_id -> [lock, количество обновлений, использующих lock]
+        self._locks: Dict[int, List[Any]] = {}
+    
+    @property
+    def active_users(self) -> int:
+        """Количество пользователей с обрабатываемыми обновлениями."""
+        return len(self._locks)
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user is None:
+            return await handler(event, data)
+        
+        entry = self._locks.get(user.id)
+        if entry is None:
+            entry = self._locks[user.id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            with span('user_lock.wait'):
+                await entry[0].acquire()
+            try:
+                # raw_state прочитан FSM middleware до ожидания блокировки -
+                # пока ждали, предыдущее обновление могло сменить состояние
+                state = data.get('state')
+                if state is not None:
+                    data['raw_state'] = await state.get_state()
+                return await handler(event, data)
+            finally:
+                entry[0].release()
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[user.id]
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Записывает время выполнения обработчиков в app.metrics
+    и добавляет имя обработчика в контекст логов.
+    
+    Регистрируется как inner middleware на событиях диспетчера
+    (dp.message, dp.callback_query) и действует для всех роутеров.
+    Callback-запросы подписываются ключом маршрута из app.callbacks.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        route = data.get('callback_route')
+        if route is not None:
+            name = f"callback:{route.key}"
+        else:
+            handler_object = data.get('handler')
+            name = handler_object.callback.__name__ if handler_object is not None else 'unknown'
+        
+        token = bind_log_context(handler=name)
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            metrics.HANDLER_DURATION.observe(time.perf_counter() - started, name)
+            reset_log_context(token)
+
+
+# Код ошибки Bot API для метрик (подклассы - раньше базовых классов)
+_API_ERROR_CODES = (
+    (TelegramRetryAfter, '429'),
+    (TelegramEntityTooLarge, '413'),
+    (TelegramNetworkError, 'network'),
+    (TelegramBadRequest, '400'),
+    (TelegramUnauthorizedError, '401'),
+    (TelegramForbiddenError, '403'),
+    (TelegramNotFound, '404'),
+    (TelegramConflictError, '409'),
+    (TelegramServerError, '5xx'),
+)
+
+
+def api_error_code(error: Exception) -> str:
+    """
+    Код ошибки запроса к Bot API для метрик.
+    
+    Args:
+        error: Исключение запроса
+    
+    Returns:
+        HTTP-код ('400', '429', ...), 'network' или 'other'
+    """
+    for error_type, code in _API_ERROR_CODES:
+        if isinstance(error, error_type):
+            return code
+    return 'other'
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """
+    Записывает время и ошибки запросов к Bot API в app.metrics,
+    последнюю ошибку и успешные getUpdates - в app.health.
+    
+    Регистрируется на сессии бота: bot.session.middleware(...).
+    """
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any]
+    ) -> Response[Any]:
+        name = method.__api_method__
+        started = time.perf_counter()
+        try:
+            response = await make_request(bot, method)
+        except Exception as e:
+            code = api_error_code(e)
+            metrics.API_ERRORS.inc(name, code)
+            record_api_error(name, code, str(e))
+            raise
+        finally:
+            metrics.API_REQUEST_DURATION.observe(time.perf_counter() - started, name)
+        if name == 'getUpdates':
+            record_poll()
+        return response
+
+
+class TracingMiddleware(BaseMiddleware):
+    """
+    Открывает трассу на каждое обновление.
+    
+    Вложенные спаны добавляют db_timed (вызовы БД), AI enhancer (этапы
+    анализа) и ApiTracingMiddleware (запросы к Bot API). Законченная
+    трасса передаётся экспортёру медленных трасс.
+    
+    Регистрируется как outer middleware на dp.update.
+    """
+    
+    def __init__(self, exporter: SlowTraceExporter) -> None:
+        self.exporter = exporter
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        attrs: Dict[str, Any] = {'user_id': user.id if user else None}
+        if isinstance(event, Update):
+            attrs['update_id'] = event.update_id
+            attrs['type'] = event.event_type
+        
+        root = None
+        try:
+            with trace('update', **attrs) as root:
+                return await handler(event, data)
+        finally:
+            if root is not None:
+                self.exporter.export(root)
+
+
+class ApiTracingMiddleware(BaseRequestMiddleware):
+    """
+    Записывает запросы к Bot API спанами api.<метод> текущей трассы.
+    
+    Регистрируется на сессии бота: bot.session.middleware(...).
+    """
+    
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any]
+    ) -> Response[Any]:
+        with span(f"api.{method.__api_method__}"):
+            return await make_request(bot, method)
+
+
+class LogContextMiddleware(BaseMiddleware):
+    """
+    Добавляет в контекст логов поля обновления (update_id, update_type,
+    user_id) - они попадают во все записи, сделанные при его обработке.
+    
+    Регистрируется как outer middleware на dp.update первым.
+    """
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        fields: Dict[str, Any] = {'user_id': user.id if user else None}
+        if isinstance(event, Update):
+            fields['update_id'] = event.update_id
+            fields['update_type'] = event.event_type
+        token = bind_log_context(**fields)
+        try:
+            return await handler(event, data)
+        finally:
+            reset_log_context(token)
@@ -0,0 +1,124 @@
+"""
+Profiling - профилирование работающего бота по запросу.
+
+Этот модуль реализует:
+- profile_cpu - cProfile всего event loop в течение N секунд
+- profile_memory - разница снимков tracemalloc за N секунд
+
+Пока профилирование не запущено, профилировщик не установлен и
+tracemalloc не включён - накладных расходов нет. Одновременно
+выполняется только одно профилирование.
+"""
+import io
+import time
+import pstats
+import asyncio
+import cProfile
+import tracemalloc
+
+# Ограничения длительности профилирования (секунды)
+PROFILE_MIN_SECONDS = 1
+PROFILE_MAX_SECONDS = 300
+PROFILE_DEFAULT_SECONDS = 30
+
+# Сколько строк отчёта выводить
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_ALLOCATIONS = 30
+
+# Глубина стека для tracemalloc
+TRACEMALLOC_FRAMES = 10
+
+_busy = asyncio.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """Профилирование уже выполняется."""
+
+
+def clamp_seconds(seconds: int) -> int:
+    """Ограничить длительность профилирования допустимым диапазоном."""
+    return max(PROFILE_MIN_SECONDS, min(PROFILE_MAX_SECONDS, seconds))
+
+
+async def profile_cpu(seconds: int, top: int = PROFILE_TOP_FUNCTIONS) -> str:
+    """
+    Профилировать event loop в течение заданного времени.
+    
+    Профилируется всё, что выполняется в потоке event loop за это
+    время: обработчики всех пользователей, middleware, aiogram.
+    
+    Args:
+        seconds: Длительность профилирования
+        top: Количество функций в отчёте
+    
+    Returns:
+        Отчёт: функции по суммарному (cumulative) времени
+    
+    Raises:
+        ProfilerBusyError: Если профилирование уже выполняется
+    """
+    if _busy.locked():
+        raise ProfilerBusyError("Profiling is already running")
+    async with _busy:
+        profiler = cProfile.Profile()
+        started = time.monotonic()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        elapsed = time.monotonic() - started
+    
+    out = io.StringIO()
+    out.write(f"CPU profile, {elapsed:.1f} s\n\n")
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+    return out.getvalue()
+
+
+async def profile_memory(seconds: int, top: int = PROFILE_TOP_ALLOCATIONS) -> str:
+    """
+    Сравнить снимки памяти tracemalloc в начале и конце интервала.
+    
+    Если tracemalloc уже был включён (например, PYTHONTRACEMALLOC),
+    он не выключается после замера.
+    
+    Args:
+        seconds: Длительность интервала
+        top: Количество мест выделения памяти в отчёте
+    
+    Returns:
+        Отчёт: места выделения памяти с наибольшим приростом
+    
+    Raises:
+        ProfilerBusyError: Если профилирование уже выполняется
+    """
+    if _busy.locked():
+        raise ProfilerBusyError("Profiling is already running")
+    async with _busy:
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        try:
+            before = tracemalloc.take_snapshot()
+            await asyncio.sleep(seconds)
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started_here:
+                tracemalloc.stop()
+    
+    ignore = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    )
+    diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+    
+    lines = [
+        f"Memory diff, {seconds} s",
+        f"Traced: {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB",
+        "",
+        f"Top {top} allocation sites by growth:",
+    ]
+    lines.extend(str(stat) for stat in diff[:top])
+    return '\n'.join(lines) + '\n'
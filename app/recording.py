@@ -0,0 +1,245 @@
+"""
+Update recording - запись входящих обновлений для воспроизведения.
+
+Этот модуль реализует:
+- anonymize_update - удаление персональных данных из обновления
+- UpdateRecorder - запись обновлений в сжатый JSON lines (.jsonl.gz)
+- UpdateRecorderMiddleware - запись каждого обновления перед обработкой
+
+Запись включается переменной UPDATE_RECORD_PATH. Записанный трафик
+воспроизводится benchmarks/replay.py.
+
+Анонимизация:
+- id пользователей и чатов заменяются хэшем с солью (один пользователь -
+  один и тот же id в пределах записи, знак id сохраняется)
+- имена, username, телефоны и email в профилях и контактах (contact)
+  удаляются или заменяются
+- email и номера телефонов в текстах и подписях заменяются заглушками
+  того же формата (валидация формы проходит так же)
+- текст, введённый на шаге имени, заменяется целиком
+- текст и подпись сообщений бота (from.is_bot) и всех сообщений внутри
+  callback_query заменяются целиком: preview заявки и запрос
+  confirm_old_data содержат имя, телефон и email пользователя
+- file_id заменяются хэшем (по ним нельзя скачать файлы пользователя)
+
+Имена внутри свободного текста пользователя (описание проекта) не
+распознаются.
+"""
+import re
+import gzip
+import json
+import time
+import hashlib
+import logging
+import secrets
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, TextIO
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+
+from app.states import LeadForm
+
+logger = logging.getLogger(__name__)
+
+# Через сколько записей закрывать gzip-блок: при аварийном завершении
+# теряются только записи последнего блока
+RECORD_FLUSH_EVERY = 200
+
+# Поля обновления с объектами пользователя или чата
+_IDENTITY_KEYS = frozenset({'from', 'user', 'chat', 'sender_chat', 'forward_from', 'forward_from_chat', 'contact'})
+
+# Персональные поля профиля и контакта, которые удаляются
+_DROPPED_FIELDS = frozenset({'last_name', 'username', 'bio', 'vcard'})
+
+_FILE_ID_KEYS = frozenset({'file_id', 'file_unique_id'})
+
+# Поля сообщения бота, которые заменяются или удаляются целиком
+_BOT_TEXT_FIELDS = ('text', 'caption')
+_BOT_ENTITY_FIELDS = ('entities', 'caption_entities')
+
+_BOT_TEXT_PLACEHOLDER = '[bot message]'
+
+_EMAIL_RE = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}')
+_PHONE_RE = re.compile(r'\+?\d[\d\s().-]{8,}\d')
+_DIGIT_RE = re.compile(r'\d')
+
+_NAME_STATE = LeadForm.waiting_for_name.state
+
+
+class _Anonymizer:
+    def __init__(self, salt: str) -> None:
+        self.salt = salt.encode('utf-8')
+    
+    def digest(self, value: Any) -> str:
+        return hashlib.blake2b(str(value).encode('utf-8'), key=self.salt[:64], digest_size=6).hexdigest()
+    
+    def user_id(self, value: int) -> int:
+        hashed = int(self.digest(abs(value)), 16)
+        return -hashed if value < 0 else hashed
+    
+    def text(self, value: str) -> str:
+        value = _EMAIL_RE.sub(lambda m: f"user{self.digest(m.group())}@example.com", value)
+        return _PHONE_RE.sub(lambda m: _DIGIT_RE.sub('0', m.group()), value)
+    
+    def walk(self, value: Any, key: Optional[str] = None) -> Any:
+        if isinstance(value, dict):
+            result = {}
+            for name, item in value.items():
+                if name in _DROPPED_FIELDS:
+                    continue
+                result[name] = self.walk(item, name)
+            if key in _IDENTITY_KEYS:
+                if isinstance(result.get('id'), int):
+                    result['id'] = self.user_id(result['id'])
+                if 'first_name' in result:
+                    result['first_name'] = 'User'
+            sender = result.get('from')
+            if isinstance(sender, dict) and sender.get('is_bot'):
+                _scrub_message(result)
+            return result
+        if isinstance(value, list):
+            return [self.walk(item, key) for item in value]
+        if isinstance(value, str):
+            if key in _FILE_ID_KEYS:
+                return f"anon-{self.digest(value)}"
+            if key == 'phone_number':
+                return _DIGIT_RE.sub('0', value)
+            if key in ('text', 'caption', 'query'):
+                return self.text(value)
+        if key == 'user_id' and isinstance(value, int):
+            return self.user_id(value)
+        return value
+
+
+def _scrub_message(message: Dict[str, Any]) -> None:
+    """
+    Заменить текст и подпись сообщения целиком (на месте).
+    
+    Разметка (entities) удаляется: её смещения относятся к исходному тексту.
+    """
+    for name in _BOT_TEXT_FIELDS:
+        if name in message:
+            message[name] = _BOT_TEXT_PLACEHOLDER
+    for name in _BOT_ENTITY_FIELDS:
+        message.pop(name, None)
+
+
+def anonymize_update(update: Dict[str, Any], salt: str, state: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Копия обновления без персональных данных.
+    
+    Args:
+        update: Обновление в формате Bot API
+        salt: Соль хэша id (одинаковая соль - одинаковые id)
+        state: Состояние FSM пользователя на момент обновления
+    
+    Returns:
+        Анонимизированное обновление
+    """
+    anonymizer = _Anonymizer(salt)
+    result = anonymizer.walk(update)
+    message = result.get('message')
+    if state == _NAME_STATE and isinstance(message, dict) and 'text' in message:
+        message['text'] = f"User {anonymizer.digest(update['message']['text'])}"
+    # Сообщение с кнопкой - сообщение бота, даже если from не передан
+    callback = result.get('callback_query')
+    if isinstance(callback, dict) and isinstance(callback.get('message'), dict):
+        _scrub_message(callback['message'])
+    return result
+
+
+class UpdateRecorder:
+    """
+    Пишет анонимизированные обновления в .jsonl.gz.
+    
+    Строка файла: {"ts": время получения, "state": состояние FSM, "update": {...}}.
+    Файл открывается при первой записи и дописывается (новым gzip-блоком).
+    """
+    
+    def __init__(self, path: str, salt: str = '') -> None:
+        """
+        Args:
+            path: Файл записи
+            salt: Соль хэша id (пусто - случайная на процесс)
+        """
+        self.path = Path(path)
+        self.salt = salt or secrets.token_hex(16)
+        self.recorded = 0
+        self._file: Optional[TextIO] = None
+        self._pending = 0
+    
+    def record(self, update: Dict[str, Any], state: Optional[str] = None) -> None:
+        """
+        Записать обновление.
+        
+        Args:
+            update: Обновление в формате Bot API
+            state: Состояние FSM пользователя
+        """
+        line = json.dumps(
+            {'ts': time.time(), 'state': state, 'update': anonymize_update(update, self.salt, state)},
+            ensure_ascii=False
+        )
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        self._file.write(line + '\n')
+        self.recorded += 1
+        self._pending += 1
+        if self._pending >= RECORD_FLUSH_EVERY:
+            self.close()
+    
+    def close(self) -> None:
+        """Закрыть текущий gzip-блок (следующая запись откроет новый)."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._pending = 0
+
+
+def shard_record_path(path: str, mode: str) -> str:
+    """
+    Отдельный файл записи для воркера: updates.jsonl.gz -> updates.shard-0.jsonl.gz.
+    
+    Args:
+        path: Файл записи из конфигурации
+        mode: Режим диспетчера ('polling', 'webhook', 'shard-N')
+    
+    Returns:
+        Путь к файлу записи процесса
+    """
+    if not mode.startswith('shard-'):
+        return path
+    p = Path(path)
+    stem, _, suffixes = p.name.partition('.')
+    return str(p.with_name(f"{stem}.{mode}{'.' + suffixes if suffixes else ''}"))
+
+
+class UpdateRecorderMiddleware(BaseMiddleware):
+    """
+    Записывает каждое обновление перед обработкой.
+    
+    Регистрируется как outer middleware на dp.update после
+    UserLockMiddleware: состояние FSM уже перечитано, а порядок
+    записей пользователя совпадает с порядком обработки.
+    """
+    
+    def __init__(self, recorder: UpdateRecorder) -> None:
+        self.recorder = recorder
+    
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Update):
+            try:
+                self.recorder.record(
+                    event.model_dump(mode='json', by_alias=True, exclude_none=True, exclude_unset=True),
+                    data.get('raw_state')
+                )
+            except Exception as e:
+                logger.warning("Failed to record update %s: %s", event.update_id, e)
+        return await handler(event, data)
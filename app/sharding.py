@@ -0,0 +1,337 @@
+"""
+Sharding - обработка обновлений несколькими процессами.
+
+Схема:
+- Фронтальный процесс получает обновления (polling или webhook)
+  и не обрабатывает их сам, а раскладывает по очередям воркеров
+  по from_user.id (shard = user_id % WORKERS).
+- Каждый воркер - отдельный процесс со своим диспетчером и ботом,
+  обрабатывает только своих пользователей.
+
+Все обновления пользователя попадают в один воркер и обрабатываются
+там по очереди, поэтому порядок сохраняется, а состояние FSM в памяти
+принадлежит воркеру (partition-owned). Для общего состояния между
+процессами задайте FSM_STORAGE_URL (Redis или совместимый сервер).
+Язык пользователя хранится в SQLite и общий для всех процессов.
+
+Очереди - multiprocessing.Queue (внешний брокер не нужен).
+"""
+import hmac
+import time
+import queue
+import signal
+import asyncio
+import logging
+import multiprocessing
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from aiohttp import web
+from aiogram import Bot
+
+logger = logging.getLogger(__name__)
+
+# Сигнал воркеру завершиться
+_STOP = None
+
+# Поля обновления, в которых Telegram указывает пользователя
+_USER_FIELDS = ('from', 'user')
+
+
+def update_user_id(update: Dict[str, Any]) -> int:
+    """
+    Пользователь, к которому относится обновление.
+    
+    Берётся из поля from/user объекта обновления (message,
+    callback_query, ...), при его отсутствии - id чата.
+    
+    Args:
+        update: Обновление в формате Bot API (dict)
+    
+    Returns:
+        id пользователя (или чата), 0 если определить не удалось
+    """
+    for name, payload in update.items():
+        if name == 'update_id' or not isinstance(payload, dict):
+            continue
+        for field in _USER_FIELDS:
+            user = payload.get(field)
+            if isinstance(user, dict) and 'id' in user:
+                return user['id']
+        chat = payload.get('chat')
+        if isinstance(chat, dict) and 'id' in chat:
+            return chat['id']
+    return 0
+
+
+def shard_for(update: Dict[str, Any], workers: int) -> int:
+    """
+    Номер воркера для обновления: user_id % workers.
+    
+    Args:
+        update: Обновление в формате Bot API (dict)
+        workers: Количество воркеров
+    
+    Returns:
+        Номер воркера от 0 до workers - 1
+    """
+    return update_user_id(update) % workers
+
+
+class _UserSequencer:
+    """
+    Запускает обработку обновлений параллельно, но обновления одного
+    пользователя - строго в порядке поступления.
+    
+    Одновременно в обработке не больше limit обновлений: место
+    занимается acquire() до получения обновления из очереди и
+    освобождается по завершении его обработки.
+    """
+    
+    def __init__(self, limit: int) -> None:
+        self._tails: Dict[int, asyncio.Task] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(limit)
+    
+    async def acquire(self) -> None:
+        await self._slots.acquire()
+    
+    def release(self) -> None:
+        self._slots.release()
+    
+    def submit(self, key: int, coro: Any) -> None:
+        previous = self._tails.get(key)
+        task = asyncio.create_task(self._run_after(previous, coro))
+        self._tails[key] = task
+        self._tasks.add(task)
+        task.add_done_callback(lambda t: self._done(key, t))
+    
+    @staticmethod
+    async def _run_after(previous: Optional[asyncio.Task], coro: Any) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        await coro
+    
+    def _done(self, key: int, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._slots.release()
+        if self._tails.get(key) is task:
+            del self._tails[key]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("Update processing failed", exc_info=task.exception())
+    
+    async def drain(self) -> None:
+        if self._tasks:
+            await asyncio.wait(list(self._tasks))
+
+
+async def _run_worker(index: int, updates: multiprocessing.Queue, token: str, max_in_flight: int) -> None:
+    # Импорт здесь: модули обработчиков загружаются только в воркерах
+    from app import metrics
+    from app.bot import create_bot, create_dispatcher
+    from app.config import DB_PATH, HEALTH_MAX_LOOP_LAG_MS, METRICS_HOST, METRICS_PORT
+    from app.health import HealthMonitor, health_routes
+    
+    bot = create_bot(token)
+    dp = create_dispatcher(f"shard-{index}")
+    sequencer = _UserSequencer(max_in_flight)
+    loop = asyncio.get_running_loop()
+    
+    # Воркер не опрашивает Telegram - возраст getUpdates не проверяется
+    health = HealthMonitor(
+        DB_PATH,
+        polling=False,
+        max_loop_lag_ms=HEALTH_MAX_LOOP_LAG_MS,
+        max_poll_age=0,
+        last_update=lambda: dp['update_stats'].last_update_at
+    )
+    health.start()
+    
+    metrics_runner = None
+    if METRICS_PORT:
+        metrics_runner = await metrics.start_metrics_server(
+            METRICS_HOST, METRICS_PORT + 1 + index, routes=health_routes(health)
+        )
+    
+    await dp.emit_startup(bot=bot, **dp.workflow_data)
+    logger.info("Worker %s started", index)
+    try:
+        while True:
+            # Пока все места заняты, очередь не читается: она заполняется,
+            # и ShardRouter.dispatch ждёт (обратное давление на приём)
+            await sequencer.acquire()
+            item = await loop.run_in_executor(None, updates.get)
+            if item is _STOP:
+                sequencer.release()
+                break
+            received_at, update = item
+            sequencer.submit(
+                update_user_id(update),
+                dp.feed_raw_update(bot, update, received_at=received_at)
+            )
+        await sequencer.drain()
+    finally:
+        await dp.emit_shutdown(bot=bot, **dp.workflow_data)
+        await dp.storage.close()
+        await bot.session.close()
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await health.stop()
+        logger.info("Worker %s stopped", index)
+
+
+def _worker_main(index: int, updates: multiprocessing.Queue, token: str, max_in_flight: int) -> None:
+    """Точка входа процесса воркера."""
+    # Остановку воркера выполняет фронтальный процесс через очередь
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from app.config import LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE
+    from app.logging_setup import setup_logging
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_DEBUG_SAMPLE_RATE, static_fields={'worker': index})
+    asyncio.run(_run_worker(index, updates, token, max_in_flight))
+
+
+class ShardRouter:
+    """
+    Фронтальная часть: процессы воркеров и распределение обновлений.
+    """
+    
+    def __init__(self, workers: int, queue_size: int, token: str, max_in_flight: int) -> None:
+        """
+        Args:
+            workers: Количество воркеров
+            queue_size: Ёмкость очереди каждого воркера
+            token: Токен бота
+            max_in_flight: Обновлений в обработке одновременно в каждом воркере
+        """
+        context = multiprocessing.get_context('spawn')
+        self.workers = workers
+        self.queues: List[multiprocessing.Queue] = [context.Queue(queue_size) for _ in range(workers)]
+        self.processes = [
+            context.Process(target=_worker_main, args=(i, q, token, max_in_flight), name=f"worker-{i}", daemon=True)
+            for i, q in enumerate(self.queues)
+        ]
+        # time.monotonic() последнего переданного воркеру обновления
+        self.last_dispatch_at: Optional[float] = None
+    
+    def start(self) -> None:
+        """Запустить процессы воркеров."""
+        for process in self.processes:
+            process.start()
+        logger.info("Started %s workers", self.workers)
+    
+    async def dispatch(self, update: Dict[str, Any]) -> None:
+        """
+        Передать обновление воркеру его пользователя.
+        
+        Если очередь воркера заполнена (воркер уже обрабатывает
+        max_in_flight обновлений и не читает очередь), ожидает
+        освобождения места - обратное давление на приём обновлений.
+        """
+        target = self.queues[shard_for(update, self.workers)]
+        self.last_dispatch_at = time.monotonic()
+        item: Tuple[float, Dict[str, Any]] = (self.last_dispatch_at, update)
+        try:
+            target.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, target.put, item)
+    
+    def queue_depths(self) -> Dict[Tuple[str, ...], int]:
+        """Количество обновлений в очереди каждого воркера (для метрик)."""
+        depths = {}
+        for index, q in enumerate(self.queues):
+            try:
+                depths[(str(index),)] = q.qsize()
+            except NotImplementedError:
+                # qsize() недоступен на macOS
+                pass
+        return depths
+    
+    def stop(self, timeout: float = 30.0) -> None:
+        """Дождаться обработки очередей и остановить воркеры."""
+        for q in self.queues:
+            q.put(_STOP)
+        for process in self.processes:
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("%s did not stop in %.0fs, terminating", process.name, timeout)
+                process.terminate()
+
+
+async def receive_polling(bot: Bot, shards: ShardRouter, allowed_updates: Optional[List[str]] = None) -> None:
+    """
+    Получать обновления long polling и раздавать воркерам.
+    
+    Args:
+        bot: Бот фронтального процесса
+        shards: Распределитель обновлений
+        allowed_updates: Типы обновлений
+    """
+    await bot.delete_webhook()
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+        except Exception as e:
+            logger.error("Failed to fetch updates: %s", e)
+            await asyncio.sleep(1)
+            continue
+        for update in updates:
+            await shards.dispatch(update.model_dump(mode='json', by_alias=True, exclude_none=True))
+            offset = update.update_id + 1
+
+
+def create_receiver_app(shards: ShardRouter, path: str, secret: str = '') -> web.Application:
+    """
+    aiohttp-приложение, принимающее webhook и раздающее обновления воркерам.
+    
+    Args:
+        shards: Распределитель обновлений
+        path: Путь обработчика обновлений
+        secret: Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    
+    Returns:
+        aiohttp-приложение
+    """
+    async def handle(request: web.Request) -> web.Response:
+        token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+        if secret and not hmac.compare_digest(token, secret):
+            return web.Response(status=401, text='Unauthorized')
+        await shards.dispatch(await request.json())
+        return web.json_response({})
+    
+    app = web.Application()
+    app.router.add_post(path, handle)
+    return app
+
+
+async def receive_webhook(
+    bot: Bot,
+    shards: ShardRouter,
+    host: str,
+    port: int,
+    path: str,
+    base_url: str = '',
+    secret: str = '',
+    allowed_updates: Optional[List[str]] = None
+) -> None:
+    """
+    Принимать webhook и раздавать обновления воркерам.
+    
+    Параметры как у app.webhook.run_webhook.
+    """
+    runner = web.AppRunner(create_receiver_app(shards, path, secret))
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info("Webhook receiver listening on %s:%s%s", host, port, path)
+        if base_url:
+            await bot.set_webhook(
+                url=f"{base_url}{path}",
+                secret_token=secret or None,
+                allowed_updates=allowed_updates
+            )
+            logger.info("Webhook registered: %s%s", base_url, path)
+        else:
+            logger.warning("WEBHOOK_BASE_URL is not set - webhook is not registered with Telegram")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
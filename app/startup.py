@@ -0,0 +1,217 @@
+"""
+Startup profiling - время холодного старта бота по модулям и шагам.
+
+Этот модуль реализует:
+- profile_imports - время импорта app.bot по модулям (-X importtime
+  в отдельном чистом интерпретаторе)
+- profile_init - время шагов инициализации и компонентов, которые
+  загружаются при первом использовании
+- profile_startup - отчёт для python -m app.bot --profile-startup
+
+Модуль импортирует только стандартную библиотеку: отчёт строится
+и тогда, когда app.config не загружается (не задано окружение) -
+в нём видны импорты до ошибки и сама ошибка.
+"""
+import os
+import sys
+import time
+import shutil
+import asyncio
+import tempfile
+import contextlib
+import subprocess
+from collections import defaultdict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+# Профилируемый модуль
+STARTUP_MODULE = 'app.bot'
+
+# Сколько модулей показывать в списке самых медленных импортов
+STARTUP_TOP_IMPORTS = 20
+
+# Сколько пакетов показывать в сводке по пакетам
+STARTUP_TOP_PACKAGES = 10
+
+_IMPORTTIME_PREFIX = 'import time:'
+
+
+class ImportTiming(NamedTuple):
+    """Время импорта модуля (микросекунды), как в -X importtime."""
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class StepTiming(NamedTuple):
+    """Время шага инициализации; error - текст ошибки, если шаг упал."""
+    name: str
+    seconds: float
+    error: Optional[str] = None
+
+
+def parse_importtime(stderr: str) -> Tuple[List[ImportTiming], List[str]]:
+    """
+    Разобрать вывод -X importtime.
+    
+    Args:
+        stderr: stderr интерпретатора
+    
+    Returns:
+        (время импорта по модулям в порядке завершения, остальные строки stderr)
+    """
+    timings = []
+    other = []
+    for line in stderr.splitlines():
+        if not line.startswith(_IMPORTTIME_PREFIX):
+            other.append(line)
+            continue
+        fields = line[len(_IMPORTTIME_PREFIX):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # заголовок
+        timings.append(ImportTiming(fields[2].strip(), int(fields[0]), int(fields[1])))
+    return timings, other
+
+
+def profile_imports(module: str = STARTUP_MODULE) -> Tuple[List[ImportTiming], float, Optional[str]]:
+    """
+    Импортировать модуль в новом интерпретаторе с -X importtime.
+    
+    Отдельный процесс нужен, чтобы ни один модуль не был загружен
+    заранее - как при запуске бота.
+    
+    Args:
+        module: Импортируемый модуль
+    
+    Returns:
+        (время импорта по модулям, время процесса в секундах,
+         ошибка импорта или None)
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True
+    )
+    elapsed = time.perf_counter() - started
+    timings, other = parse_importtime(result.stderr)
+    error = None
+    if result.returncode != 0:
+        error = next((line for line in reversed(other) if line.strip()), f"exit code {result.returncode}")
+    return timings, elapsed, error
+
+
+def _timed(name: str, step: Callable[[], object]) -> StepTiming:
+    started = time.perf_counter()
+    try:
+        step()
+    except Exception as e:
+        return StepTiming(name, time.perf_counter() - started, f"{type(e).__name__}: {e}")
+    return StepTiming(name, time.perf_counter() - started)
+
+
+def profile_init() -> Tuple[List[StepTiming], List[StepTiming]]:
+    """
+    Выполнить инициализацию бота без запросов к Telegram.
+    
+    Шаги повторяют main(): импорт, init_db, создание бота и диспетчера.
+    init_db выполняется на временной копии DB_PATH (или на новой БД,
+    если файла нет) - диагностика не создаёт и не мигрирует рабочую БД.
+    Отдельно замеряется загрузка компонентов, отложенных до первого
+    использования.
+    
+    Returns:
+        (шаги инициализации, отложенные компоненты)
+    """
+    steps = [_timed(f'import {STARTUP_MODULE}', lambda: __import__(STARTUP_MODULE))]
+    if steps[0].error:
+        return steps, []
+    
+    from app import bot as bot_module
+    from app.config import BOT_MODE, DB_PATH
+    
+    created = {}
+    with tempfile.TemporaryDirectory(prefix='profile-startup-') as tmp:
+        db_copy = os.path.join(tmp, 'leads.db')
+        if os.path.exists(DB_PATH):
+            shutil.copyfile(DB_PATH, db_copy)
+        with contextlib.redirect_stdout(None):
+            steps.append(_timed('init_db (copy of DB_PATH)', lambda: bot_module.init_db(db_copy)))
+    steps.append(_timed('create_bot', lambda: created.setdefault('bot', bot_module.create_bot())))
+    steps.append(_timed('create_dispatcher', lambda: bot_module.create_dispatcher(BOT_MODE)))
+    if 'bot' in created:
+        asyncio.run(created['bot'].session.close())
+    
+    def load_locales() -> None:
+        from app.locales import SUPPORTED_LANGUAGES, get_catalog
+        for lang in SUPPORTED_LANGUAGES:
+            get_catalog(lang)
+    
+    def load_enhancer() -> None:
+        from app.ai_enhancer import get_vocabulary
+        get_vocabulary()
+    
+    deferred = [
+        _timed('locale catalogs', load_locales),
+        _timed('ai_enhancer + vocabulary', load_enhancer),
+    ]
+    return steps, deferred
+
+
+def format_report(
+    imports: List[ImportTiming],
+    import_seconds: float,
+    import_error: Optional[str],
+    steps: List[StepTiming],
+    deferred: List[StepTiming]
+) -> str:
+    """Текстовый отчёт о времени старта."""
+    lines = [f"Startup profile: {STARTUP_MODULE}, Python {sys.version.split()[0]}", ""]
+    
+    total = next((t for t in reversed(imports) if t.module == STARTUP_MODULE), None)
+    imported = f"{total.cumulative_us / 1e3:.1f} ms" if total else "failed"
+    lines.append(f"Imports (fresh interpreter): {imported}, process {import_seconds * 1e3:.1f} ms")
+    if import_error:
+        lines.append(f"  Import error: {import_error}")
+    
+    lines += ["", f"Slowest imports (top {STARTUP_TOP_IMPORTS} by cumulative time):"]
+    lines.append(f"  {'cumulative, ms':>14} {'self, ms':>10}  module")
+    for t in sorted(imports, key=lambda t: t.cumulative_us, reverse=True)[:STARTUP_TOP_IMPORTS]:
+        lines.append(f"  {t.cumulative_us / 1e3:>14.1f} {t.self_us / 1e3:>10.1f}  {t.module}")
+    
+    packages = defaultdict(int)
+    for t in imports:
+        packages[t.module.partition('.')[0]] += t.self_us
+    lines += ["", f"By top-level package (self time, top {STARTUP_TOP_PACKAGES}):"]
+    for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:STARTUP_TOP_PACKAGES]:
+        lines.append(f"  {us / 1e3:>10.1f} ms  {name}")
+    
+    lines += ["", "Application modules:"]
+    for t in imports:
+        if t.module == 'app' or t.module.startswith('app.'):
+            lines.append(f"  {t.cumulative_us / 1e3:>10.1f} ms  {t.module}")
+    
+    for title, timings in (("Initialization:", steps), ("Deferred until first use:", deferred)):
+        if not timings:
+            continue
+        lines += ["", title]
+        for step in timings:
+            status = f"  ({step.error})" if step.error else ""
+            lines.append(f"  {step.seconds * 1e3:>10.1f} ms  {step.name}{status}")
+    return '\n'.join(lines) + '\n'
+
+
+def profile_startup() -> int:
+    """
+    Режим python -m app.bot --profile-startup: вывести отчёт и выйти.
+    
+    Returns:
+        Код выхода: 0 - импорт и инициализация прошли, 1 - была ошибка
+    """
+    imports, import_seconds, import_error = profile_imports()
+    steps: List[StepTiming] = []
+    deferred: List[StepTiming] = []
+    if import_error is None:
+        steps, deferred = profile_init()
+    print(format_report(imports, import_seconds, import_error, steps, deferred), end='')
+    failed = import_error or any(step.error for step in steps + deferred)
+    return 1 if failed else 0
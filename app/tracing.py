@@ -0,0 +1,221 @@
+"""
+Tracing - спаны обработки обновлений.
+
+Трасса открывается на каждое обновление (TracingMiddleware), вложенные
+спаны - на вызовы БД, этапы AI-обработки и запросы к Bot API. Если
+обработка заняла дольше порога, дерево спанов пишется в лог и,
+если задан файл, добавляется в него строкой JSON.
+
+Текущий спан хранится в contextvars: задачи, созданные внутри
+обработчика, наследуют его. Вне трассы span() ничего не делает.
+
+Запись в файл выполняет отдельный поток (как QueueListener логов):
+медленная трасса не добавляет к обработке ещё и блокирующий ввод-вывод.
+"""
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[Optional['Span']] = ContextVar('current_span', default=None)
+
+
+class Span:
+    """Замер одного участка обработки."""
+    
+    __slots__ = ('name', 'attrs', 'started', 'finished', 'children', 'error')
+    
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        self.name = name
+        self.attrs = attrs or {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.children: List['Span'] = []
+        self.error: Optional[str] = None
+    
+    def finish(self) -> None:
+        """Зафиксировать окончание спана."""
+        if self.finished is None:
+            self.finished = time.perf_counter()
+    
+    @property
+    def duration_ms(self) -> float:
+        """Длительность спана (до текущего момента, если не закончен)."""
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return (end - self.started) * 1000
+    
+    def to_dict(self, origin: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Дерево спанов в виде словаря.
+        
+        Args:
+            origin: Начало корневого спана (для смещений детей)
+        
+        Returns:
+            Словарь с именем, смещением, длительностью, атрибутами и детьми
+        """
+        origin = self.started if origin is None else origin
+        result: Dict[str, Any] = {
+            'name': self.name,
+            'offset_ms': round((self.started - origin) * 1000, 3),
+            'duration_ms': round(self.duration_ms, 3),
+        }
+        if self.attrs:
+            result['attrs'] = self.attrs
+        if self.error:
+            result['error'] = self.error
+        if self.children:
+            result['children'] = [child.to_dict(origin) for child in self.children]
+        return result
+    
+    def format_tree(self, indent: int = 0) -> str:
+        """Дерево спанов в виде текста для лога."""
+        line = f"{'  ' * indent}{self.name} {self.duration_ms:.1f} ms"
+        if self.error:
+            line += f" [{self.error}]"
+        lines = [line]
+        lines.extend(child.format_tree(indent + 1) for child in self.children)
+        return '\n'.join(lines)
+
+
+def current_span() -> Optional[Span]:
+    """Текущий спан (None вне трассы)."""
+    return _current.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """
+    Открыть вложенный спан в текущей трассе.
+    
+    Вне трассы ничего не замеряет и отдаёт None.
+    
+    Args:
+        name: Имя спана ("db.save_lead", "api.sendMessage", ...)
+        **attrs: Атрибуты спана
+    """
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    
+    child = Span(name, attrs)
+    parent.children.append(child)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.error = type(e).__name__
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def trace(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    Открыть корневой спан трассы.
+    
+    Args:
+        name: Имя трассы
+        **attrs: Атрибуты трассы
+    """
+    root = Span(name, attrs)
+    token = _current.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.error = type(e).__name__
+        raise
+    finally:
+        root.finish()
+        _current.reset(token)
+
+
+class SlowTraceExporter:
+    """
+    Пишет трассы дольше порога в лог и в файл JSON lines.
+    
+    Строка JSON формируется в вызывающем потоке (снимок трассы), а
+    дописывается в файл потоком trace-export, который запускается
+    при первой выгрузке и останавливается close() или при выходе.
+    """
+    
+    def __init__(self, threshold_ms: float, path: str = '') -> None:
+        """
+        Args:
+            threshold_ms: Порог длительности трассы (0 - выгружать все)
+            path: Файл для строк JSON (пусто - только лог)
+        """
+        self.threshold_ms = threshold_ms
+        self.path = path
+        self._lock = threading.Lock()
+        self._lines: 'queue.SimpleQueue[Optional[str]]' = queue.SimpleQueue()
+        self._writer: Optional[threading.Thread] = None
+        if path:
+            atexit.register(self.close)
+    
+    def export(self, root: Span) -> bool:
+        """
+        Выгрузить трассу, если она медленная.
+        
+        Args:
+            root: Законченный корневой спан
+        
+        Returns:
+            True если трасса выгружена
+        """
+        if root.duration_ms < self.threshold_ms:
+            return False
+        
+        logger.warning("Slow update (%.1f ms):\n%s", root.duration_ms, root.format_tree())
+        if self.path:
+            line = json.dumps(
+                {'timestamp': time.time(), **root.to_dict()},
+                ensure_ascii=False,
+                default=str
+            )
+            self._start_writer()
+            self._lines.put(line)
+        return True
+    
+    def _start_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_lines, name='trace-export', daemon=True)
+                self._writer.start()
+    
+    def _write_lines(self) -> None:
+        """Поток записи: дописывает накопившиеся строки одним открытием файла."""
+        while True:
+            lines = [self._lines.get()]
+            while lines[-1] is not None:
+                try:
+                    lines.append(self._lines.get_nowait())
+                except queue.Empty:
+                    break
+            batch = [line for line in lines if line is not None]
+            if batch:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(''.join(line + '\n' for line in batch))
+                except OSError as e:
+                    logger.error("Failed to write %s traces to %s: %s", len(batch), self.path, e)
+            if lines[-1] is None:
+                return
+    
+    def close(self, timeout: float = 5.0) -> None:
+        """Дописать оставшиеся трассы и остановить поток записи."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._lines.put(None)
+            writer.join(timeout)
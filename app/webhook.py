@@ -0,0 +1,96 @@
+"""
+Webhook transport - приём обновлений через встроенный aiohttp-сервер.
+
+Используются те же диспетчер и роутеры, что и в режиме polling.
+Telegram присылает обновления POST-запросами на WEBHOOK_PATH; запросы
+без правильного заголовка X-Telegram-Bot-Api-Secret-Token отклоняются
+(если задан WEBHOOK_SECRET).
+
+Для локальной проверки WEBHOOK_BASE_URL можно не задавать - тогда
+webhook не регистрируется в Telegram, а обновления можно отправлять
+на сервер вручную:
+
+    curl -X POST localhost:8080/webhook \\
+         -H 'X-Telegram-Bot-Api-Secret-Token: <secret>' \\
+         -H 'Content-Type: application/json' -d @update.json
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+
+def create_webhook_app(
+    dp: Dispatcher,
+    bot: Bot,
+    path: str,
+    secret: Optional[str] = None
+) -> web.Application:
+    """
+    Создать aiohttp-приложение, передающее обновления в диспетчер.
+    
+    Запуск и остановка приложения вызывают startup/shutdown диспетчера.
+    
+    Args:
+        dp: Диспетчер
+        bot: Бот
+        path: Путь, на который Telegram присылает обновления
+        secret: Секрет для проверки заголовка (None - без проверки)
+    
+    Returns:
+        aiohttp-приложение
+    """
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret or None).register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    host: str,
+    port: int,
+    path: str,
+    base_url: str = '',
+    secret: str = ''
+) -> None:
+    """
+    Запустить HTTP-сервер и (если задан base_url) зарегистрировать webhook.
+    
+    Работает до отмены задачи.
+    
+    Args:
+        dp: Диспетчер
+        bot: Бот
+        host: Адрес сервера
+        port: Порт сервера
+        path: Путь обработчика обновлений
+        base_url: Публичный HTTPS-адрес (пусто - не регистрировать webhook)
+        secret: Секрет для заголовка X-Telegram-Bot-Api-Secret-Token
+    """
+    runner = web.AppRunner(create_webhook_app(dp, bot, path, secret))
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        logger.info("Webhook server listening on %s:%s%s", host, port, path)
+        
+        if base_url:
+            await bot.set_webhook(
+                url=f"{base_url}{path}",
+                secret_token=secret or None,
+                allowed_updates=dp.resolve_used_update_types()
+            )
+            logger.info("Webhook registered: %s%s", base_url, path)
+        else:
+            logger.warning("WEBHOOK_BASE_URL is not set - webhook is not registered with Telegram")
+        
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
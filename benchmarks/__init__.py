@@ -0,0 +1,3 @@
+"""
+Пакет benchmarks - воспроизводимые замеры производительности модулей бота
+"""
@@ -0,0 +1,132 @@
+"""
+Бенчмарк классификатора типа проекта (app.ai_enhancer).
+
+Сравнивает взвешенный классификатор с прежним правилом "первое
+совпадение по порядку словаря" на двух размеченных выборках и измеряет
+пропускную способность одиночной и пакетной классификации:
+- tuning (labeled_descriptions.json) - по ней подбирались веса словаря,
+  точность на ней завышена
+- held-out (heldout_descriptions.json) - не использовалась при подборе;
+  её точность - оценка на новых описаниях. Не подбирайте веса по ней,
+  иначе понадобится новая отложенная выборка.
+
+Запуск из корня репозитория:
+    python -m benchmarks.classifier [--repeat N] [--json]
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.ai_enhancer import (
+    CompiledVocabulary,
+    classify_project_types,
+    classify_project_types_batch,
+    get_vocabulary,
+)
+
+SAMPLE_PATH = Path(__file__).resolve().parent / 'data' / 'labeled_descriptions.json'
+HELDOUT_PATH = Path(__file__).resolve().parent / 'data' / 'heldout_descriptions.json'
+
+
+def first_match_type(description: str, vocabulary: CompiledVocabulary) -> Optional[str]:
+    """Прежнее правило: первый тип словаря с любым совпавшим словом."""
+    description_lower = description.lower()
+    for project_type, keywords in vocabulary.project_types:
+        for keyword, _ in keywords:
+            if keyword in description_lower:
+                return project_type
+    return None
+
+
+def load_sample(path: Path = SAMPLE_PATH) -> List[Dict[str, str]]:
+    """Загрузить размеченную выборку [{"text": ..., "label": ...}]."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def measure_accuracy(sample: List[Dict[str, str]], vocabulary: CompiledVocabulary) -> Dict[str, float]:
+    """Top-1 и top-2 точность нового классификатора и точность прежнего правила."""
+    top1 = top2 = legacy = 0
+    for item in sample:
+        ranked = [name for name, _ in classify_project_types(item['text'], vocabulary)]
+        top1 += bool(ranked) and ranked[0] == item['label']
+        top2 += item['label'] in ranked[:2]
+        legacy += first_match_type(item['text'], vocabulary) == item['label']
+    n = len(sample)
+    return {
+        'top1_accuracy': top1 / n,
+        'top2_accuracy': top2 / n,
+        'legacy_first_match_accuracy': legacy / n,
+    }
+
+
+def measure_throughput(texts: List[str], vocabulary: CompiledVocabulary, repeat: int) -> Dict[str, float]:
+    """Описаний в секунду: поштучно, пакетом и прежним правилом."""
+    corpus = texts * repeat
+    
+    start = time.perf_counter()
+    for text in corpus:
+        classify_project_types(text, vocabulary)
+    single = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    classify_project_types_batch(corpus, vocabulary)
+    batch = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    for text in corpus:
+        first_match_type(text, vocabulary)
+    legacy = time.perf_counter() - start
+    
+    return {
+        'descriptions': len(corpus),
+        'single_per_sec': len(corpus) / single,
+        'batch_per_sec': len(corpus) / batch,
+        'legacy_per_sec': len(corpus) / legacy,
+    }
+
+
+def run(repeat: int) -> Dict[str, Any]:
+    """Выполнить бенчмарк и вернуть результаты."""
+    vocabulary = get_vocabulary()
+    sample = load_sample()
+    heldout = load_sample(HELDOUT_PATH)
+    return {
+        'sample_size': len(sample),
+        'heldout_size': len(heldout),
+        'vocabulary_fingerprint': vocabulary.fingerprint,
+        'accuracy': measure_accuracy(sample, vocabulary),
+        'heldout_accuracy': measure_accuracy(heldout, vocabulary),
+        'throughput': measure_throughput([item['text'] for item in sample], vocabulary, repeat),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=2000, help='Сколько раз прогнать выборку для замера скорости')
+    parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+    args = parser.parse_args()
+    
+    results = run(args.repeat)
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    
+    throughput = results['throughput']
+    print(f"{'':<24} {'tuning':>8} {'held-out':>9}")
+    print(f"{'Описаний':<24} {results['sample_size']:>8} {results['heldout_size']:>9}")
+    for label, key in (
+        ('Top-1 точность', 'top1_accuracy'),
+        ('Top-2 точность', 'top2_accuracy'),
+        ('Прежнее правило', 'legacy_first_match_accuracy'),
+    ):
+        print(f"{label:<24} {results['accuracy'][key]:>8.1%} {results['heldout_accuracy'][key]:>9.1%}")
+    print(f"Поштучно:  {throughput['single_per_sec']:,.0f} описаний/с")
+    print(f"Пакетом:   {throughput['batch_per_sec']:,.0f} описаний/с")
+    print(f"Прежнее:   {throughput['legacy_per_sec']:,.0f} описаний/с")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+Общие утилиты бенчмарков: замер времени, перцентили, JSON-результаты и сравнение с baseline.
+
+Формат результатов:
+    {"meta": {...}, "cases": {"<имя случая>": {"median": сек, "min": сек, "calls": N}}}
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINES_DIR = Path(__file__).resolve().parent / 'baselines'
+
+# Допустимое замедление относительно baseline (1.5 = на 50% медленнее)
+DEFAULT_THRESHOLD = 1.5
+
+# Случаи быстрее этого порога не сравниваются - слишком шумно
+DEFAULT_NOISE_FLOOR = 1e-5
+
+
+def time_call(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Замерить время вызова функции.
+    
+    Args:
+        func: Функция без аргументов
+        repeat: Количество замеров
+    
+    Returns:
+        {'median': ..., 'min': ..., 'calls': ...} в секундах на вызов
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timing_stats(timings)
+
+
+def timing_stats(timings: List[float]) -> Dict[str, float]:
+    """
+    Результат случая по отдельным замерам.
+    
+    Args:
+        timings: Длительности вызовов в секундах
+    
+    Returns:
+        {'median': ..., 'min': ..., 'calls': ...} в секундах на вызов
+    """
+    return {
+        'median': statistics.median(timings),
+        'min': min(timings),
+        'calls': len(timings),
+    }
+
+
+def summarize_latencies(timings: List[float]) -> Dict[str, float]:
+    """
+    Сводка распределения длительностей.
+    
+    Args:
+        timings: Длительности в секундах
+    
+    Returns:
+        {'count', 'mean', 'p50', 'p95', 'p99', 'max'}, времена в миллисекундах
+    """
+    if not timings:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'max': 0.0}
+    ordered = sorted(timings)
+    
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1e3
+    
+    return {
+        'count': len(ordered),
+        'mean': statistics.fmean(ordered) * 1e3,
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'max': ordered[-1] * 1e3,
+    }
+
+
+def make_meta(**extra: Any) -> Dict[str, Any]:
+    """Сведения об окружении для файла результатов."""
+    meta = {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+    meta.update(extra)
+    return meta
+
+
+def save_json(path: Path, data: Dict[str, Any]) -> None:
+    """Сохранить результаты в JSON."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def load_json(path: Path) -> Optional[Dict[str, Any]]:
+    """Загрузить результаты из JSON (None если файла нет)."""
+    if not path.exists():
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_thresholds(values: List[str]) -> Dict[str, float]:
+    """
+    Разобрать пороги вида "stage=1.3" из командной строки.
+    
+    Raises:
+        ValueError: Если формат некорректен
+    """
+    thresholds = {}
+    for value in values:
+        name, sep, ratio = value.partition('=')
+        if not sep:
+            raise ValueError(f"Threshold must look like name=ratio, got: {value}")
+        thresholds[name] = float(ratio)
+    return thresholds
+
+
+def find_regressions(
+    results: Dict[str, Any],
+    baseline: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+    overrides: Optional[Dict[str, float]] = None,
+    noise_floor: float = DEFAULT_NOISE_FLOOR
+) -> List[str]:
+    """
+    Сравнить медианы случаев с baseline.
+    
+    Порог для случая берётся из overrides по любой части имени
+    (например "extract_key_points" для "ru/10KB/extract_key_points"),
+    иначе используется threshold.
+    
+    Returns:
+        Список описаний регрессий (пустой - всё в норме)
+    """
+    overrides = overrides or {}
+    regressions = []
+    for name, current in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if previous is None:
+            continue
+        if max(current['median'], previous['median']) < noise_floor:
+            continue
+        limit = threshold
+        for part in name.split('/'):
+            limit = overrides.get(part, limit)
+        ratio = current['median'] / previous['median'] if previous['median'] else float('inf')
+        if ratio > limit:
+            regressions.append(
+                f"{name}: {current['median'] * 1e3:.3f} ms vs baseline "
+                f"{previous['median'] * 1e3:.3f} ms (x{ratio:.2f} > x{limit:.2f})"
+            )
+    return regressions
+
+
+def add_baseline_arguments(parser) -> None:
+    """Добавить в argparse общие параметры работы с baseline."""
+    parser.add_argument('--output', type=Path, help='Сохранить результаты в JSON-файл')
+    parser.add_argument('--baseline', type=Path, help='Файл baseline для сравнения')
+    parser.add_argument('--save-baseline', action='store_true', help='Перезаписать baseline текущими результатами')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'Допустимое замедление (по умолчанию x{DEFAULT_THRESHOLD})')
+    parser.add_argument('--stage-threshold', action='append', default=[], metavar='NAME=RATIO',
+                        help='Порог для отдельного этапа или размера, можно несколько раз')
+    parser.add_argument('--noise-floor', type=float, default=DEFAULT_NOISE_FLOOR,
+                        help='Не сравнивать случаи быстрее этого времени (сек)')
+
+
+def finish(results: Dict[str, Any], args, default_baseline: Path) -> int:
+    """
+    Сохранить результаты и сравнить с baseline.
+    
+    Returns:
+        Код выхода: 0 - без регрессий, 1 - есть регрессии
+    """
+    if args.output:
+        save_json(args.output, results)
+    
+    baseline_path = args.baseline or default_baseline
+    if args.save_baseline:
+        save_json(baseline_path, results)
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    
+    baseline = load_json(baseline_path)
+    if baseline is None:
+        print(f"No baseline at {baseline_path}, skipping regression check")
+        return 0
+    
+    regressions = find_regressions(
+        results,
+        baseline,
+        threshold=args.threshold,
+        overrides=parse_thresholds(args.stage_threshold),
+        noise_floor=args.noise_floor,
+    )
+    if regressions:
+        print("REGRESSIONS:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"No regressions against {baseline_path}")
+    return 0
@@ -0,0 +1,338 @@
+"""
+Бенчмарк функций app/db.py на заполненной таблице заявок.
+
+Генерирует детерминированные наборы из 10K, 100K и 1M заявок с
+реалистичным перекосом по пользователям (у большинства одна-две
+заявки, у немногих - сотни) и замеряет save_lead, get_user_leads,
+get_last_lead_by_user, delete_lead и get_all_leads:
+- cold - перед каждым вызовом файл БД вытесняется из page cache ОС
+  (posix_fadvise), каждый вызов - другой пользователь или заявка
+- warm - повторные вызовы на уже прочитанных страницах
+
+Для каждой функции выводится EXPLAIN QUERY PLAN запросов, которые
+она действительно выполняет (перехват через trace callback), и
+сравнивается с планом из baseline.
+
+Запуск из корня репозитория:
+    python -m benchmarks.db [--size 100K] [--data-dir .bench-data] [--save-baseline]
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import db
+from benchmarks.common import BASELINES_DIR, add_baseline_arguments, finish, load_json, make_meta, timing_stats
+
+SIZES = {'10K': 10_000, '100K': 100_000, '1M': 1_000_000}
+
+# Заявок на пользователя: Парето (alpha=1.5, в среднем ~3), не больше MAX
+PARETO_ALPHA = 1.5
+MAX_LEADS_PER_USER = 500
+
+FIRST_USER_ID = 100_000_000
+
+# get_all_leads читает всю таблицу - замеров меньше
+ALL_LEADS_REPEAT = 3
+
+DESCRIPTION_PARTS = (
+    "Нужен ремонт квартиры", "замена электрики", "сантехника под ключ",
+    "покраска стен и потолков", "укладка ламината", "срок - до конца месяца",
+    "бюджет около 5000 евро", "дом в Будве, 2 этажа", "Need a website for a small hotel",
+    "booking form and gallery", "Potreban mi dizajn enterijera", "rok je dvije nedjelje",
+)
+
+
+def evict_page_cache(path: Path) -> bool:
+    """
+    Вытеснить файл из page cache ОС (Linux, без root).
+    
+    Returns:
+        True если вытеснение поддерживается
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return False
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+    return True
+
+
+def seed_database(path: Path, leads: int, seed: int) -> None:
+    """
+    Создать БД со схемой app.db и заполнить её заявками.
+    
+    Args:
+        path: Файл БД
+        leads: Количество заявок
+        seed: Seed генератора
+    """
+    rng = random.Random(seed)
+    owners: List[int] = []
+    user_id = FIRST_USER_ID
+    while len(owners) < leads:
+        count = min(MAX_LEADS_PER_USER, int(rng.paretovariate(PARETO_ALPHA)))
+        owners.extend([user_id] * count)
+        user_id += 1
+    del owners[leads:]
+    # Заявки разных пользователей перемешаны во времени
+    rng.shuffle(owners)
+    
+    with contextlib.redirect_stdout(None):
+        db.init_db(str(path))
+    
+    started = datetime(2024, 1, 1)
+    step = timedelta(days=365) / leads
+    
+    def rows():
+        for index, owner in enumerate(owners):
+            description = ', '.join(rng.choices(DESCRIPTION_PARTS, k=rng.randint(2, 12)))
+            files = json.dumps([{'type': 'photo', 'file_id': f"seed-{index}"}]) if rng.random() < 0.3 else None
+            yield (
+                owner,
+                f"User {owner}",
+                f"+382 67 {owner % 1_000_000:06d}",
+                f"user{owner}@example.com" if rng.random() < 0.7 else None,
+                description,
+                files,
+                (started + step * index).isoformat(),
+                uuid.UUID(int=rng.getrandbits(128)).hex,
+            )
+    
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO leads (tg_user_id, full_name, phone, email, description, files, created_at, idempotency_key) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            rows()
+        )
+        conn.executemany(
+            "INSERT INTO users (tg_user_id, language, created_at) VALUES (?, ?, ?)",
+            ((user, rng.choice(('ru', 'me', 'en')), started.isoformat()) for user in sorted(set(owners)))
+        )
+    conn.close()
+
+
+def prepare_database(data_dir: Path, size: str, seed: int) -> Path:
+    """
+    Заполненная БД нужного размера (из кэша data_dir или новая).
+    
+    К БД применяется init_db - изменения схемы и индексов попадают
+    и в ранее заполненные наборы.
+    """
+    path = data_dir / f"leads_{size}_seed{seed}.db"
+    if not path.exists():
+        print(f"Seeding {SIZES[size]} leads into {path}...", file=sys.stderr)
+        partial = path.with_suffix('.partial')
+        partial.unlink(missing_ok=True)
+        seed_database(partial, SIZES[size], seed)
+        partial.rename(path)
+    with contextlib.redirect_stdout(None):
+        db.init_db(str(path))
+    return path
+
+
+def capture_plans(func: Callable[[], Any], path: Path) -> List[Dict[str, Any]]:
+    """
+    EXPLAIN QUERY PLAN для запросов, выполненных функцией.
+    
+    На время вызова get_connection подменяется: соединения функции
+    сообщают свои запросы через trace callback.
+    """
+    statements: List[str] = []
+    original = db.get_connection
+    
+    def traced_connection(db_path: str) -> sqlite3.Connection:
+        conn = original(db_path)
+        conn.set_trace_callback(statements.append)
+        return conn
+    
+    db.get_connection = traced_connection
+    try:
+        func()
+    finally:
+        db.get_connection = original
+    
+    conn = sqlite3.connect(path)
+    plans = []
+    try:
+        for sql in statements:
+            if not sql.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE')):
+                continue
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            plans.append({'sql': ' '.join(sql.split()), 'plan': plan})
+    finally:
+        conn.close()
+    return plans
+
+
+def run_size(size: str, seeded: Path, work_dir: Path, repeat: int, seed: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Замеры функций на одном наборе данных.
+    
+    Returns:
+        (случаи для сравнения с baseline, планы запросов по функциям)
+    """
+    path = work_dir / f"work_{size}.db"
+    shutil.copyfile(seeded, path)
+    db_path = str(path)
+    rng = random.Random(seed)
+    
+    conn = sqlite3.connect(path)
+    users = [row[0] for row in conn.execute("SELECT DISTINCT tg_user_id FROM leads")]
+    heavy_user = conn.execute(
+        "SELECT tg_user_id FROM leads GROUP BY tg_user_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()[0]
+    seeded_leads = conn.execute(
+        "SELECT id, tg_user_id FROM leads ORDER BY random() LIMIT ?", (repeat,)
+    ).fetchall()
+    conn.close()
+    cold_users = rng.sample(users, min(repeat, len(users)))
+    warm_user = cold_users[0]
+    
+    def save() -> int:
+        return db.save_lead(
+            warm_user, 'Bench User', '+382 67 000000', 'Benchmark lead description', db_path,
+            email='bench@example.com', idempotency_key=uuid.uuid4().hex
+        )
+    
+    def measure(
+        calls: List[Callable[[], Any]],
+        cold: bool,
+        setup: Optional[Callable[[], Any]] = None
+    ) -> Dict[str, float]:
+        timings = []
+        for call in calls:
+            if setup is not None:
+                setup()
+            if cold:
+                evict_page_cache(path)
+            started = time.perf_counter()
+            call()
+            timings.append(time.perf_counter() - started)
+        return timing_stats(timings)
+    
+    cases: Dict[str, Dict[str, float]] = {}
+    
+    # Warm-прогон: страницы пользователя и индексы уже в кэше
+    db.get_user_leads(warm_user, db_path)
+    for name, function in (('get_user_leads', db.get_user_leads), ('get_last_lead_by_user', db.get_last_lead_by_user)):
+        cases[f"{size}/{name}/cold"] = measure(
+            [lambda user=user, function=function: function(user, db_path) for user in cold_users], cold=True
+        )
+        cases[f"{size}/{name}/warm"] = measure(
+            [lambda function=function: function(warm_user, db_path)] * repeat, cold=False
+        )
+    cases[f"{size}/get_user_leads/heavy"] = measure(
+        [lambda: db.get_user_leads(heavy_user, db_path)] * min(repeat, 20), cold=False
+    )
+    
+    all_repeat = min(repeat, ALL_LEADS_REPEAT)
+    cases[f"{size}/get_all_leads/cold"] = measure([lambda: db.get_all_leads(db_path)] * all_repeat, cold=True)
+    cases[f"{size}/get_all_leads/warm"] = measure([lambda: db.get_all_leads(db_path)] * all_repeat, cold=False)
+    
+    cases[f"{size}/save_lead/cold"] = measure([save] * repeat, cold=True)
+    cases[f"{size}/save_lead/warm"] = measure([save] * repeat, cold=False)
+    
+    cases[f"{size}/delete_lead/cold"] = measure(
+        [lambda lead=lead: db.delete_lead(lead[0], lead[1], db_path) for lead in seeded_leads], cold=True
+    )
+    # Warm: удаление только что сохранённой заявки (её страницы в кэше)
+    fresh: List[int] = []
+    cases[f"{size}/delete_lead/warm"] = measure(
+        [lambda: db.delete_lead(fresh.pop(), warm_user, db_path)] * repeat,
+        cold=False,
+        setup=lambda: fresh.append(save())
+    )
+    
+    deleted = save()
+    plans = {
+        'save_lead': capture_plans(save, path),
+        'get_user_leads': capture_plans(lambda: db.get_user_leads(warm_user, db_path), path),
+        'get_last_lead_by_user': capture_plans(lambda: db.get_last_lead_by_user(warm_user, db_path), path),
+        'delete_lead': capture_plans(lambda: db.delete_lead(deleted, warm_user, db_path), path),
+        'get_all_leads': capture_plans(lambda: db.get_all_leads(db_path), path),
+    }
+    path.unlink()
+    return cases, plans
+
+
+def changed_plans(plans: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Функции, планы запросов которых отличаются от baseline."""
+    previous = baseline.get('plans', {})
+    changes = []
+    for name, current in plans.items():
+        if name in previous and [p['plan'] for p in previous[name]] != [p['plan'] for p in current]:
+            changes.append(name)
+    return changes
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Вывести результаты в читаемом виде."""
+    print(f"{'case':<36} {'median, ms':>12} {'min, ms':>10} {'calls':>7}")
+    for name, timing in results['cases'].items():
+        print(f"{name:<36} {timing['median'] * 1e3:>12.3f} {timing['min'] * 1e3:>10.3f} {timing['calls']:>7}")
+    print()
+    for name, plans in results['plans'].items():
+        print(f"{name}:")
+        for statement in plans:
+            print(f"  {statement['sql'][:100]}")
+            for line in statement['plan']:
+                print(f"    {line}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', action='append', choices=list(SIZES),
+                        help='Размеры наборов (по умолчанию 10K и 100K)')
+    parser.add_argument('--repeat', type=int, default=100, help='Замеров на случай')
+    parser.add_argument('--seed', type=int, default=42, help='Seed генерации данных')
+    parser.add_argument('--data-dir', type=Path, help='Каталог для заполненных БД (переиспользуются между запусками)')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    
+    sizes = args.size or ['10K', '100K']
+    with tempfile.TemporaryDirectory(prefix='bench-db-') as tmp:
+        data_dir = args.data_dir or Path(tmp)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        cases: Dict[str, Any] = {}
+        plans: Dict[str, Any] = {}
+        for size in sizes:
+            seeded = prepare_database(data_dir, size, args.seed)
+            size_cases, plans = run_size(size, seeded, Path(tmp), args.repeat, args.seed)
+            cases.update(size_cases)
+    
+    results = {
+        'meta': make_meta(
+            sizes=sizes,
+            seed=args.seed,
+            sqlite=sqlite3.sqlite_version,
+            page_cache_eviction=hasattr(os, 'posix_fadvise'),
+        ),
+        'cases': cases,
+        # Планы последнего (наибольшего) набора
+        'plans': plans,
+    }
+    print_report(results)
+    
+    baseline = load_json(args.baseline or BASELINES_DIR / 'db.json')
+    if baseline is not None and not args.save_baseline:
+        for name in changed_plans(plans, baseline):
+            print(f"QUERY PLAN CHANGED: {name}")
+    return finish(results, args, BASELINES_DIR / 'db.json')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,181 @@
+"""
+Бенчмарк конвейера app.ai_enhancer по этапам.
+
+Генерирует детерминированные синтетические описания на RU/ME/EN
+размером 100 B, 10 KB и 1 MB и замеряет каждый этап:
+extract_key_points, detect_project_type, extract_urgency,
+extract_budget_mention, format_enhanced_description, а также
+enhance_lead_description целиком (без кэша).
+
+Размер словаря можно увеличить (--vocab-scale), чтобы увидеть
+зависимость от количества ключевых слов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.enhancer [--output results.json] [--save-baseline]
+"""
+import argparse
+import contextlib
+import json
+import random
+import sys
+from typing import Any, Dict, Iterator, List
+
+from app import ai_enhancer
+from app.ai_enhancer import (
+    KEYWORDS_PATH,
+    CompiledVocabulary,
+    compile_vocabulary,
+    detect_project_type,
+    extract_budget_mention,
+    extract_key_points,
+    extract_urgency,
+    format_enhanced_description,
+    structure_description,
+)
+from benchmarks.common import BASELINES_DIR, add_baseline_arguments, finish, make_meta, time_call
+
+SIZES = {'100B': 100, '10KB': 10 * 1024, '1MB': 1024 * 1024}
+
+# Количество замеров по размеру (крупные входы медленнее)
+REPEATS = {'100B': 2000, '10KB': 200, '1MB': 10}
+
+WORDS = {
+    'ru': ['нужно', 'сделать', 'ремонт', 'квартиры', 'стены', 'пол', 'плитка', 'ванная',
+           'кухня', 'окна', 'двери', 'покраска', 'материалы', 'работы', 'мастер', 'дом'],
+    'me': ['potrebno', 'uraditi', 'renovacija', 'stana', 'zidovi', 'pod', 'pločice', 'kupatilo',
+           'kuhinja', 'prozori', 'vrata', 'krečenje', 'materijal', 'radovi', 'majstor', 'kuća'],
+    'en': ['need', 'to', 'renovate', 'apartment', 'walls', 'floor', 'tiles', 'bathroom',
+           'kitchen', 'windows', 'doors', 'painting', 'materials', 'works', 'builder', 'house'],
+}
+
+EXTRAS = {
+    'ru': ['площадь {n} м2', 'бюджет {n} евро', 'срочно', 'сантехника', 'проводка'],
+    'me': ['površina {n} m2', 'budžet {n} €', 'hitno', 'vodovod', 'električni'],
+    'en': ['area {n} m2', 'budget {n} euro', 'asap', 'plumbing', 'wiring'],
+}
+
+
+def make_description(lang: str, size: int, seed: int = 42) -> str:
+    """Сгенерировать детерминированное описание примерно заданного размера в байтах."""
+    rng = random.Random(f"{seed}:{lang}:{size}")
+    sentences = []
+    length = 0
+    while length < size:
+        words = rng.choices(WORDS[lang], k=rng.randint(4, 12))
+        if rng.random() < 0.3:
+            words.append(rng.choice(EXTRAS[lang]).format(n=rng.randint(10, 9000)))
+        sentence = ' '.join(words).capitalize() + rng.choice(['.', '.', '!', ';'])
+        sentences.append(sentence)
+        length += len(sentence.encode('utf-8')) + 1
+    return ' '.join(sentences)[:size]
+
+
+def make_vocabulary(scale: int) -> CompiledVocabulary:
+    """
+    Словарь из файла, расширенный в scale раз синтетическими ключевыми словами.
+    
+    Синтетическое слово не содержит других слов своего типа (иначе
+    compile_vocabulary его отбросит) и не встречается в описаниях.
+    """
+    with open(KEYWORDS_PATH, encoding='utf-8') as f:
+        raw = json.load(f)
+    if scale > 1:
+        for name, keywords in list(raw['project_types'].items()):
+            if isinstance(keywords, dict):
+                keywords = list(keywords)
+            raw['project_types'][name] = keywords + [
+                f"{keyword[:-1]}#{i}#" for i in range(1, scale) for keyword in keywords
+            ]
+        raw['urgent_keywords'] = raw['urgent_keywords'] + [
+            f"{keyword[:-1]}#{i}#" for i in range(1, scale) for keyword in raw['urgent_keywords']
+        ]
+    return compile_vocabulary(raw)
+
+
+@contextlib.contextmanager
+def use_vocabulary(vocabulary: CompiledVocabulary) -> Iterator[None]:
+    """
+    Подменить словарь модуля ai_enhancer на время замеров.
+    
+    enhance_lead_description не принимает словарь и берёт его из
+    get_vocabulary() - без подмены сквозной случай игнорировал бы --vocab-scale.
+    """
+    original = ai_enhancer.get_vocabulary
+    ai_enhancer.get_vocabulary = lambda: vocabulary
+    try:
+        yield
+    finally:
+        ai_enhancer.get_vocabulary = original
+
+
+def run(langs: List[str], sizes: List[str], vocab_scale: int, repeat_factor: float) -> Dict[str, Any]:
+    """Выполнить замеры и вернуть результаты в формате benchmarks.common."""
+    vocabulary = make_vocabulary(vocab_scale)
+    with use_vocabulary(vocabulary):
+        cases = measure_cases(langs, sizes, vocabulary, repeat_factor)
+    
+    ai_enhancer.clear_caches()
+    return {
+        'meta': make_meta(vocab_scale=vocab_scale, vocabulary_keywords=sum(
+            len(keywords) for _, keywords in vocabulary.project_types
+        )),
+        'cases': cases,
+    }
+
+
+def measure_cases(
+    langs: List[str],
+    sizes: List[str],
+    vocabulary: CompiledVocabulary,
+    repeat_factor: float
+) -> Dict[str, Dict[str, float]]:
+    """Замеры этапов для каждого языка и размера описания."""
+    cases = {}
+    for lang in langs:
+        for size_name in sizes:
+            text = make_description(lang, SIZES[size_name])
+            repeat = max(3, int(REPEATS[size_name] * repeat_factor))
+            structured = structure_description(text, 'Bench User', '+38200000000')
+            
+            stages = {
+                'extract_key_points': lambda: extract_key_points(text, vocabulary=vocabulary),
+                'detect_project_type': lambda: detect_project_type(text, vocabulary),
+                'extract_urgency': lambda: extract_urgency(text, vocabulary),
+                'extract_budget_mention': lambda: extract_budget_mention(text),
+                'format_enhanced_description': lambda: format_enhanced_description(structured, lang),
+            }
+            
+            def enhance_cold():
+                ai_enhancer.clear_caches()
+                ai_enhancer.enhance_lead_description(text, 'Bench User', '+38200000000', lang=lang)
+            
+            stages['enhance_lead_description'] = enhance_cold
+            
+            for stage, func in stages.items():
+                cases[f"{lang}/{size_name}/{stage}"] = time_call(func, repeat)
+    return cases
+
+
+def print_table(results: Dict[str, Any]) -> None:
+    """Вывести результаты в читаемом виде."""
+    print(f"{'case':<50} {'median, ms':>12} {'min, ms':>12}")
+    for name, timing in results['cases'].items():
+        print(f"{name:<50} {timing['median'] * 1e3:>12.4f} {timing['min'] * 1e3:>12.4f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--lang', action='append', choices=list(WORDS), help='Языки (по умолчанию все)')
+    parser.add_argument('--size', action='append', choices=list(SIZES), help='Размеры (по умолчанию все)')
+    parser.add_argument('--vocab-scale', type=int, default=1, help='Во сколько раз расширить словарь')
+    parser.add_argument('--repeat-factor', type=float, default=1.0, help='Множитель количества замеров')
+    add_baseline_arguments(parser)
+    args = parser.parse_args()
+    
+    results = run(args.lang or list(WORDS), args.size or list(SIZES), args.vocab_scale, args.repeat_factor)
+    print_table(results)
+    return finish(results, args, BASELINES_DIR / f'enhancer_vocab{args.vocab_scale}.json')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
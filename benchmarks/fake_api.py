@@ -0,0 +1,515 @@
+"""
+Фейковый Telegram Bot API сервер для офлайн-тестов и нагрузочных замеров.
+
+Отвечает на методы, которые использует бот (getUpdates, sendMessage,
+sendPhoto/Document/Video, sendMediaGroup, editMessageText,
+answerCallbackQuery, deleteMessage и служебные getMe/deleteWebhook/
+setWebhook), записывает все вызовы и умеет:
+- добавлять задержку к каждому ответу (latency_ms ± jitter_ms)
+- отвечать 429 Too Many Requests на каждый N-й или случайный запрос
+- отдавать боту обновления через getUpdates (push_update)
+- проверять записанные вызовы (calls, assert_called)
+
+Бот направляется на сервер через TELEGRAM_API_URL (app/config.py).
+
+Запуск из корня репозитория:
+    python -m benchmarks.fake_api [--port 8081] [--latency-ms 20] [--rate-limit-every 100]
+
+Управление работающим сервером из другого процесса:
+    POST /_fake/updates  - обновление (или список) для getUpdates
+    GET  /_fake/calls    - записанные вызовы (?method=sendMessage)
+    POST /_fake/reset    - очистить вызовы и очередь обновлений
+"""
+import json
+import time
+import random
+import asyncio
+import argparse
+import itertools
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from aiohttp import web
+
+# Пользователь бота, которого возвращает getMe и который указан в from
+BOT_USER = {'id': 1000000, 'is_bot': True, 'first_name': 'Fake Bot', 'username': 'fake_lead_bot'}
+
+# Методы, на которые может быть внедрён ответ 429 (getUpdates не ограничивается)
+RATE_LIMITED_METHODS = frozenset({
+    'sendmessage', 'sendphoto', 'senddocument', 'sendvideo', 'sendmediagroup',
+    'editmessagetext', 'answercallbackquery', 'deletemessage',
+})
+
+# Параметры-числа (aiogram передаёт все значения формы строками)
+_INT_PARAMS = frozenset({'offset', 'limit', 'timeout', 'cache_time', 'duration', 'width', 'height'})
+
+
+class RecordedCall(NamedTuple):
+    """Записанный вызов Bot API."""
+    method: str
+    params: Dict[str, Any]
+    at: float
+    error_code: Optional[int]
+
+
+def _decode_param(name: str, value: Any) -> Any:
+    if not isinstance(value, str):
+        # Загруженный файл (multipart) - записываем только имя
+        return f"upload:{getattr(value, 'filename', name)}"
+    if value[:1] in ('{', '['):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    if (name in _INT_PARAMS or name.endswith('_id')) and value.lstrip('-').isdigit():
+        return int(value)
+    return value
+
+
+def make_message_update(
+    update_id: int,
+    user_id: int,
+    text: Optional[str] = None,
+    message_id: Optional[int] = None,
+    first_name: str = 'Load',
+    **content: Any
+) -> Dict[str, Any]:
+    """
+    Обновление с сообщением пользователя в личном чате.
+    
+    Args:
+        update_id: Номер обновления
+        user_id: ID пользователя (он же ID чата)
+        text: Текст сообщения
+        message_id: ID сообщения (по умолчанию update_id)
+        first_name: Имя пользователя
+        **content: Остальные поля сообщения (photo=[...], document={...}, contact={...})
+    
+    Returns:
+        Обновление в формате Bot API
+    """
+    message: Dict[str, Any] = {
+        'message_id': message_id if message_id is not None else update_id,
+        'date': int(time.time()),
+        'chat': {'id': user_id, 'type': 'private', 'first_name': first_name},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': first_name, 'language_code': 'ru'},
+    }
+    if text is not None:
+        message['text'] = text
+        if text.startswith('/'):
+            message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    message.update(content)
+    return {'update_id': update_id, 'message': message}
+
+
+def make_callback_update(
+    update_id: int,
+    user_id: int,
+    data: str,
+    message_id: int = 1,
+    first_name: str = 'Load'
+) -> Dict[str, Any]:
+    """
+    Обновление с нажатием inline-кнопки.
+    
+    Args:
+        update_id: Номер обновления
+        user_id: ID пользователя
+        data: callback_data кнопки
+        message_id: ID сообщения бота с кнопкой
+        first_name: Имя пользователя
+    
+    Returns:
+        Обновление в формате Bot API
+    """
+    user = {'id': user_id, 'is_bot': False, 'first_name': first_name, 'language_code': 'ru'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': f"cq{update_id}",
+            'from': user,
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private', 'first_name': first_name},
+                'from': BOT_USER,
+                'text': '...',
+            },
+        },
+    }
+
+
+class FakeTelegramServer:
+    """
+    Фейковый Bot API сервер на aiohttp.
+    """
+    
+    def __init__(
+        self,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        rate_limit_every: int = 0,
+        rate_limit_probability: float = 0.0,
+        retry_after: int = 1,
+        seed: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            latency_ms: Задержка каждого ответа
+            jitter_ms: Случайная добавка к задержке (0..jitter_ms)
+            rate_limit_every: Отвечать 429 на каждый N-й ограничиваемый запрос (0 - нет)
+            rate_limit_probability: Вероятность ответа 429 на ограничиваемый запрос
+            retry_after: retry_after в ответах 429 (секунды)
+            seed: Seed генератора для воспроизводимых задержек и 429
+        """
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_every = rate_limit_every
+        self.rate_limit_probability = rate_limit_probability
+        self.retry_after = retry_after
+        self.recorded: List[RecordedCall] = []
+        self._random = random.Random(seed)
+        self._message_ids = itertools.count(1)
+        self._file_ids = itertools.count(1)
+        self._limited_requests = 0
+        self._update_ids = itertools.count(1)
+        self._updates: List[Dict[str, Any]] = []
+        self._updates_added = asyncio.Event()
+        self._runner: Optional[web.AppRunner] = None
+        self._methods = {
+            'getme': self._get_me,
+            'getupdates': self._get_updates,
+            'deletewebhook': self._true,
+            'setwebhook': self._true,
+            'getwebhookinfo': self._get_webhook_info,
+            'sendmessage': self._send_message,
+            'sendphoto': self._send_photo,
+            'senddocument': self._send_document,
+            'sendvideo': self._send_video,
+            'sendmediagroup': self._send_media_group,
+            'editmessagetext': self._edit_message_text,
+            'answercallbackquery': self._true,
+            'deletemessage': self._true,
+        }
+    
+    # --- Обновления ---
+    
+    def push_update(self, update: Dict[str, Any]) -> int:
+        """
+        Поставить обновление в очередь getUpdates.
+        
+        Args:
+            update: Обновление; update_id назначается, если не указан
+        
+        Returns:
+            update_id
+        """
+        update.setdefault('update_id', next(self._update_ids))
+        self._updates.append(update)
+        self._updates_added.set()
+        return update['update_id']
+    
+    @property
+    def pending_updates(self) -> int:
+        """Обновлений в очереди, ещё не подтверждённых ботом (offset)."""
+        return len(self._updates)
+    
+    # --- Проверка вызовов ---
+    
+    def calls(self, method: Optional[str] = None, ok: Optional[bool] = None, **params: Any) -> List[RecordedCall]:
+        """
+        Записанные вызовы.
+        
+        Args:
+            method: Имя метода (без учёта регистра)
+            ok: True - только успешные, False - только с ошибкой
+            **params: Значения параметров (chat_id=..., text=...)
+        
+        Returns:
+            Подходящие вызовы в порядке поступления
+        """
+        result = []
+        for call in self.recorded:
+            if method is not None and call.method.lower() != method.lower():
+                continue
+            if ok is not None and (call.error_code is None) != ok:
+                continue
+            if any(call.params.get(name) != value for name, value in params.items()):
+                continue
+            result.append(call)
+        return result
+    
+    def assert_called(self, method: str, times: Optional[int] = None, **params: Any) -> List[RecordedCall]:
+        """
+        Проверить, что метод вызывался (успешно) с указанными параметрами.
+        
+        Args:
+            method: Имя метода
+            times: Точное число вызовов (None - хотя бы один)
+            **params: Значения параметров
+        
+        Returns:
+            Подходящие вызовы
+        
+        Raises:
+            AssertionError: Если вызовов нет или их число не совпадает
+        """
+        matched = self.calls(method, ok=True, **params)
+        if (times is None and not matched) or (times is not None and len(matched) != times):
+            expected = 'at least once' if times is None else f"{times} time(s)"
+            seen = ', '.join(sorted({call.method for call in self.recorded})) or 'nothing'
+            raise AssertionError(
+                f"Expected {method}({params}) {expected}, got {len(matched)}; recorded: {seen}"
+            )
+        return matched
+    
+    def assert_not_called(self, method: str, **params: Any) -> None:
+        """
+        Проверить, что метод не вызывался с указанными параметрами.
+        
+        Raises:
+            AssertionError: Если такой вызов был
+        """
+        matched = self.calls(method, **params)
+        if matched:
+            raise AssertionError(f"Expected no {method}({params}), got {len(matched)}")
+    
+    def reset(self) -> None:
+        """Очистить записанные вызовы и очередь обновлений."""
+        self.recorded.clear()
+        self._updates.clear()
+    
+    # --- HTTP ---
+    
+    def create_app(self) -> web.Application:
+        """Приложение aiohttp с маршрутами Bot API и управления."""
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route('*', '/bot{token}/{method}', self._handle)
+        app.router.add_post('/_fake/updates', self._control_push)
+        app.router.add_get('/_fake/calls', self._control_calls)
+        app.router.add_post('/_fake/reset', self._control_reset)
+        return app
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        Запустить сервер.
+        
+        Args:
+            host: Адрес
+            port: Порт (0 - свободный)
+        
+        Returns:
+            Базовый URL для TELEGRAM_API_URL
+        """
+        self._runner = web.AppRunner(self.create_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}"
+    
+    async def stop(self) -> None:
+        """Остановить сервер."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+    
+    async def __aenter__(self) -> 'FakeTelegramServer':
+        return self
+    
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+    
+    def _rate_limited(self, method: str) -> bool:
+        if method not in RATE_LIMITED_METHODS:
+            return False
+        self._limited_requests += 1
+        if self.rate_limit_every and self._limited_requests % self.rate_limit_every == 0:
+            return True
+        return self.rate_limit_probability > 0 and self._random.random() < self.rate_limit_probability
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        form = await request.post() if request.can_read_body else {}
+        params = {name: _decode_param(name, value) for name, value in form.items()}
+        params.update({name: _decode_param(name, value) for name, value in request.query.items()})
+        
+        delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        
+        handler = self._methods.get(method.lower())
+        if handler is None:
+            return self._error(method, params, 404, "Not Found: method not found")
+        if self._rate_limited(method.lower()):
+            return self._error(
+                method, params, 429,
+                f"Too Many Requests: retry after {self.retry_after}",
+                {'retry_after': self.retry_after}
+            )
+        
+        result = await handler(params)
+        self.recorded.append(RecordedCall(method, params, time.time(), None))
+        return web.json_response({'ok': True, 'result': result})
+    
+    def _error(
+        self,
+        method: str,
+        params: Dict[str, Any],
+        code: int,
+        description: str,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> web.Response:
+        self.recorded.append(RecordedCall(method, params, time.time(), code))
+        body: Dict[str, Any] = {'ok': False, 'error_code': code, 'description': description}
+        if parameters:
+            body['parameters'] = parameters
+        return web.json_response(body, status=code)
+    
+    async def _control_push(self, request: web.Request) -> web.Response:
+        body = await request.json()
+        updates = body if isinstance(body, list) else [body]
+        ids = [self.push_update(update) for update in updates]
+        return web.json_response({'ok': True, 'update_ids': ids})
+    
+    async def _control_calls(self, request: web.Request) -> web.Response:
+        calls = self.calls(request.query.get('method'))
+        return web.json_response([call._asdict() for call in calls])
+    
+    async def _control_reset(self, request: web.Request) -> web.Response:
+        self.reset()
+        return web.json_response({'ok': True})
+    
+    # --- Методы Bot API ---
+    
+    def _message(self, params: Dict[str, Any], **content: Any) -> Dict[str, Any]:
+        chat_id = params.get('chat_id')
+        if isinstance(chat_id, int):
+            chat = {'id': chat_id, 'type': 'private' if chat_id > 0 else 'supergroup'}
+        else:
+            chat = {'id': -1, 'type': 'channel', 'username': str(chat_id).lstrip('@')}
+        message = {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': chat,
+            'from': BOT_USER,
+        }
+        if params.get('caption'):
+            message['caption'] = params['caption']
+        message.update(content)
+        return message
+    
+    def _file(self, value: Any, **fields: Any) -> Dict[str, Any]:
+        number = next(self._file_ids)
+        if isinstance(value, str) and not value.startswith(('upload:', 'attach://')):
+            file_id = value
+        else:
+            file_id = f"fake-file-{number}"
+        return {'file_id': file_id, 'file_unique_id': f"fake-unique-{number}", **fields}
+    
+    async def _true(self, params: Dict[str, Any]) -> bool:
+        return True
+    
+    async def _get_me(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return BOT_USER
+    
+    async def _get_webhook_info(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {'url': '', 'has_custom_certificate': False, 'pending_update_count': len(self._updates)}
+    
+    async def _get_updates(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        offset = params.get('offset')
+        if isinstance(offset, int) and offset > 0:
+            self._updates = [update for update in self._updates if update['update_id'] >= offset]
+        if not self._updates and params.get('timeout'):
+            self._updates_added.clear()
+            try:
+                await asyncio.wait_for(self._updates_added.wait(), params['timeout'])
+            except asyncio.TimeoutError:
+                pass
+        return self._updates[:params.get('limit') or 100]
+    
+    async def _send_message(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._message(params, text=params.get('text', ''))
+    
+    async def _send_photo(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._message(params, photo=[self._file(params.get('photo'), width=1280, height=720)])
+    
+    async def _send_document(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._message(params, document=self._file(params.get('document')))
+    
+    async def _send_video(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        return self._message(params, video=self._file(params.get('video'), width=1280, height=720, duration=1))
+    
+    async def _send_media_group(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+        group_id = f"group-{next(self._file_ids)}"
+        messages = []
+        for item in params.get('media') or []:
+            kind = item.get('type', 'document')
+            if kind == 'photo':
+                content: Dict[str, Any] = {'photo': [self._file(item.get('media'), width=1280, height=720)]}
+            elif kind == 'video':
+                content = {'video': self._file(item.get('media'), width=1280, height=720, duration=1)}
+            else:
+                content = {kind: self._file(item.get('media'))}
+            if item.get('caption'):
+                content['caption'] = item['caption']
+            messages.append(self._message(params, media_group_id=group_id, **content))
+        return messages
+    
+    async def _edit_message_text(self, params: Dict[str, Any]) -> Any:
+        if params.get('inline_message_id'):
+            return True
+        message = self._message(params, text=params.get('text', ''), edit_date=int(time.time()))
+        message['message_id'] = params.get('message_id', message['message_id'])
+        return message
+
+
+def iter_updates(path: str) -> Iterable[Dict[str, Any]]:
+    """Обновления из файла JSON lines (по одному объекту на строку)."""
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = FakeTelegramServer(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every,
+        rate_limit_probability=args.rate_limit_probability,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    if args.updates:
+        for update in iter_updates(args.updates):
+            server.push_update(update)
+    url = await server.start(args.host, args.port)
+    print(f"Fake Bot API listening on {url} (TELEGRAM_API_URL={url})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help='Адрес сервера')
+    parser.add_argument('--port', type=int, default=8081, help='Порт сервера')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Задержка каждого ответа')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Случайная добавка к задержке')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Отвечать 429 на каждый N-й запрос')
+    parser.add_argument('--rate-limit-probability', type=float, default=0.0, help='Вероятность ответа 429')
+    parser.add_argument('--retry-after', type=int, default=1, help='retry_after в ответах 429 (секунды)')
+    parser.add_argument('--seed', type=int, help='Seed для воспроизводимых задержек и 429')
+    parser.add_argument('--updates', help='Файл JSON lines с обновлениями для getUpdates')
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
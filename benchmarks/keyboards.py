@@ -0,0 +1,77 @@
+"""
+Микро-бенчмарк кэша клавиатур (app.keyboards).
+
+Сравнивает сборку клавиатуры через InlineKeyboardBuilder/ReplyKeyboardBuilder
+с выдачей готового объекта из кэша: время и пиковый объём выделенной
+памяти (tracemalloc) на один вызов.
+
+Запуск из корня репозитория:
+    python -m benchmarks.keyboards [--calls N] [--json]
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Callable, Dict
+
+from app import keyboards
+
+# (название, сборка без кэша, выдача из кэша)
+CASES = {
+    'files': (keyboards._build_files_keyboard, keyboards.get_files_keyboard),
+    'main_menu': (keyboards._build_main_menu_keyboard, keyboards.get_main_menu_keyboard),
+    'confirmation': (keyboards._build_confirmation_keyboard, keyboards.get_confirmation_keyboard),
+    'skip': (keyboards._build_skip_keyboard, keyboards.get_skip_keyboard),
+}
+
+
+def measure_time(func: Callable[[str], Any], calls: int, lang: str = 'ru') -> float:
+    """Среднее время одного вызова func(lang) в микросекундах."""
+    start = time.perf_counter()
+    for _ in range(calls):
+        func(lang)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def measure_peak(func: Callable[[str], Any], lang: str = 'ru') -> int:
+    """Пиковый объём памяти (байт), выделенной за один вызов."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func(lang)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run(calls: int) -> Dict[str, Any]:
+    """Выполнить замеры для всех клавиатур."""
+    results = {}
+    for name, (build, cached) in CASES.items():
+        results[name] = {
+            'build': {'us_per_call': measure_time(build, calls), 'peak_bytes': measure_peak(build)},
+            'cached': {'us_per_call': measure_time(cached, calls), 'peak_bytes': measure_peak(cached)},
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=5000, help='Количество вызовов на замер')
+    parser.add_argument('--json', action='store_true', help='Вывести результат в JSON')
+    args = parser.parse_args()
+    
+    results = run(args.calls)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    
+    print(f"{'keyboard':<14} {'build, us':>10} {'cached, us':>11} {'build peak, B':>14} {'cached peak, B':>15}")
+    for name, result in results.items():
+        print(
+            f"{name:<14} {result['build']['us_per_call']:>10.2f} {result['cached']['us_per_call']:>11.3f} "
+            f"{result['build']['peak_bytes']:>14} {result['cached']['peak_bytes']:>15}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+"""
+Нагрузочный тест: тысячи виртуальных пользователей проходят форму заявки.
+
+Каждый виртуальный пользователь выполняет сценарий
+/start → язык → /new → имя → телефон → email → описание → файлы →
+preview → отправка → /my_leads; доля пользователей (--cancel-rate)
+отменяет заявку на шаге preview вместо отправки.
+
+Обновления подаются прямо в диспетчер (dp.feed_raw_update) со всеми
+middleware; запросы бота к Bot API уходят на фейковый сервер
+(benchmarks/fake_api.py), заявки сохраняются во временную БД.
+Время шага - от подачи обновления до конца его обработки, включая
+запросы к API.
+
+Отчёт: p50/p95/p99 по шагам, пропускная способность, доля ошибок,
+рост размера БД.
+
+Запуск из корня репозитория:
+    python -m benchmarks.loadtest [--users 1000] [--concurrency 100] [--latency-ms 30]
+    python -m benchmarks.loadtest --api-url http://127.0.0.1:8081 --output load.json
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import asyncio
+import argparse
+import tempfile
+import itertools
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from benchmarks.common import make_meta, save_json, summarize_latencies
+from benchmarks.fake_api import FakeTelegramServer, make_callback_update, make_message_update
+
+# Шаги сценария в порядке выполнения (для отчёта)
+STEPS = (
+    'start', 'language', 'new', 'name', 'phone', 'email', 'description',
+    'files', 'files_done', 'send', 'cancel', 'my_leads',
+)
+
+# ID первого виртуального пользователя
+FIRST_USER_ID = 5_000_000
+
+DESCRIPTION_PARTS = (
+    "Нужен ремонт квартиры 60 м2",
+    "замена электрики и сантехники",
+    "покраска стен, укладка ламината",
+    "срок - до конца месяца",
+    "бюджет около 5000 евро",
+    "квартира в Подгорице, 3 этаж",
+)
+
+UpdateBuilder = Callable[[int], Dict[str, Any]]
+
+
+def configure_environment(db_path: str) -> None:
+    """
+    Настроить окружение бота до импорта app.config.
+    
+    Токен и чат администратора - фиктивные: запросы уходят на фейковый API.
+    """
+    os.environ['BOT_TOKEN'] = '123456:LOADTEST'
+    os.environ['ADMIN_CHAT_ID'] = '-1000000000001'
+    os.environ['DB_PATH'] = db_path
+    os.environ['METRICS_PORT'] = '0'
+    os.environ['BOT_MODE'] = 'polling'
+    # Синтетический и воспроизводимый трафик не записывается
+    os.environ['UPDATE_RECORD_PATH'] = ''
+    # Под нагрузкой почти все обновления "медленные" - не засоряем вывод
+    os.environ.setdefault('TRACE_SLOW_MS', '60000')
+
+
+def user_script(user_id: int, rng: random.Random, files: int, cancel: bool) -> Iterator[Tuple[str, UpdateBuilder]]:
+    """
+    Шаги одного виртуального пользователя.
+    
+    Args:
+        user_id: ID пользователя
+        rng: Генератор случайных данных пользователя
+        files: Количество файлов в заявке
+        cancel: Отменить заявку на шаге preview
+    
+    Yields:
+        (шаг, функция update_id -> обновление)
+    """
+    def message(text: Optional[str] = None, **content: Any) -> UpdateBuilder:
+        return lambda update_id: make_message_update(update_id, user_id, text, **content)
+    
+    def callback(data: str) -> UpdateBuilder:
+        return lambda update_id: make_callback_update(update_id, user_id, data)
+    
+    description = ', '.join(rng.sample(DESCRIPTION_PARTS, rng.randint(2, len(DESCRIPTION_PARTS))))
+    
+    yield 'start', message('/start')
+    yield 'language', callback('lang:ru')
+    yield 'new', message('/new')
+    yield 'name', message(f"Load User {user_id}")
+    yield 'phone', message(f"+382 67 {user_id % 1_000_000:06d}")
+    yield 'email', message(f"user{user_id}@example.com")
+    yield 'description', message(description)
+    for index in range(files):
+        file_id = f"file-{user_id}-{index}"
+        if index % 2 == 0:
+            photo = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 1280, 'height': 720}]
+            yield 'files', message(photo=photo)
+        else:
+            yield 'files', message(document={'file_id': file_id, 'file_unique_id': file_id, 'file_name': 'plan.pdf'})
+    yield 'files_done', callback('files:done')
+    yield ('cancel', callback('confirm:cancel')) if cancel else ('send', callback('confirm:send'))
+    yield 'my_leads', message('/my_leads')
+
+
+async def run_user(
+    dp: Any,
+    bot: Any,
+    script: Iterator[Tuple[str, UpdateBuilder]],
+    update_ids: Iterator[int],
+    timings: Dict[str, List[float]],
+    errors: Dict[str, int],
+    error_kinds: Counter,
+    think_ms: float,
+    rng: random.Random
+) -> None:
+    """Пройти сценарий; после ошибки пользователь прекращает сценарий."""
+    for step, build in script:
+        if think_ms:
+            await asyncio.sleep(rng.uniform(0, think_ms) / 1000)
+        update = build(next(update_ids))
+        started = time.perf_counter()
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            timings[step].append(time.perf_counter() - started)
+            errors[step] += 1
+            error_kinds[type(e).__name__] += 1
+            return
+        timings[step].append(time.perf_counter() - started)
+
+
+def count_leads(db_path: str) -> int:
+    """Количество заявок в БД."""
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM leads").fetchone()[0]
+    finally:
+        conn.close()
+
+
+async def run(args: argparse.Namespace, db_path: str) -> Dict[str, Any]:
+    """Выполнить нагрузочный тест и собрать результаты."""
+    # Импорт здесь: app.config читает окружение при импорте
+    from app.bot import create_bot, create_dispatcher
+    from app.db import init_db
+    
+    init_db(db_path)
+    db_size_before = os.path.getsize(db_path)
+    
+    server = None
+    api_url = args.api_url
+    if not api_url:
+        server = FakeTelegramServer(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            rate_limit_every=args.rate_limit_every,
+            seed=args.seed
+        )
+        api_url = await server.start()
+    
+    bot = create_bot(api_url=api_url)
+    dp = create_dispatcher()
+    
+    rng = random.Random(args.seed)
+    update_ids = itertools.count(1)
+    timings: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    error_kinds: Counter = Counter()
+    slots = asyncio.Semaphore(args.concurrency)
+    cancels = 0
+    
+    async def limited(coro: Any) -> None:
+        async with slots:
+            await coro
+    
+    tasks = []
+    for index in range(args.users):
+        user_rng = random.Random(rng.random())
+        cancel = user_rng.random() < args.cancel_rate
+        cancels += cancel
+        script = user_script(FIRST_USER_ID + index, user_rng, args.files, cancel)
+        tasks.append(limited(run_user(
+            dp, bot, script, update_ids, timings, errors, error_kinds, args.think_ms, user_rng
+        )))
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    finally:
+        await bot.session.close()
+        if server is not None:
+            await server.stop()
+    
+    updates = sum(len(values) for values in timings.values())
+    failed = sum(errors.values())
+    leads = count_leads(db_path)
+    db_size_after = os.path.getsize(db_path)
+    
+    totals: Dict[str, Any] = {
+        'users': args.users,
+        'concurrency': args.concurrency,
+        'updates': updates,
+        'errors': failed,
+        'error_rate': failed / updates if updates else 0.0,
+        'error_kinds': dict(error_kinds),
+        'seconds': elapsed,
+        'updates_per_second': updates / elapsed if elapsed else 0.0,
+        'leads_saved': leads,
+        'leads_expected': args.users - cancels,
+        'leads_per_second': leads / elapsed if elapsed else 0.0,
+        'db_bytes_before': db_size_before,
+        'db_bytes_after': db_size_after,
+        'db_bytes_per_lead': (db_size_after - db_size_before) / leads if leads else 0.0,
+    }
+    if server is not None:
+        totals['api_calls'] = len(server.recorded)
+        totals['api_rate_limited'] = len(server.calls(ok=False))
+    
+    steps = {}
+    for step in STEPS:
+        if step in timings:
+            steps[step] = {**summarize_latencies(timings[step]), 'errors': errors.get(step, 0)}
+    
+    return {
+        'meta': make_meta(
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            files=args.files,
+            cancel_rate=args.cancel_rate,
+            think_ms=args.think_ms,
+            external_api=bool(args.api_url),
+        ),
+        'totals': totals,
+        'steps': steps,
+    }
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Вывести результаты в читаемом виде."""
+    t = results['totals']
+    print(
+        f"Users: {t['users']} (concurrency {t['concurrency']}), "
+        f"updates: {t['updates']}, time: {t['seconds']:.1f} s"
+    )
+    print(f"Throughput: {t['updates_per_second']:.0f} updates/s, {t['leads_per_second']:.1f} leads/s")
+    kinds = ', '.join(f"{name}: {count}" for name, count in sorted(t['error_kinds'].items()))
+    print(f"Errors: {t['errors']} ({t['error_rate']:.2%}){f' - {kinds}' if kinds else ''}")
+    print(
+        f"DB: {t['db_bytes_before'] / 1024:.1f} KiB -> {t['db_bytes_after'] / 1024:.1f} KiB "
+        f"({t['db_bytes_per_lead']:.0f} B per lead), leads saved {t['leads_saved']}/{t['leads_expected']}"
+    )
+    if 'api_calls' in t:
+        print(f"Bot API calls: {t['api_calls']} (429: {t['api_rate_limited']})")
+    print()
+    print(f"{'step':<12} {'count':>7} {'errors':>7} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'max, ms':>9}")
+    for step, s in results['steps'].items():
+        print(
+            f"{step:<12} {s['count']:>7} {s['errors']:>7} {s['p50']:>9.2f} "
+            f"{s['p95']:>9.2f} {s['p99']:>9.2f} {s['max']:>9.2f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000, help='Количество виртуальных пользователей')
+    parser.add_argument('--concurrency', type=int, default=100, help='Пользователей одновременно')
+    parser.add_argument('--files', type=int, default=1, help='Файлов в каждой заявке')
+    parser.add_argument('--cancel-rate', type=float, default=0.1, help='Доля пользователей, отменяющих заявку')
+    parser.add_argument('--think-ms', type=float, default=0.0, help='Пауза перед шагом (0..think-ms)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Задержка фейкового API')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Случайная добавка к задержке API')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='Ответ 429 на каждый N-й запрос к API')
+    parser.add_argument('--api-url', help='Внешний фейковый API (python -m benchmarks.fake_api)')
+    parser.add_argument('--db', type=Path, help='Файл БД (по умолчанию временный)')
+    parser.add_argument('--seed', type=int, default=1, help='Seed сценариев')
+    parser.add_argument('--log-level', default='ERROR', help='Уровень логов бота')
+    parser.add_argument('--output', type=Path, help='Сохранить результаты в JSON-файл')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix='loadtest-') as tmp:
+        db_path = str(args.db or Path(tmp) / 'leads.db')
+        configure_environment(db_path)
+        
+        from app.logging_setup import setup_logging
+        setup_logging(args.log_level, 'text')
+        
+        results = asyncio.run(run(args, db_path))
+    
+    print_report(results)
+    if args.output:
+        save_json(args.output, results)
+    return 1 if results['totals']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
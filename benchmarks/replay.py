@@ -0,0 +1,214 @@
+"""
+Воспроизведение записанного трафика (UPDATE_RECORD_PATH) через диспетчер.
+
+Обновления из одного или нескольких файлов .jsonl.gz (app/recording.py)
+подаются в диспетчер в порядке записи с исходными интервалами,
+ускоренными в --speed раз, или без пауз (--speed max). Обновления
+одного пользователя обрабатываются строго по очереди, как в боте.
+Запросы к Bot API уходят на фейковый сервер, заявки - во временную БД.
+
+Отчёт: время обработки по типам обновлений (p50/p95/p99), отставание
+от расписания записи, пропускная способность и ошибки.
+
+Запуск из корня репозитория:
+    python -m benchmarks.replay updates.jsonl.gz [--speed 10]
+    python -m benchmarks.replay updates.shard-*.jsonl.gz --speed max --output replay.json
+"""
+import sys
+import gzip
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import make_meta, save_json, summarize_latencies
+from benchmarks.fake_api import FakeTelegramServer
+from benchmarks.loadtest import configure_environment, count_leads
+
+
+def parse_speed(value: str) -> float:
+    """Скорость воспроизведения: число (1, 10, 0.5) или 'max' (0 - без пауз)."""
+    if value == 'max':
+        return 0.0
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def load_records(paths: List[Path], limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Прочитать записи из файлов и упорядочить по времени получения.
+    
+    Обрезанный последний gzip-блок (бот завершился аварийно) пропускается.
+    """
+    records = []
+    for path in paths:
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+        except EOFError:
+            print(f"{path}: truncated, using {len(records)} records read so far", file=sys.stderr)
+    records.sort(key=lambda record: record['ts'])
+    return records[:limit] if limit else records
+
+
+def update_type(update: Dict[str, Any]) -> str:
+    """Тип обновления (message, callback_query, ...)."""
+    return next((name for name in update if name != 'update_id'), 'unknown')
+
+
+async def run(args: argparse.Namespace, db_path: str) -> Dict[str, Any]:
+    """Воспроизвести записи и собрать результаты."""
+    # Импорт здесь: app.config читает окружение при импорте
+    from app.bot import create_bot, create_dispatcher
+    from app.db import init_db
+    from app.sharding import update_user_id
+    
+    records = load_records(args.files, args.limit)
+    if not records:
+        raise SystemExit("No records to replay")
+    
+    init_db(db_path)
+    server = None
+    api_url = args.api_url
+    if not api_url:
+        server = FakeTelegramServer(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, seed=1)
+        api_url = await server.start()
+    bot = create_bot(api_url=api_url)
+    dp = create_dispatcher()
+    
+    timings: Dict[str, List[float]] = defaultdict(list)
+    lags: List[float] = []
+    errors: Counter = Counter()
+    slots = asyncio.Semaphore(args.max_in_flight)
+    # Последняя задача каждого пользователя - следующая ждёт её завершения
+    tails: Dict[int, asyncio.Task] = {}
+    
+    async def process(previous: Optional[asyncio.Task], update: Dict[str, Any]) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            started = time.perf_counter()
+            try:
+                await dp.feed_raw_update(bot, update)
+            except Exception as e:
+                errors[type(e).__name__] += 1
+            timings[update_type(update)].append(time.perf_counter() - started)
+        finally:
+            slots.release()
+    
+    origin = records[0]['ts']
+    started = time.perf_counter()
+    try:
+        for record in records:
+            if args.speed:
+                due = started + (record['ts'] - origin) / args.speed
+                delay = due - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                lags.append(max(0.0, time.perf_counter() - due))
+            await slots.acquire()
+            update = record['update']
+            user_id = update_user_id(update)
+            task = asyncio.create_task(process(tails.get(user_id), update))
+            tails[user_id] = task
+            task.add_done_callback(
+                lambda done, user_id=user_id: tails.pop(user_id) if tails.get(user_id) is done else None
+            )
+        if tails:
+            await asyncio.wait(list(tails.values()))
+        elapsed = time.perf_counter() - started
+    finally:
+        await bot.session.close()
+        if server is not None:
+            await server.stop()
+    
+    replayed = sum(len(values) for values in timings.values())
+    failed = sum(errors.values())
+    recorded_span = records[-1]['ts'] - origin
+    totals: Dict[str, Any] = {
+        'updates': replayed,
+        'users': len({update_user_id(record['update']) for record in records}),
+        'recorded_seconds': recorded_span,
+        'seconds': elapsed,
+        'effective_speed': recorded_span / elapsed if elapsed else 0.0,
+        'updates_per_second': replayed / elapsed if elapsed else 0.0,
+        'errors': failed,
+        'error_rate': failed / replayed if replayed else 0.0,
+        'error_kinds': dict(errors),
+        'leads_saved': count_leads(db_path),
+    }
+    if server is not None:
+        totals['api_calls'] = len(server.recorded)
+    if lags:
+        totals['schedule_lag'] = summarize_latencies(lags)
+    
+    return {
+        'meta': make_meta(
+            files=[str(path) for path in args.files],
+            speed=args.speed or 'max',
+            latency_ms=args.latency_ms,
+            external_api=bool(args.api_url),
+        ),
+        'totals': totals,
+        'types': {name: summarize_latencies(values) for name, values in sorted(timings.items())},
+    }
+
+
+def print_report(results: Dict[str, Any]) -> None:
+    """Вывести результаты в читаемом виде."""
+    t = results['totals']
+    print(
+        f"Replayed {t['updates']} updates from {t['users']} users: "
+        f"{t['recorded_seconds']:.1f} s recorded in {t['seconds']:.1f} s (x{t['effective_speed']:.1f})"
+    )
+    print(f"Throughput: {t['updates_per_second']:.0f} updates/s, leads saved: {t['leads_saved']}")
+    kinds = ', '.join(f"{name}: {count}" for name, count in sorted(t['error_kinds'].items()))
+    print(f"Errors: {t['errors']} ({t['error_rate']:.2%}){f' - {kinds}' if kinds else ''}")
+    if 'schedule_lag' in t:
+        lag = t['schedule_lag']
+        print(f"Behind schedule: p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms")
+    print()
+    print(f"{'type':<16} {'count':>7} {'p50, ms':>9} {'p95, ms':>9} {'p99, ms':>9} {'max, ms':>9}")
+    for name, s in results['types'].items():
+        print(f"{name:<16} {s['count']:>7} {s['p50']:>9.2f} {s['p95']:>9.2f} {s['p99']:>9.2f} {s['max']:>9.2f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='+', type=Path, help='Файлы записи (.jsonl.gz)')
+    parser.add_argument('--speed', type=parse_speed, default=1.0, help="Ускорение: 1, 10, ... или 'max'")
+    parser.add_argument('--limit', type=int, help='Воспроизвести только первые N обновлений')
+    parser.add_argument('--max-in-flight', type=int, default=1000, help='Обновлений в обработке одновременно')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Задержка фейкового API')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='Случайная добавка к задержке API')
+    parser.add_argument('--api-url', help='Внешний фейковый API (python -m benchmarks.fake_api)')
+    parser.add_argument('--db', type=Path, help='Файл БД (по умолчанию временный)')
+    parser.add_argument('--log-level', default='ERROR', help='Уровень логов бота')
+    parser.add_argument('--output', type=Path, help='Сохранить результаты в JSON-файл')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory(prefix='replay-') as tmp:
+        db_path = str(args.db or Path(tmp) / 'leads.db')
+        configure_environment(db_path)
+        
+        from app.logging_setup import setup_logging
+        setup_logging(args.log_level, 'text')
+        
+        results = asyncio.run(run(args, db_path))
+    
+    print_report(results)
+    if args.output:
+        save_json(args.output, results)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
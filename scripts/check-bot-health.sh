@@ -8,6 +8,8 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_DIR="$(dirname "$SCRIPT_DIR")"
 DB_PATH="$PROJECT_DIR/leads.db"
 SERVICE_NAME="telegram-lead-bot"
+# Адрес /healthz (нужен METRICS_PORT в .env); пусто - проверка пропускается
+HEALTH_URL="${HEALTH_URL:-}"
 
 echo "=== Telegram Lead Bot Health Check ==="
 echo "Date: $(date)"
@@ -105,8 +107,27 @@ if command -v df &> /dev/null; then
 fi
 echo ""
 
-# Проверка 6: Backups
-echo "6. Checking backups..."
+# Проверка 6: HTTP health endpoint
+echo "6. Checking /healthz and /readyz..."
+if [ -n "$HEALTH_URL" ] && command -v curl &> /dev/null; then
+    for ENDPOINT in healthz readyz; do
+        URL="${HEALTH_URL%/}"
+        BODY=$(curl -s -w '\n%{http_code}' "$URL/$ENDPOINT" 2>/dev/null)
+        CODE=$(echo "$BODY" | tail -1)
+        if [ "$CODE" == "200" ]; then
+            echo "   ✓ /$ENDPOINT OK"
+        else
+            echo "   ✗ /$ENDPOINT failed (HTTP $CODE)"
+            echo "$BODY" | head -1 | sed 's/^/   /'
+        fi
+    done
+else
+    echo "   - HEALTH_URL not set or curl not available, skipping..."
+fi
+echo ""
+
+# Проверка 7: Backups
+echo "7. Checking backups..."
 BACKUP_DIR="$PROJECT_DIR/backups"
 if [ -d "$BACKUP_DIR" ]; then
     BACKUP_COUNT=$(find "$BACKUP_DIR" -name "leads_backup_*.db.gz" 2>/dev/null | wc -l)